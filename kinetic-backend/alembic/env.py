@@ -21,6 +21,11 @@ if config.config_file_name is not None:
 from app.database.base import Base
 from app.models.user import User
 from app.models.workout import Workout
+from app.models.stream import WorkoutStream
+from app.models.best_effort import BestEffort
+from app.models.rollup import WorkoutRollup
+from app.models.personal_record import PersonalRecord
+from app.models.training_load import DailyTrainingLoad
 
 target_metadata = Base.metadata
 
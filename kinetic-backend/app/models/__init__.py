@@ -1,4 +1,24 @@
 from app.models.user import User
 from app.models.workout import Workout
+from app.models.stream import WorkoutStream
+from app.models.best_effort import BestEffort
+from app.models.rollup import WorkoutRollup
+from app.models.personal_record import PersonalRecord
+from app.models.training_load import DailyTrainingLoad
+from app.models.chat import ChatMessage, DailyUsage
+from app.models.program import TrainingProgram, ProgramWeek, ProgramWorkout
 
-__all__ = ["User", "Workout"]
\ No newline at end of file
+__all__ = [
+    "User",
+    "Workout",
+    "WorkoutStream",
+    "BestEffort",
+    "WorkoutRollup",
+    "PersonalRecord",
+    "DailyTrainingLoad",
+    "ChatMessage",
+    "DailyUsage",
+    "TrainingProgram",
+    "ProgramWeek",
+    "ProgramWorkout",
+]
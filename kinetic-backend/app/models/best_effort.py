@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.database.base import Base
+
+class BestEffort(Base):
+    __tablename__ = "best_efforts"
+    __table_args__ = (
+        UniqueConstraint("workout_id", "distance", name="uq_best_efforts_workout_distance"),
+        # Fastest effort per distance for a user is an index range scan
+        Index("ix_best_efforts_user_distance_time", "user_id", "distance", "elapsed_time"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    workout_id = Column(Integer, ForeignKey("workouts.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    distance = Column(Integer, nullable=False)  # meters, e.g. 5000
+    elapsed_time = Column(Float, nullable=False)  # seconds
+    start_offset = Column(Float, nullable=False)  # seconds into the activity
+
+    workout = relationship("Workout", back_populates="best_efforts")
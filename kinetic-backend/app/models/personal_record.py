@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database.base import Base
+
+# PR progression per user and record, maintained by app/services/personal_records.py.
+# Each row is a workout that beat every earlier qualifying workout when it happened;
+# the latest row of a record is the current PR and has is_current set.
+class PersonalRecord(Base):
+    __tablename__ = "personal_records"
+    __table_args__ = (
+        # A record's history in date order is an index range scan
+        Index("ix_personal_records_user_record_achieved", "user_id", "record", "achieved_at"),
+        Index("ix_personal_records_user_current", "user_id", "sport", postgresql_where=text("is_current")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    workout_id = Column(Integer, ForeignKey("workouts.id", ondelete="CASCADE"), nullable=False)
+    sport = Column(String, nullable=False)  # Run, Ride, Swim
+    record = Column(String, nullable=False)  # e.g. longest_run, fastest_5k
+    value = Column(Float, nullable=False)  # lower is better; negated for longest/biggest/fastest-speed records
+    achieved_at = Column(DateTime, nullable=False)  # the workout's start_date
+    is_current = Column(Boolean, nullable=False, default=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    workout = relationship("Workout", back_populates="personal_records")
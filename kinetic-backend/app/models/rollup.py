@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database.base import Base
+
+# Pre-aggregated workout totals per user, sport and calendar period, kept in step
+# with workouts by app/services/rollups.py. period is "day", "week" or "month";
+# period_start is date_trunc(period, start_date), naive UTC like workouts.start_date.
+class WorkoutRollup(Base):
+    __tablename__ = "workout_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    type = Column(String, primary_key=True)
+    period = Column(String, primary_key=True)
+    period_start = Column(DateTime, primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    distance = Column(Float, nullable=False, default=0)  # meters
+    moving_time = Column(Integer, nullable=False, default=0)  # seconds
+    elevation = Column(Float, nullable=False, default=0)  # meters
+
+    # Average heart rate over the period is heartrate_sum / heartrate_count
+    heartrate_sum = Column(Float, nullable=False, default=0)
+    heartrate_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
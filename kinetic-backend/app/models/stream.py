@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, LargeBinary, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database.base import Base
+
+# One row per workout. Each stream is stored as a zlib-compressed typed array
+# (see app/services/streams.py); NULL means Strava had no such stream.
+class WorkoutStream(Base):
+    __tablename__ = "workout_streams"
+
+    workout_id = Column(Integer, ForeignKey("workouts.id", ondelete="CASCADE"), primary_key=True)
+    sample_count = Column(Integer, nullable=False, default=0)
+
+    time = Column(LargeBinary, nullable=True)  # int32 seconds, delta-encoded
+    distance = Column(LargeBinary, nullable=True)  # float32 meters
+    heartrate = Column(LargeBinary, nullable=True)  # float32 bpm
+    altitude = Column(LargeBinary, nullable=True)  # float32 meters
+    cadence = Column(LargeBinary, nullable=True)  # float32 rpm / spm
+    watts = Column(LargeBinary, nullable=True)  # float32 watts
+    latlng = Column(LargeBinary, nullable=True)  # float64 (n, 2) degrees
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    workout = relationship("Workout", back_populates="streams")
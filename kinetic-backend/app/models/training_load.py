@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from app.database.base import Base
+
+# Daily fitness/fatigue model per user, maintained by app/services/training_load.py.
+# One row per day from the user's first workout to their latest one; later days
+# are projected on read by decaying the last row.
+class DailyTrainingLoad(Base):
+    __tablename__ = "daily_training_loads"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True)  # UTC day
+
+    load = Column(Float, nullable=False, default=0)  # sum of the day's workout load scores
+    ctl = Column(Float, nullable=False, default=0)  # chronic training load ("fitness"), 42-day EWMA
+    atl = Column(Float, nullable=False, default=0)  # acute training load ("fatigue"), 7-day EWMA
+    tsb = Column(Float, nullable=False, default=0)  # training stress balance ("form"), yesterday's ctl - atl
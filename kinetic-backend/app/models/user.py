@@ -18,6 +18,13 @@ class User(Base):
     strava_token_expires_at = Column(DateTime, nullable=True)
     strava_athlete_id = Column(Integer, nullable=True, index=True)
 
+    # Incremental sync cursor (naive UTC)
+    strava_last_activity_at = Column(DateTime, nullable=True)
+    strava_last_synced_at = Column(DateTime, nullable=True)
+
+    # Bumped whenever the user's workouts change; cached analytics are keyed on it
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -1,11 +1,29 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, BigInteger
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, BigInteger, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.database.base import Base
 
+# Text search configuration of Workout.search_vector; queries must parse with the same one
+SEARCH_CONFIG = "english"
+
 class Workout(Base):
     __tablename__ = "workouts"
-    
+    __table_args__ = (
+        # A user's workouts of some sports within a date range are one index range scan per sport
+        Index("ix_workouts_user_type_start_date", "user_id", "type", "start_date"),
+        # Keyset pagination of the workouts listing reads this newest first from any (start_date, id)
+        Index("ix_workouts_user_start_date_id", "user_id", "start_date", "id"),
+        # Workout search: full-text matches on search_vector, fuzzy (trigram) matches on name,
+        # both within one user's workouts. Need the btree_gin and pg_trgm extensions, which
+        # the migrations install.
+        Index("ix_workouts_user_search_vector", "user_id", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_workouts_user_name_trgm", "user_id", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     strava_id = Column(BigInteger, unique=True, index=True)
@@ -26,6 +44,17 @@ class Workout(Base):
 
     suffer_score = Column(Integer, nullable=True)
 
+    # Stemmed words of the name, kept up to date by Postgres. The sport is left out:
+    # it has its own filter, and "run" would match most of a runner's workouts.
+    # Deferred so loading workouts doesn't fetch it.
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', coalesce(name, ''))", persisted=True),
+    ))
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    user = relationship("User", back_populates="workouts")
\ No newline at end of file
+    user = relationship("User", back_populates="workouts")
+    streams = relationship("WorkoutStream", back_populates="workout", uselist=False, passive_deletes=True)
+    best_efforts = relationship("BestEffort", back_populates="workout", passive_deletes=True)
+    personal_records = relationship("PersonalRecord", back_populates="workout", passive_deletes=True)
@@ -1,38 +1,134 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
-from app.database.base import get_db
+from app.database.base import SessionLocal, get_db
 from app.models.user import User
+from app.routes.chat import get_usage
 from app.services.analytics import AnalyticsService
+from app.services.analytics_cache import cached_content, cached_json_response
+from app.services.rollups import period_end, period_start
+from app.services.serializers import program_summaries
+from app.services.training_load import get_training_load
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 @router.get("/dashboard/{user_id}")
-async def get_dashboard_stats(user_id: int, db: Session = Depends(get_db)):
+async def get_dashboard_stats(user_id: int, request: Request, db: Session = Depends(get_db)):
     """Get dashboard statistics for a user"""
 
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    stats = AnalyticsService.get_dashboard_stats(db, user_id)
+    def compute():
+        stats = AnalyticsService.get_dashboard_stats(db, user_id)
+        return {
+            "total_activities": stats["total_activities"],
+            "this_week": stats["this_week"],
+            "training_load": stats["training_load"],
+            "fitness": stats["fitness"]
+        }
 
-    return {
-        "total_activities": stats["total_activities"],
-        "this_week": stats["this_week"],
-        "training_load": stats["training_load"]
-    }
+    return cached_json_response(request, db, user_id, "dashboard", compute, version=user.data_version)
+
+def _in_own_session(query, *args):
+    """Run query(db, *args) on a session of its own, so bundle sections can use separate pooled connections at once"""
+    db = SessionLocal()
+    try:
+        return query(db, *args)
+    finally:
+        db.close()
+
+def _bundle_stats(db: Session, user_id: int, version: int):
+    return cached_content(user_id, "dashboard", version, lambda: AnalyticsService.get_dashboard_stats(db, user_id))
+
+def _bundle_weekly(db: Session, user_id: int, version: int):
+    return cached_content(user_id, "weekly", version, lambda: AnalyticsService.get_weekly_summary(db, user_id))
+
+@router.get("/dashboard/{user_id}/bundle")
+async def get_dashboard_bundle(user_id: int, db: Session = Depends(get_db)):
+    """
+    Get everything the dashboard shows in one response: stats, weekly summary,
+    chat usage and programs. The sections are queried concurrently, each on
+    its own session; stats and weekly share the cache of their own endpoints.
+    """
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    stats, weekly, usage, programs = await asyncio.gather(
+        run_in_threadpool(_in_own_session, _bundle_stats, user_id, user.data_version),
+        run_in_threadpool(_in_own_session, _bundle_weekly, user_id, user.data_version),
+        run_in_threadpool(_in_own_session, get_usage, user_id),
+        run_in_threadpool(_in_own_session, program_summaries, user_id),
+    )
+    return ORJSONResponse({"stats": stats, "weekly": weekly, "usage": usage, "programs": programs})
 
 @router.get("/weekly/{user_id}")
-async def get_weekly_summary(user_id: int, db: Session = Depends(get_db)):
+async def get_weekly_summary(user_id: int, request: Request, db: Session = Depends(get_db)):
     """Get weekly training summary for a user"""
 
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    summary = AnalyticsService.get_weekly_summary(db, user_id)
-
-    return summary
+    return cached_json_response(
+        request, db, user_id, "weekly", lambda: AnalyticsService.get_weekly_summary(db, user_id), version=user.data_version
+    )
     
-    
\ No newline at end of file
+    
+
+@router.get("/training-load/{user_id}")
+async def get_training_load_series(user_id: int, request: Request, days: int = Query(90, ge=1, le=3650), db: Session = Depends(get_db)):
+    """Get today's fitness (CTL), fatigue (ATL) and form (TSB) with the daily series for the last N days"""
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return cached_json_response(
+        request, db, user_id, f"training-load:{days}", lambda: get_training_load(db, user_id, days), version=user.data_version
+    )
+
+@router.get("/range/{user_id}")
+async def get_range_summary(
+    user_id: int,
+    request: Request,
+    start: datetime = Query(..., alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    granularity: str = "week",
+    sport: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Get per-sport totals between from and to (default the end of today, UTC),
+    bucketed by day, week, month or year. Repeat sport=Run&sport=Ride to limit the sports.
+    """
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Workout start dates are stored as naive UTC
+    start = start.astimezone(timezone.utc).replace(tzinfo=None) if start.tzinfo else start
+    # A default end on a day boundary keeps the cache key, and the ETag, stable all day
+    end = end or period_end("day", period_start("day", datetime.utcnow()))
+    end = end.astimezone(timezone.utc).replace(tzinfo=None) if end.tzinfo else end
+    sports = sorted(set(sport)) if sport else None
+
+    def compute():
+        return AnalyticsService.get_range_summary(db, user_id, start, end, granularity, sports)
+
+    try:
+        return cached_json_response(
+            request, db, user_id, f"range:{start.isoformat()}:{end.isoformat()}:{granularity}:{sports}", compute,
+            version=user.data_version,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,14 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-import httpx
 import os
 from app.database.base import get_db
 from app.models.user import User
+from app.services.strava_client import STRAVA_BASE_URL, strava_request
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
-STRAVA_DEAUTH_URL = "https://www.strava.com/oauth/deauthorize"
+STRAVA_DEAUTH_URL = f"{STRAVA_BASE_URL}/oauth/deauthorize"
 
 class LogoutRequest(BaseModel):
     user_id: int
@@ -28,16 +28,16 @@ async def logout(
     
     # Revoke Strava token if it exists
     if user.strava_access_token:
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    STRAVA_DEAUTH_URL,
-                    data={"access_token": user.strava_access_token}
-                )
-                if response.status_code != 200:
-                    print(f"Warning: Strava token revocation failed with status {response.status_code}")
-            except Exception as e:
-                print(f"Error revoking Strava token: {str(e)}")
+        try:
+            response = await strava_request(
+                "POST",
+                STRAVA_DEAUTH_URL,
+                data={"access_token": user.strava_access_token}
+            )
+            if response.status_code != 200:
+                print(f"Warning: Strava token revocation failed with status {response.status_code}")
+        except Exception as e:
+            print(f"Error revoking Strava token: {str(e)}")
     
     user.strava_access_token = None
     user.strava_refresh_token = None
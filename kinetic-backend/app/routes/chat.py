@@ -2,6 +2,7 @@ from email import message
 from secrets import token_urlsafe
 from sys import prefix
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import date, datetime, timedelta
@@ -12,6 +13,8 @@ from app.database.base import get_db
 from app.models.chat import ChatMessage, DailyUsage
 from app.models.user import User
 from app.services.analytics import AnalyticsService
+from app.services.serializers import chat_history
+from app.services.training_load import get_training_load
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
@@ -102,6 +105,7 @@ async def send_message(request: ChatRequest, db: Session = Depends(get_db)):
     # Get workout context for AI
     workout_context = AnalyticsService.get_workout_context(db, request.user_id, limit=10)
     weekly_summary = AnalyticsService.get_weekly_summary(db, request.user_id)
+    fitness = get_training_load(db, request.user_id, days=1)
 
     # Build system prompt
     system_prompt = f"""You are an expert fitness coach helping {user.first_name} with their training
@@ -115,6 +119,11 @@ Weekly summary:
 - Total time: {weekly_summary['total_time_hours']}hrs
 - Activities: {weekly_summary['activity_breakdown']}
 
+Training load (TRIMP-based):
+- Fitness (CTL, 42-day): {fitness['ctl']}
+- Fatigue (ATL, 7-day): {fitness['atl']}
+- Form (TSB): {fitness['tsb']}
+
 Guidlines:
 - Focus on fitness, training, recovery, and performance topics
 - Be supportive, motivating, and specific
@@ -179,24 +188,10 @@ Guidlines:
 @router.get("/history/{user_id}")
 async def get_chat_history(user_id: int, db: Session = Depends(get_db)):
     """Get chat history for a user"""
-    messages = db.query(ChatMessage).filter(
-        ChatMessage.user_id == user_id
-    ).order_by(ChatMessage.created_at.asc()).all()
+    return ORJSONResponse({"messages": chat_history(db, user_id)})
 
-    return {
-        "messages": [
-            {
-                "role": msg.role,
-                "content": msg.content,
-                "created_at": msg.created_at.isoformat()
-            }
-            for msg in messages
-        ]
-    }
-
-@router.get("/usage/{user_id}")
-async def get_usage_stats(user_id: int, db: Session = Depends(get_db)):
-    """Get usage statistics for a user"""
+def get_usage(db: Session, user_id: int) -> dict:
+    """Today's message and token usage against the daily limit"""
     today = datetime.utcnow().date()
 
     usage = db.query(DailyUsage).filter(
@@ -215,4 +210,9 @@ async def get_usage_stats(user_id: int, db: Session = Depends(get_db)):
         "messages_used": usage.message_count,
         "messages_remaining": MAX_DAILY_MESSAGES - usage.message_count,
         "tokens_used_today": usage.total_tokens
-    }
\ No newline at end of file
+    }
+
+@router.get("/usage/{user_id}")
+async def get_usage_stats(user_id: int, db: Session = Depends(get_db)):
+    """Get usage statistics for a user"""
+    return get_usage(db, user_id)
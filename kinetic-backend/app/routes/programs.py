@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
@@ -8,6 +9,7 @@ from app.database.base import get_db
 from app.models.program import TrainingProgram, ProgramWeek, ProgramWorkout
 from app.models.user import User
 from app.services.program_generator import ProgramGenerator
+from app.services.serializers import program_detail, program_summaries
 
 router = APIRouter(prefix="/api/programs", tags=["programs"])
 
@@ -142,27 +144,21 @@ async def generate_program(request: GenerateProgramRequest, db: Session = Depend
         raise HTTPException(status_code=500, detail=f"Error generating program: {str(e)}")
 
 
-@router.get("/{user_id}", response_model=List[ProgramSummary])
+@router.get("/{user_id}", response_class=ORJSONResponse, responses={200: {"model": List[ProgramSummary]}})
 async def get_user_programs(user_id: int, db: Session = Depends(get_db)):
     """Get all programs for a user"""
-    programs = db.query(TrainingProgram).filter(
-        TrainingProgram.user_id == user_id
-    ).order_by(TrainingProgram.created_at.desc()).all()
-    
-    return programs
+    return ORJSONResponse(program_summaries(db, user_id))
 
 
-@router.get("/detail/{program_id}", response_model=ProgramResponse)
+@router.get("/detail/{program_id}", response_class=ORJSONResponse, responses={200: {"model": ProgramResponse}})
 async def get_program_detail(program_id: int, db: Session = Depends(get_db)):
     """Get detailed program with all weeks and workouts"""
-    program = db.query(TrainingProgram).filter(
-        TrainingProgram.id == program_id
-    ).first()
-    
+    program = program_detail(db, program_id)
+
     if not program:
         raise HTTPException(status_code=404, detail="Program not found")
-    
-    return program
+
+    return ORJSONResponse(program)
 
 
 @router.put("/workout/{workout_id}/complete")
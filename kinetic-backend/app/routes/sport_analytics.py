@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
 from sqlalchemy.orm import Session
 from app.database.base import get_db
+from app.services.analytics_cache import cached_json_response
+from app.services.personal_records import PERSONAL_RECORDS
 from app.services.sport_analytics import (
+    get_record_history,
+    get_sport_analytics,
     get_running_analytics,
     get_cycling_analytics,
     get_swimming_analytics
@@ -9,15 +14,40 @@ from app.services.sport_analytics import (
 
 router = APIRouter(prefix="/api/analytics", tags=["sport_analytics"])
 
+@router.get("/sports/{user_id}")
+async def get_all_sport_stats(user_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Get running, cycling and swimming analytics for a user in one response,
+    keyed by sport. Each sport has the same shape as its own endpoint.
+    """
+    try:
+        return cached_json_response(request, db, user_id, "sports", lambda: get_sport_analytics(db, user_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/records/{user_id}/history")
+async def get_record_progression(user_id: int, request: Request, record: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Get PR progression over time, keyed by record name. Pass record=<name>
+    (e.g. longest_run, fastest_5k) to get a single record's history.
+    """
+    if record is not None and record not in PERSONAL_RECORDS:
+        raise HTTPException(status_code=400, detail=f"Unknown record: {record}")
+    try:
+        return cached_json_response(
+            request, db, user_id, f"records:{record or '*'}", lambda: get_record_history(db, user_id, record)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/running/{user_id}")
-async def get_running_stats(user_id: int, db: Session = Depends(get_db)):
+async def get_running_stats(user_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Get comprehensive running analytics for a user
     Includes: overview, personal records, weekly progress, recent activities
     """
     try:
-        analytics = get_running_analytics(db, user_id)
-        return analytics
+        return cached_json_response(request, db, user_id, "running", lambda: get_running_analytics(db, user_id))
     except Exception as e:
         print(f"Error in get_running_stats: {str(e)}")
         import traceback
@@ -25,25 +55,23 @@ async def get_running_stats(user_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/cycling/{user_id}")
-async def get_cycling_stats(user_id: int, db: Session = Depends(get_db)):
+async def get_cycling_stats(user_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Get comprehensive cycling analytics for a user
     Includes: overview, personal records, weekly progress, recent activities
     """
     try:
-        analytics = get_cycling_analytics(db, user_id)
-        return analytics
+        return cached_json_response(request, db, user_id, "cycling", lambda: get_cycling_analytics(db, user_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/swimming/{user_id}")
-async def get_swimming_stats(user_id: int, db: Session = Depends(get_db)):
+async def get_swimming_stats(user_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Get comprehensive swimming analytics for a user
     Includes: overview, personal records, weekly progress, recent activities
     """
     try:
-        analytics = get_swimming_analytics(db, user_id)
-        return analytics
+        return cached_json_response(request, db, user_id, "swimming", lambda: get_swimming_analytics(db, user_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,24 +1,38 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from sqlalchemy.orm import Session
+from pydantic import BaseModel
 import httpx
 import os
+import zipfile
+from celery.result import AsyncResult
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 from app.database.base import get_db
 from app.models.user import User
-from app.models.workout import Workout
+from app.services.bulk_import import spool_upload
+from app.services.strava_client import STRAVA_BASE_URL, scheduler, strava_request
+from app.services.strava_tokens import STRAVA_CLIENT_ID, STRAVA_CLIENT_SECRET, STRAVA_TOKEN_URL
+from app.services.webhooks import COALESCE_WINDOW_SECONDS, deauthorize_athlete, is_our_subscription, queue_activity_event
+from app.tasks import flush_webhook_events, import_strava_export as import_export_job, sync_user_workouts, sync_workout_streams
+from app.worker import celery_app
 
 router = APIRouter(prefix="/api/strava", tags=["strava"])
 
 # Environment variables
-STRAVA_CLIENT_ID = os.getenv("STRAVA_CLIENT_ID")
-STRAVA_CLIENT_SECRET = os.getenv("STRAVA_CLIENT_SECRET")
 STRAVA_REDIRECT_URI = os.getenv("STRAVA_REDIRECT_URI", "http://localhost:5173/auth/callback")
+STRAVA_WEBHOOK_VERIFY_TOKEN = os.getenv("STRAVA_WEBHOOK_VERIFY_TOKEN")
 
 # Strava API endpoints
-STRAVA_AUTH_URL = "https://www.strava.com/oauth/authorize"
-STRAVA_TOKEN_URL = "https://www.strava.com/oauth/token"
-STRAVA_API_BASE = "https://www.strava.com/api/v3"
+STRAVA_AUTH_URL = f"{STRAVA_BASE_URL}/oauth/authorize"
+
+class StravaWebhookEvent(BaseModel):
+    object_type: str  # activity, athlete
+    object_id: int
+    aspect_type: str  # create, update, delete
+    owner_id: int
+    subscription_id: int
+    event_time: int
+    updates: Dict = {}
 
 @router.get("/auth/url")
 async def get_auth_url():
@@ -44,96 +58,74 @@ async def handle_callback(
     Exchange Strava auth code for access token
     Create or update user with Strava data
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            # Exchange code for access token
-            token_response = await client.post(
-                STRAVA_TOKEN_URL,
-                data={
-                    "client_id": STRAVA_CLIENT_ID,
-                    "client_secret": STRAVA_CLIENT_SECRET,
-                    "code": code,
-                    "grant_type": "authorization_code"
-                }
-            )
-            token_response.raise_for_status()
-            data = token_response.json()
-
-            athlete = data.get("athlete")
-
-            # Check if user exists
-            user = db.query(User).filter(User.strava_athlete_id == athlete.get("id")).first()
-
-            if not user:
-                user = User(
-                    email=athlete.get("email", f"user{athlete.get('id')}@strava.local"),
-                    first_name=athlete.get("firstname"),
-                    last_name=athlete.get("lastname"),
-                    profile_photo=athlete.get("profile"),
-                    strava_athlete_id=athlete["id"],
-                    strava_access_token=data["access_token"],
-                    strava_refresh_token=data["refresh_token"],
-                    strava_token_expires_at=datetime.fromtimestamp(data["expires_at"]),
-                )
-                db.add(user)
-            else:
-                user.strava_access_token = data["access_token"]
-                user.strava_refresh_token = data["refresh_token"]
-                user.strava_token_expires_at = datetime.fromtimestamp(data["expires_at"])
-                user.first_name = athlete.get("firstname")
-                user.last_name = athlete.get("lastname")
-                user.profile_photo = athlete.get("profile")
-            
-            db.commit()
-            db.refresh(user)
-
-            return {
-                "id": user.id,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "profile_photo": user.profile_photo,
-                "strava_athlete_id": user.strava_athlete_id,
-            }
-
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=400, detail=f"Strava API Error: {str(e)}")
-
-async def refresh_strava_token(user: User, db: Session):
-    """ Refresh expired Strava access token """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
+    try:
+        # Exchange code for access token
+        token_response = await strava_request(
+            "POST",
             STRAVA_TOKEN_URL,
             data={
                 "client_id": STRAVA_CLIENT_ID,
                 "client_secret": STRAVA_CLIENT_SECRET,
-                "grant_type": "refresh_token",
-                "refresh_token": user.strava_refresh_token,
+                "code": code,
+                "grant_type": "authorization_code"
             }
         )
-        response.raise_for_status()
-        data = response.json()
+        token_response.raise_for_status()
+        data = token_response.json()
+
+        athlete = data.get("athlete")
+
+        # Check if user exists
+        user = db.query(User).filter(User.strava_athlete_id == athlete.get("id")).first()
 
-        user.strava_access_token = data["access_token"]
-        user.strava_refresh_token = data["refresh_token"]
-        user.strava_token_expires_at = datetime.fromtimestamp(data["expires_at"])
+        if not user:
+            user = User(
+                email=athlete.get("email", f"user{athlete.get('id')}@strava.local"),
+                first_name=athlete.get("firstname"),
+                last_name=athlete.get("lastname"),
+                profile_photo=athlete.get("profile"),
+                strava_athlete_id=athlete["id"],
+                strava_access_token=data["access_token"],
+                strava_refresh_token=data["refresh_token"],
+                strava_token_expires_at=datetime.fromtimestamp(data["expires_at"]),
+            )
+            db.add(user)
+        else:
+            user.strava_access_token = data["access_token"]
+            user.strava_refresh_token = data["refresh_token"]
+            user.strava_token_expires_at = datetime.fromtimestamp(data["expires_at"])
+            user.first_name = athlete.get("firstname")
+            user.last_name = athlete.get("lastname")
+            user.profile_photo = athlete.get("profile")
+        
         db.commit()
+        db.refresh(user)
 
-        return data["access_token"]
+        return {
+            "id": user.id,
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "profile_photo": user.profile_photo,
+            "strava_athlete_id": user.strava_athlete_id,
+        }
 
-async def get_valid_token(user: User, db: Session):
-    """Get valid access token, refreshing if necessary"""
-    if datetime.now() >= user.strava_token_expires_at:
-        return await refresh_strava_token(user, db)
-    return user.strava_access_token
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=400, detail=f"Strava API Error: {str(e)}")
 
 @router.post("/sync/{user_id}")
 async def sync_workouts(
     user_id: int,
-    after: Optional[int] = Query(None, description="Timestamp to fetch activities after"),
+    after: Optional[int] = Query(None, description="Timestamp to fetch activities after (overrides the stored watermark)"),
+    full: bool = Query(False, description="Walk the athlete's entire activity history"),
     db: Session = Depends(get_db)
 ):
-    """ Fetch workouts from Strava and store in database """
+    """
+    Queue a background job that fetches workouts from Strava and stores them.
+    Without `after` or `full`, only activities newer than the user's stored
+    sync watermark are fetched. Users who have never synced get a full sync.
+    Poll /sync/jobs/{job_id} for progress and results.
+    """
 
     user = db.query(User).filter(User.id == user_id).first()
 
@@ -143,61 +135,84 @@ async def sync_workouts(
     if not user.strava_access_token:
         raise HTTPException(status_code=400, detail="Strava not connected")
 
-    token = await get_valid_token(user, db)
-
-    async with httpx.AsyncClient() as client:
-        try:
-            # Fetch activities
-            params = {"per_page": 200}
-            if after:
-                params["after"] = after
-            
-            response = await client.get(
-                f"{STRAVA_API_BASE}/athlete/activities",
-                headers={"Authorization": f"Bearer {token}"},
-                params=params
-            )
-            response.raise_for_status()
-            activities = response.json()
-
-            # Store activities in database
-            new_count = 0
-            for activity in activities:
-                # Check if activity already exists
-                existing = db.query(Workout).filter(
-                    Workout.strava_id == activity["id"]
-                ).first()
-
-                if not existing:
-                    workout = Workout(
-                        user_id=user.id,
-                        strava_id=activity["id"],
-                        name=activity["name"],
-                        type=activity["type"],
-                        start_date=datetime.fromisoformat(activity["start_date"].replace("Z", "+00:00")),
-                        distance=activity.get("distance", 0),
-                        moving_time=activity.get("moving_time", 0),
-                        elapsed_time=activity.get("elapsed_time", 0),
-                        total_elevation_gain=activity.get("total_elevation_gain", 0),
-                        average_speed=activity.get("average_speed", 0),
-                        max_speed=activity.get("max_speed", 0),
-                        average_heartrate=activity.get("average_heartrate"),
-                        max_heartrate=activity.get("max_heartrate"),
-                        suffer_score=activity.get("suffer_score")
-                    )
-                    db.add(workout)
-                    new_count += 1
-
-            db.commit()
-
-            return {
-                "success": True,
-                "total_activities": len(activities),
-                "new_activities": new_count
-            }
+    job = sync_user_workouts.delay(user.id, after=after, full=full)
+
+    return {
+        "job_id": job.id,
+        "status": job.status
+    }
 
-        except httpx.HTTPError as e:
-            raise HTTPException(status_code=500, detail=f"Strava API error: {str(e)}")
+@router.get("/sync/jobs/{job_id}")
+async def get_sync_job(job_id: str):
+    """ Report progress or results of a sync job """
+    job = AsyncResult(job_id, app=celery_app)
+
+    response = {
+        "job_id": job_id,
+        "status": job.status
+    }
+
+    if job.status == "PROGRESS":
+        response["progress"] = job.info
+    elif job.successful():
+        response["result"] = job.result
+    elif job.failed():
+        response["error"] = str(job.result)
+
+    return response
+
+@router.post("/streams/{user_id}")
+async def sync_streams(user_id: int, db: Session = Depends(get_db)):
+    """ Queue a background job that backfills activity streams for the user's workouts """
+    user = db.query(User).filter(User.id == user_id).first()
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if not user.strava_access_token:
+        raise HTTPException(status_code=400, detail="Strava not connected")
+
+    job = sync_workout_streams.delay(user.id)
+
+    return {
+        "job_id": job.id,
+        "status": job.status
+    }
+
+@router.post("/import/{user_id}")
+async def import_strava_export(
+    user_id: int,
+    request: Request,
+    streams: bool = Query(False, description="Also store activity streams and best efforts from the files"),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a background import of a Strava bulk export (the zip from Settings >
+    My Account > Download your data), sent as the raw request body. Activity
+    files are parsed straight out of the archive; no Strava API calls are made.
+    Poll /sync/jobs/{job_id} for progress.
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    try:
+        zip_path = await spool_upload(request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    if not zipfile.is_zipfile(zip_path):
+        os.unlink(zip_path)
+        raise HTTPException(status_code=400, detail="Upload is not a zip archive")
+
+    # The job deletes the spooled archive once it's done with it
+    job = import_export_job.delay(user.id, zip_path, streams)
+
+    return {
+        "job_id": job.id,
+        "status": job.status
+    }
 
 @router.get("/status/{user_id}")
 async def get_strava_status(user_id: int, db: Session = Depends(get_db)):
@@ -210,5 +225,45 @@ async def get_strava_status(user_id: int, db: Session = Depends(get_db)):
     return {
         "connected": bool(user.strava_access_token),
         "athlete_id": user.strava_athlete_id,
+        "last_synced_at": user.strava_last_synced_at.isoformat() if user.strava_last_synced_at else None,
         "name": f"{user.first_name} {user.last_name}" if user.first_name else None
-    }
\ No newline at end of file
+    }
+
+@router.get("/rate-limit")
+async def get_rate_limit_budget():
+    """ Report the shared Strava rate limit budget """
+    return await scheduler.snapshot()
+
+@router.get("/webhook")
+async def validate_webhook_subscription(
+    hub_mode: str = Query(..., alias="hub.mode"),
+    hub_challenge: str = Query(..., alias="hub.challenge"),
+    hub_verify_token: str = Query(..., alias="hub.verify_token"),
+):
+    """ Echo the challenge back when Strava validates a push subscription """
+    if hub_mode != "subscribe" or not STRAVA_WEBHOOK_VERIFY_TOKEN or hub_verify_token != STRAVA_WEBHOOK_VERIFY_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid verify token")
+
+    return {"hub.challenge": hub_challenge}
+
+@router.post("/webhook")
+async def receive_webhook_event(event: StravaWebhookEvent, db: Session = Depends(get_db)):
+    """
+    Receive a Strava push event. Activity events are buffered per athlete and
+    ingested together once the coalescing window closes. Events for any
+    subscription but ours are rejected.
+    Strava expects a 200 within two seconds, so no Strava calls happen here.
+    """
+    if not is_our_subscription(event.subscription_id):
+        raise HTTPException(status_code=403, detail="Unknown subscription")
+
+    if event.object_type == "athlete":
+        if event.updates.get("authorized") == "false":
+            deauthorize_athlete(db, event.owner_id)
+        return {"success": True}
+
+    if event.object_type == "activity":
+        if queue_activity_event(event.owner_id, event.object_id, event.aspect_type):
+            flush_webhook_events.apply_async((event.owner_id,), countdown=COALESCE_WINDOW_SECONDS)
+
+    return {"success": True}
@@ -1,14 +1,114 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from app.database.base import get_db
-from app.models.workout import Workout
+from app.models.user import User
+from app.services.workout_export import EXPORT_FORMATS, export_workouts
+from app.services.workout_list import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, list_workouts, listing_conditions, parse_fields
+from app.services.workout_search import DEFAULT_SEARCH_PAGE_SIZE, MAX_SEARCH_OFFSET, MAX_SEARCH_PAGE_SIZE, search_workouts
 
 router = APIRouter()
 
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    # Workout start dates are stored as naive UTC
+    if moment is not None and moment.tzinfo:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
 @router.get("/workouts/{user_id}")
-async def get_user_workouts(user_id: int, db: Session = Depends(get_db)):
-    """Get all workouts for a user"""
-    workouts = db.query(Workout).filter(
-        Workout.user_id == user_id
-    ).order_by(Workout.start_date.desc()).all()
-    return workouts
\ No newline at end of file
+async def get_user_workouts(
+    user_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    type: Optional[List[str]] = Query(None),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    min_distance: Optional[float] = Query(None, ge=0),
+    max_distance: Optional[float] = Query(None, ge=0),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Get a page of a user's workouts, newest first. Pass the returned
+    next_cursor as cursor for the following page. Filter with type (repeat
+    for several), from/to and min_distance/max_distance (meters); fields=
+    is a comma-separated list of the columns to return.
+    """
+    start, end = _naive_utc(start), _naive_utc(end)
+
+    try:
+        page = list_workouts(
+            db, user_id, limit, cursor, sorted(set(type)) if type else None, start, end, min_distance, max_distance, fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Rows are plain values from a Core query; skip jsonable_encoder's walk over them
+    return ORJSONResponse(page)
+
+@router.get("/workouts/{user_id}/search")
+async def search_user_workouts(
+    user_id: int,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    type: Optional[List[str]] = Query(None),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Search a user's workout names, best match first; filter sports with
+    type. Words are stemmed ("repeats" finds "repeat") and near-misses match
+    too. Pass the returned next_offset as offset for the following page; it
+    is null once the results run out or reach the deepest allowed offset.
+    """
+    try:
+        page = search_workouts(
+            db, user_id, q, limit, offset, sorted(set(type)) if type else None, _naive_utc(start), _naive_utc(end), fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(page)
+
+@router.get("/workouts/{user_id}/export")
+async def export_user_workouts(
+    user_id: int,
+    format: str = "ndjson",
+    gzip: bool = False,
+    type: Optional[List[str]] = Query(None),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    min_distance: Optional[float] = Query(None, ge=0),
+    max_distance: Optional[float] = Query(None, ge=0),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Download a user's workouts, oldest first, as NDJSON or CSV (format=).
+    Takes the listing's filters and fields=; gzip=true compresses the stream.
+    The body is streamed from a server-side cursor, never built in memory.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}. Expected one of: {', '.join(EXPORT_FORMATS)}")
+    try:
+        columns = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    conditions = listing_conditions(
+        user_id, sorted(set(type)) if type else None, _naive_utc(start), _naive_utc(end), min_distance, max_distance
+    )
+    headers = {"Content-Disposition": f'attachment; filename="workouts.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        export_workouts(conditions, columns, format, gzip), media_type=EXPORT_FORMATS[format], headers=headers
+    )
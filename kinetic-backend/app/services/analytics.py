@@ -1,72 +1,197 @@
+from sqlalchemy import and_, func, or_, select, true
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from app.models.rollup import WorkoutRollup
+from app.models.training_load import DailyTrainingLoad
 from app.models.workout import Workout
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
+from app.services.rollups import get_rollup_totals, period_end, period_start
+from app.services.training_load import current_training_load
+
+RANGE_GRANULARITIES = ("day", "week", "month", "year")
+
+# Upper bound on buckets per sport in one range response
+MAX_RANGE_BUCKETS = 1000
+
+
+def _last_seven_days() -> datetime:
+    """Start of the oldest of the last 7 daily rollup buckets (naive UTC)"""
+    return period_start("day", datetime.utcnow()) - timedelta(days=6)
+
+
+def dashboard_query(user_id: int, since: datetime):
+    """
+    Lifetime and since-`since` totals as FILTERed sums over the user's month
+    and day rollups, alongside the latest stored training load day, in one row.
+    """
+    lifetime = WorkoutRollup.period == "month"
+    week = and_(WorkoutRollup.period == "day", WorkoutRollup.period_start >= since)
+
+    totals = (
+        select(
+            func.coalesce(func.sum(WorkoutRollup.count).filter(lifetime), 0).label("total_activities"),
+            func.coalesce(func.sum(WorkoutRollup.count).filter(week), 0).label("this_week"),
+            func.coalesce(func.sum(WorkoutRollup.moving_time).filter(week), 0).label("week_moving_time"),
+        )
+        .where(WorkoutRollup.user_id == user_id, or_(lifetime, week))
+        .subquery()
+    )
+    latest_load = (
+        select(DailyTrainingLoad.date, DailyTrainingLoad.ctl, DailyTrainingLoad.atl, DailyTrainingLoad.tsb)
+        .where(DailyTrainingLoad.user_id == user_id)
+        .order_by(DailyTrainingLoad.date.desc())
+        .limit(1)
+        .subquery()
+    )
+    return select(totals, latest_load).select_from(totals).outerjoin(latest_load, true())
+
+
+def range_query(user_id: int, start: datetime, end: datetime, granularity: str, sports: Optional[List[str]] = None):
+    """
+    Per-sport, per-period totals of a user's workouts starting in [start, end).
+    The user, sport and date conditions all match ix_workouts_user_type_start_date,
+    so each sport is read with an index range scan.
+    """
+    bucket = func.date_trunc(granularity, Workout.start_date)
+    conditions = [Workout.user_id == user_id, Workout.start_date >= start, Workout.start_date < end]
+    if sports:
+        conditions.append(Workout.type.in_(sports))
+    return (
+        select(
+            Workout.type,
+            bucket.label("period_start"),
+            func.count().label("count"),
+            func.coalesce(func.sum(Workout.distance), 0).label("distance"),
+            func.coalesce(func.sum(Workout.moving_time), 0).label("moving_time"),
+            func.coalesce(func.sum(Workout.total_elevation_gain), 0).label("elevation"),
+            func.avg(Workout.average_heartrate).label("average_heartrate"),
+        )
+        .where(*conditions)
+        .group_by(Workout.type, bucket)
+    )
+
+
+def _range_entry(row=None) -> Dict:
+    if row is None:
+        return {"count": 0, "distance_km": 0, "time_hours": 0, "elevation": 0, "average_heartrate": None}
+    return {
+        "count": row.count,
+        "distance_km": round(row.distance / 1000, 2),
+        "time_hours": round(row.moving_time / 3600, 2),
+        "elevation": round(row.elevation, 0),
+        "average_heartrate": round(row.average_heartrate, 1) if row.average_heartrate is not None else None,
+    }
 
 
 class AnalyticsService:
 
     @staticmethod
     def get_dashboard_stats(db: Session, user_id: int) -> Dict:
-        """Get key stats for dashboard"""
-
-        # Total activities
-        total_activities = db.query(Workout).filter(Workout.user_id == user_id).count()
-
-        # This weeks activities
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        this_week = db.query(Workout).filter(
-            Workout.user_id == user_id,
-            Workout.start_date >= week_ago
-        ).count()
-
-        # Calculate training load
-        week_workouts = db.query(Workout).filter(
-            Workout.user_id == user_id,
-            Workout.start_date >= week_ago
-        ).all()
+        """
+        Get key stats for dashboard. "This week" is the last 7 days, today included.
+
+        Everything comes from one statement, dashboard_query.
+        """
+        row = db.execute(dashboard_query(user_id, _last_seven_days())).one()
+
+        # Training load in hours over the week
+        training_load = round(row.week_moving_time / 3600, 1)
 
-        training_load = sum(w.moving_time for w in week_workouts if w.moving_time) / 3600
-        training_load = round(training_load, 1)
+        # Fitness, fatigue and form from the daily load model, decayed to today
+        ctl, atl, tsb = 0, 0, 0
+        if row.date is not None:
+            ctl, atl, tsb = (round(value, 1) for value in current_training_load(row.date, row.ctl, row.atl, row.tsb))
 
         return{
-            "total_activities": total_activities,
-            "this_week": this_week,
-            "training_load": training_load
+            "total_activities": int(row.total_activities),
+            "this_week": int(row.this_week),
+            "training_load": training_load,
+            "fitness": {"ctl": ctl, "atl": atl, "tsb": tsb}
         }
 
     @staticmethod
     def get_weekly_summary(db: Session, user_id: int) -> Dict:
-        """Get summary of last 7"""
-        week_ago = datetime.utcnow() - timedelta(days=7)
+        """Get summary of last 7 days, today included"""
+        week = get_rollup_totals(db, user_id, "day", since=_last_seven_days())
 
-        workouts = db.query(Workout).filter(
-            Workout.user_id == user_id,
-            Workout.start_date >= week_ago
-        ).all()
-
-        total_distance = sum(w.distance for w in workouts if w.distance) / 1000
-        total_time = sum(w.moving_time for w in workouts if w.moving_time) / 3600
+        total_distance = sum(sport["distance"] for sport in week.values()) / 1000
+        total_time = sum(sport["moving_time"] for sport in week.values()) / 3600
 
-        activity_types = {}
-        for w in workouts:
-            activity_types[w.type] = activity_types.get(w.type, 0) + 1
+        activity_types = {workout_type: sport["count"] for workout_type, sport in week.items()}
 
         return {
-            "total_workouts": len(workouts),
+            "total_workouts": sum(activity_types.values()),
             "total_distance_km": round(total_distance, 1),
             "total_time_hours": round(total_time, 1),
             "activity_breakdown": activity_types
         }
 
+    @staticmethod
+    def get_range_summary(
+        db: Session,
+        user_id: int,
+        start: datetime,
+        end: datetime,
+        granularity: str = "week",
+        sports: Optional[List[str]] = None,
+    ) -> Dict:
+        """
+        Totals per sport for any [start, end) range (naive UTC), bucketed by
+        day, week, month or year. Buckets are calendar periods, the first and
+        last clipped to the range. Every bucket is listed, empty ones included,
+        so charts get a continuous series.
+        """
+        if granularity not in RANGE_GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(RANGE_GRANULARITIES)}")
+        if end <= start:
+            raise ValueError("'to' must be after 'from'")
+
+        buckets = []
+        bucket = period_start(granularity, start)
+        while bucket < end:
+            buckets.append(bucket)
+            if len(buckets) > MAX_RANGE_BUCKETS:
+                raise ValueError(f"Range covers more than {MAX_RANGE_BUCKETS} {granularity} buckets")
+            bucket = period_end(granularity, bucket)
+
+        rows: Dict[str, Dict] = {}
+        for row in db.execute(range_query(user_id, start, end, granularity, sports)):
+            rows.setdefault(row.type, {})[row.period_start] = row
+
+        series = {}
+        totals = {}
+        for workout_type, by_bucket in sorted(rows.items()):
+            series[workout_type] = [
+                {"start": bucket.strftime("%Y-%m-%d"), **_range_entry(by_bucket.get(bucket))}
+                for bucket in buckets
+            ]
+            totals[workout_type] = {
+                "count": sum(row.count for row in by_bucket.values()),
+                "distance_km": round(sum(row.distance for row in by_bucket.values()) / 1000, 2),
+                "time_hours": round(sum(row.moving_time for row in by_bucket.values()) / 3600, 2),
+                "elevation": round(sum(row.elevation for row in by_bucket.values()), 0),
+            }
+
+        return {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "granularity": granularity,
+            "sports": sports,
+            "totals": totals,
+            "series": series,
+        }
+
     @staticmethod
     def get_workout_context(db: Session, user_id: int, limit: int = 10) -> str:
         """Get recent workout context for AI chat"""
 
-        workouts = db.query(Workout).filter(
-            Workout.user_id == user_id
-        ).order_by(Workout.start_date.desc()).limit(limit).all()
+        # Only the columns the context uses, as plain rows rather than ORM instances
+        workouts = db.execute(
+            select(Workout.name, Workout.type, Workout.distance, Workout.moving_time, Workout.average_heartrate)
+            .where(Workout.user_id == user_id)
+            .order_by(Workout.start_date.desc())
+            .limit(limit)
+        ).all()
 
         if not workouts:
             return "No workouts found for this user."
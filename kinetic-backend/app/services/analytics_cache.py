@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models.user import User
+
+# "memory" keeps an LRU per API process; "redis" shares one cache across processes
+ANALYTICS_CACHE_BACKEND = os.getenv("ANALYTICS_CACHE_BACKEND", "memory")
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "2048"))
+
+# Keys carry the day, so Redis entries only need to outlive it
+REDIS_CACHE_TTL_SECONDS = 60 * 60 * 24
+
+
+class _MemoryCache:
+    """Least-recently-used dict of computed analytics"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key: str, value: Any):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+class _RedisCache:
+    """Computed analytics as JSON in Redis, shared by every API process"""
+
+    def __init__(self):
+        import redis
+        from app.worker import REDIS_URL
+
+        self.client = redis.Redis.from_url(REDIS_URL)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(f"analytics:{key}")
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any):
+        self.client.set(f"analytics:{key}", json.dumps(value), ex=REDIS_CACHE_TTL_SECONDS)
+
+
+_cache = _RedisCache() if ANALYTICS_CACHE_BACKEND == "redis" else _MemoryCache(ANALYTICS_CACHE_SIZE)
+
+
+def bump_data_version(db: Session, user_id: int):
+    """Mark a user's workouts as changed, so every cached analytics response for them goes stale"""
+    db.execute(update(User).where(User.id == user_id).values(data_version=User.data_version + 1))
+    db.commit()
+
+
+def get_data_version(db: Session, user_id: int) -> Optional[int]:
+    return db.execute(select(User.data_version).where(User.id == user_id)).scalar()
+
+
+def _cache_key(user_id: int, endpoint: str, version: int) -> str:
+    # Analytics windows ("this week", this month) move with the date, not just with the data
+    return f"{user_id}:{endpoint}:{version}:{datetime.utcnow().date().isoformat()}"
+
+
+def cached_content(user_id: int, endpoint: str, version: int, compute: Callable[[], Any]) -> Any:
+    """The JSON-ready result of `compute` for this data version and date, computed only on a cache miss"""
+    key = _cache_key(user_id, endpoint, version)
+    content = _cache.get(key)
+    if content is None:
+        content = jsonable_encoder(compute())
+        _cache.set(key, content)
+    return content
+
+
+def cached_json_response(
+    request: Request,
+    db: Session,
+    user_id: int,
+    endpoint: str,
+    compute: Callable[[], Any],
+    version: Optional[int] = None,
+) -> Response:
+    """
+    Serve an analytics response from cache when the user's data version and
+    the date are unchanged, computing and storing it otherwise. The ETag is
+    derived from the cache key, so a matching If-None-Match is answered with
+    304 before the cache is even consulted.
+    """
+    if version is None:
+        version = get_data_version(db, user_id)
+    if version is None:
+        # Unknown user: nothing to key on, so don't cache
+        return ORJSONResponse(jsonable_encoder(compute()))
+
+    key = _cache_key(user_id, endpoint, version)
+    etag = f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    return ORJSONResponse(cached_content(user_id, endpoint, version, compute), headers=headers)
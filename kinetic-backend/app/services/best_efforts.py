@@ -0,0 +1,114 @@
+from typing import Dict, List, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.best_effort import BestEffort
+from app.models.workout import Workout
+
+# Standard distances (meters) tracked as best efforts, keyed by record name
+BEST_EFFORT_DISTANCES = {
+    "1k": 1000,
+    "mile": 1609,
+    "5k": 5000,
+    "10k": 10000,
+    "half_marathon": 21097,
+    "marathon": 42195,
+}
+
+# Sports whose streams are scanned for best efforts
+BEST_EFFORT_SPORTS = {"Run"}
+
+
+def compute_best_efforts(time: np.ndarray, distance: np.ndarray, targets: List[int]) -> Dict[int, Tuple[float, float]]:
+    """
+    Find the fastest window covering each target distance anywhere in an
+    activity. Returns {target: (elapsed_seconds, start_offset_seconds)} for
+    every target the activity is long enough for.
+
+    For every start sample, np.searchsorted finds the first sample at least
+    `target` meters further on; the finish time is interpolated between that
+    sample and the one before it, so efforts aren't rounded up to the GPS
+    sampling interval. Everything is vectorized over start samples.
+    """
+    time = np.asarray(time, dtype=np.float64)
+    distance = np.asarray(distance, dtype=np.float64)
+    n = min(len(time), len(distance))
+    # Dropouts leave NaN gaps, which would poison every later cumulative sample; drop
+    # them so the effort is interpolated across the gap
+    valid = ~(np.isnan(time[:n]) | np.isnan(distance[:n]))
+    time = time[:n][valid]
+    # GPS noise can make cumulative distance dip slightly; searchsorted needs it non-decreasing
+    distance = np.maximum.accumulate(distance[:n][valid])
+    n = len(time)
+
+    efforts = {}
+    if n < 2:
+        return efforts
+
+    for target in targets:
+        if distance[-1] - distance[0] < target:
+            continue
+
+        goal = distance + target
+        end = np.searchsorted(distance, goal, side="left")
+        starts = np.nonzero(end < n)[0]
+        end = end[starts]
+
+        d0, d1 = distance[end - 1], distance[end]
+        t0, t1 = time[end - 1], time[end]
+        span = d1 - d0
+        fraction = np.divide(goal[starts] - d0, span, out=np.ones_like(span), where=span > 0)
+        elapsed = t0 + fraction * (t1 - t0) - time[starts]
+
+        best = int(np.argmin(elapsed))
+        efforts[target] = (float(elapsed[best]), float(time[starts[best]] - time[0]))
+
+    return efforts
+
+
+def save_best_efforts(db: Session, user_id: int, workout_id: int, time: np.ndarray, distance: np.ndarray) -> int:
+    """
+    Recompute and store a workout's best efforts. Returns the number stored;
+    the caller refreshes the effort PRs derived from them.
+    """
+    efforts = compute_best_efforts(time, distance, list(BEST_EFFORT_DISTANCES.values()))
+
+    db.query(BestEffort).filter(BestEffort.workout_id == workout_id).delete(synchronize_session=False)
+    if efforts:
+        db.execute(BestEffort.__table__.insert(), [
+            {
+                "workout_id": workout_id,
+                "user_id": user_id,
+                "distance": target,
+                "elapsed_time": elapsed,
+                "start_offset": start_offset,
+            }
+            for target, (elapsed, start_offset) in efforts.items()
+        ])
+    db.commit()
+    return len(efforts)
+
+
+def get_fastest_efforts(db: Session, user_id: int) -> Dict[int, Dict]:
+    """The user's fastest effort per distance, with the workout it came from"""
+    rows = db.execute(
+        select(
+            BestEffort.distance,
+            BestEffort.elapsed_time,
+            BestEffort.workout_id,
+            Workout.start_date,
+        )
+        .join(Workout, Workout.id == BestEffort.workout_id)
+        .where(BestEffort.user_id == user_id)
+        .distinct(BestEffort.distance)
+        .order_by(BestEffort.distance, BestEffort.elapsed_time)
+    ).all()
+
+    return {
+        row.distance: {
+            "elapsed_time": row.elapsed_time,
+            "workout_id": row.workout_id,
+            "start_date": row.start_date,
+        }
+        for row in rows
+    }
@@ -0,0 +1,482 @@
+import csv
+import gzip
+import io
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+from xml.etree import ElementTree
+from billiard.pool import Pool
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.models.workout import Workout
+from app.services.ingest import ingest_activities
+from app.services.streams import store_workout_streams
+
+try:
+    import fitdecode
+except ImportError:  # FIT files are skipped unless the optional fitdecode package is installed
+    fitdecode = None
+
+# Worker processes parsing activity files, and how many files each task handles
+IMPORT_PROCESSES = int(os.getenv("IMPORT_PROCESSES", str(os.cpu_count() or 2)))
+IMPORT_CHUNK_SIZE = 25
+
+# Largest export archive accepted, in bytes
+MAX_EXPORT_BYTES = int(os.getenv("IMPORT_MAX_EXPORT_BYTES", str(4 * 1024 ** 3)))
+
+# Where uploads are spooled for the import job; the API and the workers must both see it
+IMPORT_SPOOL_DIR = os.getenv("IMPORT_SPOOL_DIR") or None
+
+ACTIVITY_EXTENSIONS = (".gpx", ".tcx", ".fit")
+
+# Below this speed (m/s), or across recording gaps longer than this (s), time doesn't count as moving
+MOVING_SPEED = 0.5
+MAX_SAMPLE_GAP = 30
+
+EARTH_RADIUS = 6_371_000
+
+# Sport names used by TCX/FIT files and the export's activities.csv, mapped to Strava activity types
+SPORT_TYPES = {
+    "running": "Run",
+    "biking": "Ride",
+    "cycling": "Ride",
+    "swimming": "Swim",
+    "walking": "Walk",
+    "hiking": "Hike",
+}
+
+
+@lru_cache(maxsize=256)
+def _local(tag: str) -> str:
+    """Tag name without its XML namespace"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _sport_type(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return SPORT_TYPES.get(value.strip().lower(), value.replace(" ", ""))
+
+
+def _iter_elements(stream, tags: set) -> Iterator[ElementTree.Element]:
+    """
+    Yield each completed element whose tag is in `tags`, then detach it from
+    its parent so a large track never sits in memory as a whole tree.
+    """
+    parents = []
+    for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        if _local(elem.tag) in tags:
+            yield elem
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+
+
+def _point_values(elem: ElementTree.Element) -> Dict[str, Optional[str]]:
+    """Text of every element nested in a track point, keyed by local tag name"""
+    return {_local(child.tag): child.text for child in elem.iter()}
+
+
+def _float(value: Optional[str]) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class TrackBuilder:
+    """Collects samples from an activity file into parallel arrays"""
+
+    def __init__(self):
+        self.sport: Optional[str] = None
+        self.name: Optional[str] = None
+        self.start: Optional[datetime] = None
+        self.samples = {key: [] for key in ("time", "lat", "lng", "distance", "altitude", "heartrate", "cadence", "watts")}
+
+    def add(self, time: datetime, **values: float):
+        if self.start is None:
+            self.start = time
+        self.samples["time"].append((time - self.start).total_seconds())
+        for key in ("lat", "lng", "distance", "altitude", "heartrate", "cadence", "watts"):
+            self.samples[key].append(values.get(key, float("nan")))
+
+
+def parse_gpx(stream) -> TrackBuilder:
+    track = TrackBuilder()
+    for elem in _iter_elements(stream, {"trkpt", "name", "type"}):
+        tag = _local(elem.tag)
+        if tag == "name" and track.name is None:
+            track.name = elem.text
+        elif tag == "type":
+            track.sport = _sport_type(elem.text)
+        elif tag == "trkpt":
+            values = _point_values(elem)
+            if not values.get("time"):
+                continue
+            track.add(
+                _parse_time(values["time"]),
+                lat=_float(elem.get("lat")),
+                lng=_float(elem.get("lon")),
+                altitude=_float(values.get("ele")),
+                heartrate=_float(values.get("hr")),
+                cadence=_float(values.get("cad")),
+                watts=_float(values.get("power")),
+            )
+    return track
+
+
+def parse_tcx(stream) -> TrackBuilder:
+    track = TrackBuilder()
+    for elem in _iter_elements(stream, {"Trackpoint", "Activity"}):
+        if _local(elem.tag) == "Activity":
+            track.sport = _sport_type(elem.get("Sport"))
+            continue
+
+        values = _point_values(elem)
+        if not values.get("Time"):
+            continue
+        track.add(
+            _parse_time(values["Time"]),
+            lat=_float(values.get("LatitudeDegrees")),
+            lng=_float(values.get("LongitudeDegrees")),
+            distance=_float(values.get("DistanceMeters")),
+            altitude=_float(values.get("AltitudeMeters")),
+            # HeartRateBpm wraps its reading in a <Value> element
+            heartrate=_float(values.get("Value")),
+            cadence=_float(values.get("Cadence")),
+            watts=_float(values.get("Watts")),
+        )
+    return track
+
+
+def parse_fit(stream) -> TrackBuilder:
+    if fitdecode is None:
+        raise ValueError("FIT support needs the fitdecode package")
+
+    semicircles = 180 / 2 ** 31
+    track = TrackBuilder()
+    with fitdecode.FitReader(stream) as fit:
+        for frame in fit:
+            if frame.frame_type != fitdecode.FIT_FRAME_DATA:
+                continue
+            if frame.name == "sport" or frame.name == "session":
+                track.sport = track.sport or _sport_type(str(frame.get_value("sport", fallback="") or ""))
+            if frame.name != "record":
+                continue
+
+            time = frame.get_value("timestamp", fallback=None)
+            if time is None:
+                continue
+            lat = frame.get_value("position_lat", fallback=None)
+            lng = frame.get_value("position_long", fallback=None)
+            altitude = frame.get_value("enhanced_altitude", fallback=None)
+            if altitude is None:
+                altitude = frame.get_value("altitude", fallback=None)
+            track.add(
+                time if time.tzinfo else time.replace(tzinfo=timezone.utc),
+                lat=lat * semicircles if lat is not None else float("nan"),
+                lng=lng * semicircles if lng is not None else float("nan"),
+                distance=_float(frame.get_value("distance", fallback=None)),
+                altitude=_float(altitude),
+                heartrate=_float(frame.get_value("heart_rate", fallback=None)),
+                cadence=_float(frame.get_value("cadence", fallback=None)),
+                watts=_float(frame.get_value("power", fallback=None)),
+            )
+    return track
+
+
+PARSERS = {".gpx": parse_gpx, ".tcx": parse_tcx, ".fit": parse_fit}
+
+
+def _cumulative_distance(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Haversine distance along a track, in meters"""
+    lat, lng = np.radians(lat), np.radians(lng)
+    a = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lng) / 2) ** 2
+    steps = 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return np.concatenate([[0.0], np.cumsum(np.nan_to_num(steps))])
+
+
+def _nan_stat(values: np.ndarray, stat) -> Optional[float]:
+    if not np.any(~np.isnan(values)):
+        return None
+    return round(float(stat(values)), 1)
+
+
+def summarize_track(track: TrackBuilder, include_streams: bool) -> Optional[Dict]:
+    """Workout summary fields (Strava activity shape) and optional streams from a parsed track"""
+    samples = {key: np.asarray(values, dtype=np.float64) for key, values in track.samples.items()}
+    time = samples["time"]
+    if len(time) < 2:
+        return None
+
+    if np.any(~np.isnan(samples["distance"])):
+        distance = np.fmax.accumulate(np.nan_to_num(samples["distance"]))
+    elif np.any(~np.isnan(samples["lat"])):
+        distance = _cumulative_distance(samples["lat"], samples["lng"])
+    else:
+        distance = np.zeros_like(time)
+
+    dt = np.diff(time)
+    dd = np.diff(distance)
+    speed = np.divide(dd, dt, out=np.zeros_like(dd), where=dt > 0)
+    moving = (dt > 0) & (dt <= MAX_SAMPLE_GAP) & (speed >= MOVING_SPEED)
+    moving_time = int(round(dt[moving].sum()))
+
+    # Single GPS samples jump around; take top speed over ~5 samples
+    window = min(5, len(time) - 1)
+    spans = time[window:] - time[:-window]
+    window_speed = np.divide(distance[window:] - distance[:-window], spans, out=np.zeros_like(spans), where=spans > 0)
+
+    altitude = samples["altitude"]
+    elevation_gain = 0.0
+    valid_altitude = altitude[~np.isnan(altitude)]
+    if len(valid_altitude) > 1:
+        smoothed = np.convolve(valid_altitude, np.ones(5) / 5, mode="valid") if len(valid_altitude) >= 5 else valid_altitude
+        elevation_gain = float(np.clip(np.diff(smoothed), 0, None).sum())
+
+    total_distance = float(distance[-1])
+    summary = {
+        "start_date": track.start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "distance": round(total_distance, 1),
+        "moving_time": moving_time,
+        "elapsed_time": int(round(time[-1] - time[0])),
+        "total_elevation_gain": round(elevation_gain, 1),
+        "average_speed": round(total_distance / moving_time, 3) if moving_time else 0,
+        "max_speed": round(float(window_speed.max()), 3) if len(window_speed) else 0,
+        "average_heartrate": _nan_stat(samples["heartrate"], np.nanmean),
+        "max_heartrate": _nan_stat(samples["heartrate"], np.nanmax),
+        "type": track.sport,
+        "name": track.name,
+    }
+
+    streams = None
+    if include_streams:
+        streams = {"time": np.round(time).astype(int).tolist(), "distance": distance.tolist()}
+        for key in ("altitude", "heartrate", "cadence", "watts"):
+            if np.any(~np.isnan(samples[key])):
+                streams[key] = [None if np.isnan(v) else v for v in samples[key].tolist()]
+        if np.any(~np.isnan(samples["lat"])):
+            streams["latlng"] = np.column_stack([samples["lat"], samples["lng"]]).tolist()
+
+    return {"summary": summary, "streams": streams}
+
+
+def _open_member(archive: zipfile.ZipFile, member: str):
+    """Stream a member out of the archive, gunzipping on the fly"""
+    stream = archive.open(member)
+    if member.endswith(".gz"):
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def parse_members(zip_path: str, members: List[str], include_streams: bool) -> List[Dict]:
+    """Parse a batch of activity files from the archive. Runs in a worker process."""
+    results = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in members:
+            extension = os.path.splitext(member.removesuffix(".gz"))[1].lower()
+            try:
+                with _open_member(archive, member) as stream:
+                    track = PARSERS[extension](stream)
+                parsed = summarize_track(track, include_streams)
+                if parsed is None:
+                    results.append({"member": member, "error": "no samples"})
+                else:
+                    results.append({"member": member, **parsed})
+            except (ElementTree.ParseError, ValueError, EOFError, OSError, zipfile.BadZipFile) as e:
+                results.append({"member": member, "error": str(e)})
+            except Exception as e:
+                # Malformed FIT files raise a variety of decoder errors
+                results.append({"member": member, "error": f"{type(e).__name__}: {str(e)}"})
+    return results
+
+
+def _parse_batch(job: tuple) -> List[Dict]:
+    return parse_members(*job)
+
+
+_pool: Optional[Pool] = None
+_pool_lock = threading.Lock()
+
+
+def _parse_pool() -> Optional[Pool]:
+    """
+    The process's parsing pool, started on first use and shared by every
+    import it runs. A billiard pool, since imports run in Celery's prefork
+    children, which are daemonic and may not start multiprocessing children.
+    None when IMPORT_PROCESSES is 0; files are then parsed in the importing
+    process.
+    """
+    global _pool
+    if IMPORT_PROCESSES < 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = Pool(processes=IMPORT_PROCESSES)
+        return _pool
+
+
+def read_activity_index(archive: zipfile.ZipFile) -> Dict[str, Dict]:
+    """
+    Map activity files to their Strava id, name and type using the export's
+    activities.csv. Activities without a file (manual entries) are left out.
+    """
+    index_name = next((name for name in archive.namelist() if name.rsplit("/", 1)[-1] == "activities.csv"), None)
+    if index_name is None:
+        return {}
+
+    prefix = index_name[: -len("activities.csv")]
+    with archive.open(index_name) as raw:
+        reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+        header = next(reader, [])
+        # Some column names appear twice (e.g. Distance); the first one is the one we want
+        columns = {}
+        for position, name in enumerate(header):
+            columns.setdefault(name, position)
+
+        index = {}
+        for row in reader:
+            def value(column: str) -> Optional[str]:
+                position = columns.get(column)
+                return row[position] if position is not None and position < len(row) else None
+
+            filename = value("Filename")
+            activity_id = value("Activity ID")
+            if not filename or not activity_id or not activity_id.isdigit():
+                continue
+            index[prefix + filename] = {
+                "id": int(activity_id),
+                "name": value("Activity Name"),
+                "type": _sport_type(value("Activity Type")),
+            }
+    return index
+
+
+def _activity_members(archive: zipfile.ZipFile) -> List[str]:
+    return [
+        name for name in archive.namelist()
+        if name.lower().removesuffix(".gz").endswith(ACTIVITY_EXTENSIONS) and not name.endswith("/")
+    ]
+
+
+def _fallback_id(member: str) -> Optional[int]:
+    """Export files are named after the activity id when there's no index entry"""
+    stem = member.rsplit("/", 1)[-1].split(".", 1)[0]
+    return int(stem) if stem.isdigit() else None
+
+
+async def spool_upload(chunks: AsyncIterator[bytes]) -> str:
+    """Write an uploaded archive to a temporary file chunk by chunk and return its path"""
+    size = 0
+    with tempfile.NamedTemporaryFile(prefix="strava-export-", suffix=".zip", dir=IMPORT_SPOOL_DIR, delete=False) as spool:
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > MAX_EXPORT_BYTES:
+                    raise ValueError(f"Export archive is larger than {MAX_EXPORT_BYTES} bytes")
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            os.unlink(spool.name)
+            raise
+    return spool.name
+
+
+def import_export(
+    db: Session,
+    user: User,
+    zip_path: str,
+    include_streams: bool = False,
+    progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """
+    Import every GPX/TCX/FIT activity in a Strava bulk export archive. Runs as
+    a background job (app.tasks.import_strava_export). Files are parsed
+    straight out of the zip across the shared process pool and each batch is
+    upserted as soon as it's parsed, keyed on the Strava activity id so a later
+    API sync updates the same workouts instead of duplicating them. Activity
+    ids another user already holds are skipped and reported as conflicts.
+
+    The user's sync watermark is left alone: activities.csv lists manual and
+    file-less activities that the import skips, and anything uploaded since
+    the export was made isn't in it, so only an API sync may move it.
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        index = read_activity_index(archive)
+        members = _activity_members(archive)
+
+    totals = {"files": len(members), "imported": 0, "new_activities": 0, "updated_activities": 0, "skipped": 0, "conflicts": 0, "streams": 0}
+    errors = []
+    conflicting_ids = []
+
+    batches = [members[i:i + IMPORT_CHUNK_SIZE] for i in range(0, len(members), IMPORT_CHUNK_SIZE)]
+    jobs = [(zip_path, batch, include_streams) for batch in batches]
+    pool = _parse_pool()
+    parsed_batches = pool.imap_unordered(_parse_batch, jobs) if pool else map(_parse_batch, jobs)
+
+    for parsed_batch in parsed_batches:
+        activities = []
+        streams_by_id = {}
+        for parsed in parsed_batch:
+            meta = index.get(parsed["member"], {})
+            activity_id = meta.get("id") or _fallback_id(parsed["member"])
+            if "error" in parsed or activity_id is None:
+                totals["skipped"] += 1
+                errors.append({"file": parsed["member"], "error": parsed.get("error", "unknown activity id")})
+                continue
+
+            summary = parsed["summary"]
+            activities.append({
+                **summary,
+                "id": activity_id,
+                "name": meta.get("name") or summary["name"] or "Imported activity",
+                "type": meta.get("type") or summary["type"] or "Workout",
+            })
+            if parsed["streams"]:
+                streams_by_id[activity_id] = parsed["streams"]
+
+        if activities:
+            result = ingest_activities(db, user.id, activities)
+            # Activity ids already held by another user are left alone, not imported
+            conflicting_ids.extend(result["conflicting_ids"])
+            totals["conflicts"] += len(result["conflicting_ids"])
+            totals["imported"] += len(activities) - len(result["conflicting_ids"])
+            totals["new_activities"] += result["inserted"]
+            totals["updated_activities"] += result["updated"]
+
+        if streams_by_id:
+            workouts = db.execute(
+                select(Workout.id, Workout.strava_id, Workout.type)
+                .where(Workout.user_id == user.id, Workout.strava_id.in_(list(streams_by_id)))
+            ).all()
+            for workout_id, strava_id, workout_type in workouts:
+                store_workout_streams(db, user.id, workout_id, workout_type, streams_by_id[strava_id])
+                totals["streams"] += 1
+
+        if progress:
+            progress(totals)
+
+    return {
+        "success": True,
+        **totals,
+        "errors": errors[:50],
+        "conflicting_ids": conflicting_ids[:50],
+    }
@@ -0,0 +1,156 @@
+from datetime import datetime, timezone
+from typing import Dict, List
+from sqlalchemy import and_, delete, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.workout import Workout
+from app.services.analytics_cache import bump_data_version
+from app.services.personal_records import recompute_records, records_held_by, refresh_personal_records
+from app.services.rollups import refresh_rollups
+from app.services.training_load import refresh_training_load
+
+# Columns refreshed from Strava when an activity is synced again
+UPSERT_COLUMNS = [
+    "name",
+    "type",
+    "start_date",
+    "distance",
+    "moving_time",
+    "elapsed_time",
+    "total_elevation_gain",
+    "average_speed",
+    "max_speed",
+    "average_heartrate",
+    "max_heartrate",
+    "suffer_score",
+]
+
+
+def activity_to_row(user_id: int, activity: Dict) -> Dict:
+    """Map a Strava activity summary onto workouts table columns"""
+    return {
+        "user_id": user_id,
+        "strava_id": activity["id"],
+        "name": activity["name"],
+        "type": activity["type"],
+        "start_date": datetime.fromisoformat(activity["start_date"].replace("Z", "+00:00")),
+        "distance": activity.get("distance", 0),
+        "moving_time": activity.get("moving_time", 0),
+        "elapsed_time": activity.get("elapsed_time", 0),
+        "total_elevation_gain": activity.get("total_elevation_gain", 0),
+        "average_speed": activity.get("average_speed", 0),
+        "max_speed": activity.get("max_speed", 0),
+        "average_heartrate": activity.get("average_heartrate"),
+        "max_heartrate": activity.get("max_heartrate"),
+        "suffer_score": activity.get("suffer_score"),
+    }
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def upsert_workouts(db: Session, rows: List[Dict]) -> Dict:
+    """
+    Write a batch of workout rows with a single INSERT ... ON CONFLICT (strava_id)
+    statement. Existing rows are only rewritten when they belong to the same
+    user and a synced column changed; another user's workout is never touched.
+    Returns inserted / updated / unchanged counts, plus the Strava and workout
+    ids of the rows actually written.
+    """
+    # ON CONFLICT can't touch the same row twice in one statement
+    rows = list({row["strava_id"]: row for row in rows}.values())
+    if not rows:
+        return {"inserted": 0, "updated": 0, "unchanged": 0, "written_ids": [], "workout_ids": []}
+
+    stmt = insert(Workout).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Workout.strava_id],
+        set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS},
+        where=and_(
+            Workout.user_id == stmt.excluded.user_id,
+            tuple_(*[getattr(Workout, column) for column in UPSERT_COLUMNS]).is_distinct_from(
+                tuple_(*[stmt.excluded[column] for column in UPSERT_COLUMNS])
+            ),
+        ),
+    ).returning(Workout.id, Workout.strava_id, literal_column("(xmax = 0)").label("inserted"))
+
+    # xmax is 0 only for freshly inserted tuples; rows skipped by the WHERE clause return nothing
+    written = db.execute(stmt).all()
+    db.commit()
+
+    inserted = sum(1 for row in written if row.inserted)
+    updated = len(written) - inserted
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": len(rows) - inserted - updated,
+        "written_ids": [row.strava_id for row in written],
+        "workout_ids": [row.id for row in written],
+    }
+
+
+def ingest_activities(db: Session, user_id: int, activities: List[Dict]) -> Dict:
+    """
+    Bulk upsert a page of Strava activities for a user and refresh the rollup
+    buckets, personal records and training load from every workout that
+    changed, then bump the user's data version so cached analytics are
+    recomputed. The result also carries the latest activity start time
+    (naive UTC) seen in the page, used to advance the user's sync watermark,
+    and the Strava ids skipped because another user already holds them.
+    """
+    rows = [activity_to_row(user_id, activity) for activity in activities]
+
+    # Where these workouts sat before the write, so rollups can drop them from buckets they left
+    previous = {}
+    conflicting_ids = set()
+    if rows:
+        for row in db.execute(
+            select(Workout.strava_id, Workout.user_id, Workout.type, Workout.start_date)
+            .where(Workout.strava_id.in_([row["strava_id"] for row in rows]))
+        ):
+            if row.user_id == user_id:
+                previous[row.strava_id] = (row.type, row.start_date)
+            else:
+                conflicting_ids.add(row.strava_id)
+
+    result = upsert_workouts(db, rows)
+    result["unchanged"] -= len(conflicting_ids)
+    result["conflicting_ids"] = sorted(conflicting_ids)
+
+    written = set(result["written_ids"])
+    if written:
+        touched = [previous[strava_id] for strava_id in written if strava_id in previous]
+        touched += [(row["type"], _naive_utc(row["start_date"])) for row in rows if row["strava_id"] in written]
+        refresh_rollups(db, user_id, touched)
+        refresh_personal_records(db, user_id, result["workout_ids"])
+        refresh_training_load(db, user_id, min(start for _, start in touched if start))
+        bump_data_version(db, user_id)
+
+    result["latest_start_date"] = max((_naive_utc(row["start_date"]) for row in rows), default=None)
+    return result
+
+
+def delete_workouts(db: Session, user_id: int, strava_ids: List[int]) -> int:
+    """Delete a user's workouts by Strava id. Returns the number of rows removed."""
+    if not strava_ids:
+        return 0
+
+    matches = (Workout.user_id == user_id, Workout.strava_id.in_(strava_ids))
+    # Looked up first: deleting the workouts cascades to their record history
+    lost_records = records_held_by(db, user_id, db.execute(select(Workout.id).where(*matches)).scalars())
+
+    deleted = db.execute(
+        delete(Workout).where(*matches).returning(Workout.type, Workout.start_date)
+    ).all()
+    db.commit()
+
+    refresh_rollups(db, user_id, deleted)
+    if lost_records:
+        recompute_records(db, user_id, lost_records)
+    if deleted:
+        earliest = min((start for _, start in deleted if start), default=None)
+        if earliest is not None:
+            refresh_training_load(db, user_id, earliest)
+        bump_data_version(db, user_id)
+    return len(deleted)
@@ -0,0 +1,17 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# First key of the (table, user) advisory locks guarding derived tables that
+# are recomputed per user from workouts and rewritten. Keep them distinct.
+PERSONAL_RECORDS_LOCK = 1
+TRAINING_LOAD_LOCK = 2
+ROLLUPS_LOCK = 3
+
+
+def lock_user_rows(db: Session, table_lock: int, user_id: int):
+    """
+    Hold the user's lock on a derived table until the current transaction
+    ends, so concurrent refreshes (a sync and a webhook flush, say) take
+    turns instead of interleaving their reads and writes.
+    """
+    db.execute(select(func.pg_advisory_xact_lock(table_lock, user_id)))
@@ -0,0 +1,285 @@
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+import numpy as np
+from sqlalchemy import Float, cast, delete, func, literal, or_, select, union_all
+from sqlalchemy.orm import Session
+from app.models.best_effort import BestEffort
+from app.models.personal_record import PersonalRecord
+from app.models.workout import Workout
+from app.services.best_efforts import BEST_EFFORT_DISTANCES
+from app.services.locks import PERSONAL_RECORDS_LOCK, lock_user_rows
+from app.services.workout_arrays import WorkoutArrays, load_workout_arrays
+
+# Whole-run distance bands (meters) used for race PRs when a run has no streams
+RACE_DISTANCE_BANDS = {
+    "5k": (4500, 5500),
+    "10k": (9500, 10500),
+    "half_marathon": (20000, 22000),
+    "marathon": (41000, 43000),
+}
+
+
+def _workout_record(sport: str, qualifies: Callable, rank_value: Callable) -> Dict:
+    """A record held by the sport's workout with the lowest rank_value among those that qualify"""
+    return {"sport": sport, "qualifies": qualifies, "rank_value": rank_value}
+
+
+def _effort_record(target: int) -> Dict:
+    """A record held by the fastest stream-derived best effort over `target` meters"""
+    return {"sport": "Run", "effort_distance": target}
+
+
+def _band_record(low: int, high: int) -> Dict:
+    """A record held by the quickest whole run within a race distance band"""
+    return _workout_record(
+        "Run",
+        lambda w: (w.distance >= low) & (w.distance <= high) & (w.moving_time > 0),
+        lambda w: w.moving_time,
+    )
+
+
+# Record name -> definition. The lowest value among qualifying candidates holds the
+# record, ties going to the earliest workout. qualifies and rank_value only use
+# operators shared by SQLAlchemy columns and NumPy arrays, so the same definition
+# filters Workout rows in SQL and WorkoutArrays in memory.
+PERSONAL_RECORDS = {
+    "longest_run": _workout_record("Run", lambda w: w.distance > 0, lambda w: -w.distance),
+    # Runs of 3km+ only, to avoid sprints
+    "best_pace": _workout_record(
+        "Run",
+        lambda w: (w.distance >= 3000) & (w.moving_time > 0),
+        lambda w: w.moving_time / w.distance,
+    ),
+    "longest_ride": _workout_record("Ride", lambda w: w.distance > 0, lambda w: -w.distance),
+    "biggest_climb": _workout_record("Ride", lambda w: w.total_elevation_gain > 0, lambda w: -w.total_elevation_gain),
+    # Rides of 10km+ only
+    "fastest_speed": _workout_record(
+        "Ride",
+        lambda w: (w.distance >= 10000) & (w.moving_time > 0),
+        lambda w: -(w.distance / w.moving_time),
+    ),
+    "longest_swim": _workout_record("Swim", lambda w: w.distance > 0, lambda w: -w.distance),
+    "best_pace_per_100m": _workout_record(
+        "Swim",
+        lambda w: (w.distance >= 100) & (w.moving_time > 0),
+        lambda w: w.moving_time / w.distance,
+    ),
+    # Exact-distance efforts found in streams
+    **{f"fastest_{name}": _effort_record(target) for name, target in BEST_EFFORT_DISTANCES.items()},
+    # Whole runs within a distance band, the fallback for runs without streams
+    **{f"fastest_{name}_run": _band_record(low, high) for name, (low, high) in RACE_DISTANCE_BANDS.items()},
+}
+
+# Records fed by the best_efforts table rather than workout columns
+EFFORT_RECORDS = {name for name, definition in PERSONAL_RECORDS.items() if "effort_distance" in definition}
+
+# Workout columns the workout-based records are computed from
+RECORD_COLUMNS = ["id", "type", "start_date", "distance", "moving_time", "total_elevation_gain"]
+
+
+# The numeric workout columns as double precision, so SQL divides them the same way
+# NumPy does (an integer column would be divided as NUMERIC) and values match exactly
+_SQL_COLUMNS = SimpleNamespace(**{
+    column: cast(getattr(Workout, column), Float) for column in ["distance", "moving_time", "total_elevation_gain"]
+})
+
+
+class _Entry(NamedTuple):
+    workout_id: int
+    value: float
+    achieved_at: datetime
+
+
+def _candidates(record: str, *conditions):
+    """Select (workout_id, value, achieved_at) of every candidate for a record among workouts matching `conditions`"""
+    definition = PERSONAL_RECORDS[record]
+    if "effort_distance" in definition:
+        return select(
+            BestEffort.workout_id,
+            cast(BestEffort.elapsed_time, Float).label("value"),
+            Workout.start_date.label("achieved_at"),
+        ).join(Workout, Workout.id == BestEffort.workout_id).where(
+            BestEffort.distance == definition["effort_distance"], Workout.start_date.isnot(None), *conditions
+        )
+    return select(
+        Workout.id.label("workout_id"),
+        cast(definition["rank_value"](_SQL_COLUMNS), Float).label("value"),
+        Workout.start_date.label("achieved_at"),
+    ).where(
+        Workout.type == definition["sport"], Workout.start_date.isnot(None), definition["qualifies"](_SQL_COLUMNS), *conditions
+    )
+
+
+def _effort_progression(db: Session, user_id: int, record: str) -> List:
+    """Every effort that beat all earlier ones for an effort record, oldest first"""
+    ranked = _candidates(record, Workout.user_id == user_id).subquery()
+    best_before = func.min(ranked.c.value).over(
+        order_by=[ranked.c.achieved_at, ranked.c.workout_id],
+        rows=(None, -1),
+    )
+    history = select(ranked, best_before.label("best_before")).subquery()
+    return db.execute(
+        select(history.c.workout_id, history.c.value, history.c.achieved_at)
+        .where(history.c.value.isnot(None), or_(history.c.best_before.is_(None), history.c.value < history.c.best_before))
+        .order_by(history.c.achieved_at, history.c.workout_id)
+    ).all()
+
+
+def _array_progression(workouts: WorkoutArrays, record: str) -> List[_Entry]:
+    """
+    Every workout that beat all earlier candidates for a workout-based record,
+    oldest first. `workouts` must be in (start_date, id) order; a workout is
+    kept when its value is below the running minimum of the ones before it.
+    """
+    definition = PERSONAL_RECORDS[record]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mask = (workouts.type == definition["sport"]) & definition["qualifies"](workouts)
+        values = np.asarray(definition["rank_value"](workouts), dtype=np.float64)[mask]
+    if not len(values):
+        return []
+
+    best_before = np.concatenate(([np.inf], np.minimum.accumulate(values)[:-1]))
+    improved = values < best_before
+    return [
+        _Entry(workout_id, value, achieved_at)
+        for workout_id, value, achieved_at in zip(
+            workouts.id[mask][improved].tolist(),
+            values[improved].tolist(),
+            workouts.start_date[mask][improved].tolist(),
+        )
+    ]
+
+
+def _write_history(db: Session, user_id: int, record: str, entries: List):
+    sport = PERSONAL_RECORDS[record]["sport"]
+    db.execute(delete(PersonalRecord).where(PersonalRecord.user_id == user_id, PersonalRecord.record == record))
+    if entries:
+        db.execute(PersonalRecord.__table__.insert(), [
+            {
+                "user_id": user_id,
+                "workout_id": entry.workout_id,
+                "sport": sport,
+                "record": record,
+                "value": entry.value,
+                "achieved_at": entry.achieved_at,
+                "is_current": i == len(entries) - 1,
+            }
+            for i, entry in enumerate(entries)
+        ])
+
+
+def recompute_records(db: Session, user_id: int, records: Optional[Iterable[str]] = None) -> int:
+    """
+    Rebuild the history of the given records (all of them by default) from
+    the user's workouts. Used when a workout in a record's history is edited
+    or deleted, since a later runner-up may then become a PR. Returns the
+    number of history entries written.
+    """
+    lock_user_rows(db, PERSONAL_RECORDS_LOCK, user_id)
+    workouts = None
+    written = 0
+    for record in (PERSONAL_RECORDS if records is None else records):
+        if record in EFFORT_RECORDS:
+            entries = _effort_progression(db, user_id, record)
+        else:
+            # Every workout-based record is computed from one column projection
+            if workouts is None:
+                workouts = load_workout_arrays(
+                    db, user_id, RECORD_COLUMNS, Workout.start_date.isnot(None),
+                    order_by=[Workout.start_date, Workout.id],
+                )
+            entries = _array_progression(workouts, record)
+        _write_history(db, user_id, record, entries)
+        written += len(entries)
+    db.commit()
+    return written
+
+
+def records_held_by(db: Session, user_id: int, workout_ids: Iterable[int]) -> Set[str]:
+    """Names of the records whose history includes any of these workouts"""
+    workout_ids = list(workout_ids)
+    if not workout_ids:
+        return set()
+    return set(db.execute(
+        select(PersonalRecord.record)
+        .where(PersonalRecord.user_id == user_id, PersonalRecord.workout_id.in_(workout_ids))
+        .distinct()
+    ).scalars())
+
+
+def refresh_personal_records(
+    db: Session,
+    user_id: int,
+    workout_ids: Iterable[int],
+    records: Optional[Iterable[str]] = None,
+) -> Set[str]:
+    """
+    Bring records up to date after workouts were added or changed.
+
+    A workout not yet in a record's history is compared against that
+    history only: it is a PR if it beats the entry before it in time, and it
+    ends the run of any later entries it beats. That costs one candidate
+    lookup per workout, whatever the user's history. Records whose history
+    already holds one of the workouts are recomputed instead, as an edit can
+    also make a former PR worse. Returns the names of the records that changed.
+    """
+    workout_ids = list(workout_ids)
+    records = set(PERSONAL_RECORDS if records is None else records)
+    if not workout_ids or not records:
+        return set()
+
+    # Held through the final commit, so histories are read and rewritten as one
+    lock_user_rows(db, PERSONAL_RECORDS_LOCK, user_id)
+    stale = records_held_by(db, user_id, workout_ids) & records
+    fresh = sorted(records - stale)
+
+    candidates: Dict[str, List] = {}
+    if fresh:
+        lookups = [
+            select(literal(record).label("record"), *_candidates(
+                record, Workout.user_id == user_id, Workout.id.in_(workout_ids)
+            ).subquery().c)
+            for record in fresh
+        ]
+        for row in db.execute(union_all(*lookups)):
+            if row.value is not None:
+                candidates.setdefault(row.record, []).append(row)
+
+    changed = set(stale)
+    if candidates:
+        histories: Dict[str, List] = {record: [] for record in candidates}
+        for entry in db.execute(
+            select(PersonalRecord.record, PersonalRecord.workout_id, PersonalRecord.value, PersonalRecord.achieved_at)
+            .where(PersonalRecord.user_id == user_id, PersonalRecord.record.in_(list(candidates)))
+            .order_by(PersonalRecord.achieved_at, PersonalRecord.workout_id)
+        ):
+            histories[entry.record].append(entry)
+
+        for record, rows in candidates.items():
+            history = list(histories[record])
+            for row in rows:
+                key = (row.achieved_at, row.workout_id)
+                earlier = [entry for entry in history if (entry.achieved_at, entry.workout_id) < key]
+                if earlier and not row.value < earlier[-1].value:
+                    continue
+                later = [entry for entry in history if (entry.achieved_at, entry.workout_id) > key and entry.value < row.value]
+                history = earlier + [row] + later
+            if [entry.workout_id for entry in history] != [entry.workout_id for entry in histories[record]]:
+                _write_history(db, user_id, record, history)
+                changed.add(record)
+
+    if stale:
+        recompute_records(db, user_id, stale)
+    db.commit()
+    return changed
+
+
+def rebuild_personal_records(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute every record from scratch, for one user or everyone. Returns the number of history entries."""
+    if user_id is not None:
+        return recompute_records(db, user_id)
+
+    user_ids = db.execute(select(Workout.user_id).distinct()).scalars().all()
+    return sum(recompute_records(db, user_id) for user_id in user_ids)
+
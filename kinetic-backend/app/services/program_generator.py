@@ -15,8 +15,10 @@ class ProgramGenerator:
         workout_context = ""
         if db and user_id:
             from app.services.analytics import AnalyticsService
+            from app.services.training_load import get_training_load
             workout_data = AnalyticsService.get_workout_context(db, user_id, limit=20)
             weekly_summary = AnalyticsService.get_weekly_summary(db, user_id)
+            fitness = get_training_load(db, user_id, days=1)
             
             workout_context = f"""
 Recent Training History:
@@ -27,6 +29,7 @@ Recent Performance:
 - Total distance: {weekly_summary['total_distance_km']}km
 - Total time: {weekly_summary['total_time_hours']}hrs
 - Activities: {weekly_summary['activity_breakdown']}
+- Fitness (CTL): {fitness['ctl']}, fatigue (ATL): {fitness['atl']}, form (TSB): {fitness['tsb']}
 """
 
         system_prompt = """You are an expert fitness coach creating personalized training programs.
@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import and_, delete, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.rollup import WorkoutRollup
+from app.models.workout import Workout
+from app.services.locks import ROLLUPS_LOCK, lock_user_rows
+
+ROLLUP_PERIODS = ("day", "week", "month")
+
+ROLLUP_COLUMNS = [
+    "user_id",
+    "type",
+    "period",
+    "period_start",
+    "count",
+    "distance",
+    "moving_time",
+    "elevation",
+    "heartrate_sum",
+    "heartrate_count",
+]
+
+
+def period_start(period: str, moment: datetime) -> datetime:
+    """Python equivalent of Postgres date_trunc(period, moment); weeks start on Monday"""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "day":
+        return day
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    if period == "year":
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Unknown rollup period: {period}")
+
+
+def period_end(period: str, start: datetime) -> datetime:
+    """Start of the period following the one starting at `start`"""
+    if period == "day":
+        return start + timedelta(days=1)
+    if period == "week":
+        return start + timedelta(weeks=1)
+    if period == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start.replace(year=start.year + 1)
+
+
+def _aggregate(period: str, *conditions):
+    """Rollup rows for one period computed from workouts matching `conditions`"""
+    bucket = func.date_trunc(period, Workout.start_date)
+    return (
+        select(
+            Workout.user_id,
+            Workout.type,
+            literal(period).label("period"),
+            bucket.label("period_start"),
+            func.count().label("count"),
+            func.coalesce(func.sum(Workout.distance), 0).label("distance"),
+            func.coalesce(func.sum(Workout.moving_time), 0).label("moving_time"),
+            func.coalesce(func.sum(Workout.total_elevation_gain), 0).label("elevation"),
+            func.coalesce(func.sum(Workout.average_heartrate), 0).label("heartrate_sum"),
+            func.count(Workout.average_heartrate).label("heartrate_count"),
+        )
+        .where(Workout.start_date.isnot(None), Workout.type.isnot(None), *conditions)
+        .group_by(Workout.user_id, Workout.type, bucket)
+    )
+
+
+def refresh_rollups(db: Session, user_id: int, touched: Iterable[Tuple[str, datetime]]) -> int:
+    """
+    Recompute the rollup buckets containing the given (type, start_date) pairs
+    of added, changed or removed workouts. Only those buckets are re-read, so
+    the cost follows the size of the change, not the user's history. Buckets
+    left without workouts are removed. Returns the number of buckets written.
+    """
+    touched = {(workout_type, start) for workout_type, start in touched if workout_type and start}
+    if not touched:
+        return 0
+
+    # Held until the commit, so a bucket's aggregate and its write or removal happen as one
+    lock_user_rows(db, ROLLUPS_LOCK, user_id)
+    written = 0
+    for period in ROLLUP_PERIODS:
+        buckets: Set[Tuple[str, datetime]] = {(workout_type, period_start(period, start)) for workout_type, start in touched}
+        starts = [start for _, start in buckets]
+        bucket = func.date_trunc(period, Workout.start_date)
+
+        stmt = insert(WorkoutRollup).from_select(ROLLUP_COLUMNS, _aggregate(
+            period,
+            Workout.user_id == user_id,
+            # The range lets the start_date index narrow the scan before the bucket match
+            Workout.start_date >= min(starts),
+            Workout.start_date < period_end(period, max(starts)),
+            tuple_(Workout.type, bucket).in_(list(buckets)),
+        ))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WorkoutRollup.user_id, WorkoutRollup.type, WorkoutRollup.period, WorkoutRollup.period_start],
+            set_={column: stmt.excluded[column] for column in ROLLUP_COLUMNS[4:]},
+        ).returning(WorkoutRollup.type, WorkoutRollup.period_start)
+        refreshed = {(row.type, row.period_start) for row in db.execute(stmt)}
+        written += len(refreshed)
+
+        emptied = buckets - refreshed
+        if emptied:
+            db.execute(delete(WorkoutRollup).where(
+                WorkoutRollup.user_id == user_id,
+                WorkoutRollup.period == period,
+                tuple_(WorkoutRollup.type, WorkoutRollup.period_start).in_(list(emptied)),
+            ))
+
+    db.commit()
+    return written
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute all rollups from scratch, for one user or everyone. Returns the number of buckets."""
+    user_filter = [Workout.user_id == user_id] if user_id is not None else []
+
+    clear = delete(WorkoutRollup)
+    if user_id is not None:
+        lock_user_rows(db, ROLLUPS_LOCK, user_id)
+        clear = clear.where(WorkoutRollup.user_id == user_id)
+    db.execute(clear)
+
+    written = 0
+    for period in ROLLUP_PERIODS:
+        result = db.execute(insert(WorkoutRollup).from_select(ROLLUP_COLUMNS, _aggregate(period, *user_filter)))
+        written += result.rowcount
+    db.commit()
+    return written
+
+
+def get_rollups(
+    db: Session,
+    user_id: int,
+    period: str,
+    since: Optional[datetime] = None,
+    types: Optional[List[str]] = None,
+) -> List:
+    """A user's rollup rows for one period, oldest first"""
+    conditions = [WorkoutRollup.user_id == user_id, WorkoutRollup.period == period]
+    if since is not None:
+        conditions.append(WorkoutRollup.period_start >= since)
+    if types is not None:
+        conditions.append(WorkoutRollup.type.in_(types))
+
+    return db.execute(
+        select(WorkoutRollup).where(and_(*conditions)).order_by(WorkoutRollup.period_start, WorkoutRollup.type)
+    ).scalars().all()
+
+
+def get_rollup_totals(
+    db: Session,
+    user_id: int,
+    period: str,
+    since: Optional[datetime] = None,
+    types: Optional[List[str]] = None,
+) -> Dict[str, Dict]:
+    """Rollups summed per sport: {type: {count, distance, moving_time, elevation, heartrate_sum, heartrate_count}}"""
+    conditions = [WorkoutRollup.user_id == user_id, WorkoutRollup.period == period]
+    if since is not None:
+        conditions.append(WorkoutRollup.period_start >= since)
+    if types is not None:
+        conditions.append(WorkoutRollup.type.in_(types))
+
+    rows = db.execute(
+        select(
+            WorkoutRollup.type,
+            func.sum(WorkoutRollup.count).label("count"),
+            func.sum(WorkoutRollup.distance).label("distance"),
+            func.sum(WorkoutRollup.moving_time).label("moving_time"),
+            func.sum(WorkoutRollup.elevation).label("elevation"),
+            func.sum(WorkoutRollup.heartrate_sum).label("heartrate_sum"),
+            func.sum(WorkoutRollup.heartrate_count).label("heartrate_count"),
+        )
+        .where(and_(*conditions))
+        .group_by(WorkoutRollup.type)
+    ).all()
+
+    return {
+        row.type: {
+            "count": int(row.count),
+            "distance": float(row.distance),
+            "moving_time": int(row.moving_time),
+            "elevation": float(row.elevation),
+            "heartrate_sum": float(row.heartrate_sum),
+            "heartrate_count": int(row.heartrate_count),
+        }
+        for row in rows
+    }
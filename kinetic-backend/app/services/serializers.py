@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.chat import ChatMessage
+from app.models.program import ProgramWeek, ProgramWorkout, TrainingProgram
+
+# Response bodies built straight from Core result rows: no ORM instances, no
+# Pydantic validation, and values orjson encodes natively (datetimes included),
+# so list endpoints can hand them to ORJSONResponse as they are.
+
+PROGRAM_SUMMARY_COLUMNS = [
+    TrainingProgram.id,
+    TrainingProgram.title,
+    TrainingProgram.description,
+    TrainingProgram.goal,
+    TrainingProgram.duration_weeks,
+    TrainingProgram.created_at,
+    TrainingProgram.is_active,
+]
+
+PROGRAM_WORKOUT_COLUMNS = [
+    ProgramWorkout.id,
+    ProgramWorkout.day_number,
+    ProgramWorkout.workout_type,
+    ProgramWorkout.description,
+    ProgramWorkout.duration_minutes,
+    ProgramWorkout.intensity,
+    ProgramWorkout.completed,
+]
+
+
+def rows_as_dicts(rows) -> List[Dict]:
+    """One dict per Core result row, keyed by column label"""
+    return [dict(row._mapping) for row in rows]
+
+
+def chat_history(db: Session, user_id: int) -> List[Dict]:
+    return rows_as_dicts(db.execute(
+        select(ChatMessage.role, ChatMessage.content, ChatMessage.created_at)
+        .where(ChatMessage.user_id == user_id)
+        .order_by(ChatMessage.created_at.asc())
+    ))
+
+
+def program_summaries(db: Session, user_id: int) -> List[Dict]:
+    """A user's programs, newest first, shaped like ProgramSummary"""
+    return rows_as_dicts(db.execute(
+        select(*PROGRAM_SUMMARY_COLUMNS)
+        .where(TrainingProgram.user_id == user_id)
+        .order_by(TrainingProgram.created_at.desc())
+    ))
+
+
+def program_detail(db: Session, program_id: int) -> Optional[Dict]:
+    """A program with its weeks and their workouts, shaped like ProgramResponse; None if there is no such program"""
+    program = db.execute(select(*PROGRAM_SUMMARY_COLUMNS).where(TrainingProgram.id == program_id)).first()
+    if program is None:
+        return None
+
+    weeks = {
+        week["id"]: {**week, "workouts": []}
+        for week in rows_as_dicts(db.execute(
+            select(ProgramWeek.id, ProgramWeek.week_number, ProgramWeek.weekly_goal)
+            .where(ProgramWeek.program_id == program_id)
+            .order_by(ProgramWeek.id)
+        ))
+    }
+    for workout in db.execute(
+        select(ProgramWorkout.week_id, *PROGRAM_WORKOUT_COLUMNS)
+        .join(ProgramWeek, ProgramWeek.id == ProgramWorkout.week_id)
+        .where(ProgramWeek.program_id == program_id)
+        .order_by(ProgramWorkout.id)
+    ):
+        week_id, *values = workout
+        weeks[week_id]["workouts"].append(dict(zip((column.key for column in PROGRAM_WORKOUT_COLUMNS), values)))
+
+    return {**program._mapping, "weeks": list(weeks.values())}
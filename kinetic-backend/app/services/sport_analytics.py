@@ -1,9 +1,14 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import DateTime, Float, Integer, String, bindparam, cast, func, literal, null, select, union_all
+from app.models.personal_record import PersonalRecord
+from app.models.rollup import WorkoutRollup
 from app.models.workout import Workout
-
+from app.services.best_efforts import BEST_EFFORT_DISTANCES
+from app.services.personal_records import RACE_DISTANCE_BANDS
+from app.services.rollups import period_start
 
 def calculate_pace(distance_km: float, time_seconds: int) -> str:
     """
@@ -41,414 +46,428 @@ def calculate_speed(distance_km: float, time_seconds: int) -> float:
     return distance_km / time_hours
 
 
-def get_running_analytics(db: Session, user_id: int) -> Dict:
-    """
-    Calculate comprehensive running analytics including overview, PRs, progress, and recent activities
-    """
-    # Get all running workouts
-    workouts = db.query(Workout).filter(
-        and_(
-            Workout.user_id == user_id,
-            Workout.type == 'Run'
-        )
-    ).order_by(Workout.start_date).all()
-    
-    if not workouts:
+def _date(row) -> str:
+    return row.start_date.strftime("%Y-%m-%d")
+
+
+def _distance_record(row) -> Dict:
+    return {
+        "distance": round(row.distance / 1000, 2),
+        "date": _date(row),
+        "workout_id": row.id
+    }
+
+
+def _pace_record(row) -> Dict:
+    return {
+        "pace": calculate_pace(row.distance / 1000, row.moving_time),
+        "distance": round(row.distance / 1000, 2),
+        "date": _date(row),
+        "workout_id": row.id
+    }
+
+
+def _climb_record(row) -> Dict:
+    return {
+        "elevation": round(row.elevation, 0),
+        "distance": round((row.distance or 0) / 1000, 2),
+        "date": _date(row),
+        "workout_id": row.id
+    }
+
+
+def _speed_record(row) -> Dict:
+    return {
+        "speed": round(calculate_speed(row.distance / 1000, row.moving_time), 2),
+        "distance": round(row.distance / 1000, 2),
+        "date": _date(row),
+        "workout_id": row.id
+    }
+
+
+def _effort_record(target: int):
+    """Formatter for a stream-derived effort, whose value is the elapsed seconds over `target` meters"""
+    def formatter(row) -> Dict:
         return {
-            "overview": {
-                "total_distance": 0,
-                "monthly_distance": 0,
-                "average_pace": "0:00",
-                "total_runs": 0
-            },
-            "personal_records": {},
-            "progress": [],
-            "recent_activities": []
+            "time": format_time(row.value),
+            "pace": calculate_pace(target / 1000, row.value),
+            "date": _date(row),
+            "workout_id": row.id
         }
-    
-    # Calculate overview
-    total_distance_m = sum(w.distance or 0 for w in workouts)
-    total_time_s = sum(w.moving_time or 0 for w in workouts)
-    total_distance_km = total_distance_m / 1000
-    
-    # This month's stats
-    now = datetime.now()
-    first_day_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    month_workouts = [w for w in workouts if w.start_date >= first_day_of_month]
-    monthly_distance_km = sum(w.distance or 0 for w in month_workouts) / 1000
-    
-    # Average pace
-    avg_pace = calculate_pace(total_distance_km, total_time_s) if total_distance_km > 0 else "0:00"
-    
-    # Personal Records
-    records = {}
-    
-    # Longest run
-    longest = max(workouts, key=lambda w: w.distance or 0)
-    if longest.distance:
-        records["longest_run"] = {
-            "distance": round(longest.distance / 1000, 2),
-            "date": longest.start_date.strftime("%Y-%m-%d"),
-            "workout_id": longest.id
-        }
-    
-    # Best pace (for runs > 3km to avoid sprints)
-    valid_pace_runs = [w for w in workouts if w.distance and w.moving_time and (w.distance / 1000) >= 3]
-    if valid_pace_runs:
-        best_pace_run = min(valid_pace_runs, 
-                           key=lambda w: w.moving_time / (w.distance / 1000))
-        records["best_pace"] = {
-            "pace": calculate_pace(best_pace_run.distance / 1000, best_pace_run.moving_time),
-            "distance": round(best_pace_run.distance / 1000, 2),
-            "date": best_pace_run.start_date.strftime("%Y-%m-%d"),
-            "workout_id": best_pace_run.id
-        }
-    
-    # Race distances (with tolerance)
-    # 5K (4.5-5.5 km)
-    five_k_runs = [w for w in workouts if w.distance and 4500 <= w.distance <= 5500 and w.moving_time]
-    if five_k_runs:
-        fastest_5k = min(five_k_runs, key=lambda w: w.moving_time)
-        records["fastest_5k"] = {
-            "time": format_time(fastest_5k.moving_time),
-            "pace": calculate_pace(fastest_5k.distance / 1000, fastest_5k.moving_time),
-            "date": fastest_5k.start_date.strftime("%Y-%m-%d"),
-            "workout_id": fastest_5k.id
-        }
-    
-    # 10K (9.5-10.5 km)
-    ten_k_runs = [w for w in workouts if w.distance and 9500 <= w.distance <= 10500 and w.moving_time]
-    if ten_k_runs:
-        fastest_10k = min(ten_k_runs, key=lambda w: w.moving_time)
-        records["fastest_10k"] = {
-            "time": format_time(fastest_10k.moving_time),
-            "pace": calculate_pace(fastest_10k.distance / 1000, fastest_10k.moving_time),
-            "date": fastest_10k.start_date.strftime("%Y-%m-%d"),
-            "workout_id": fastest_10k.id
-        }
-    
-    # Half Marathon (20-22 km)
-    half_runs = [w for w in workouts if w.distance and 20000 <= w.distance <= 22000 and w.moving_time]
-    if half_runs:
-        fastest_half = min(half_runs, key=lambda w: w.moving_time)
-        records["fastest_half_marathon"] = {
-            "time": format_time(fastest_half.moving_time),
-            "pace": calculate_pace(fastest_half.distance / 1000, fastest_half.moving_time),
-            "date": fastest_half.start_date.strftime("%Y-%m-%d"),
-            "workout_id": fastest_half.id
-        }
-    
-    # Marathon (41-43 km)
-    marathon_runs = [w for w in workouts if w.distance and 41000 <= w.distance <= 43000 and w.moving_time]
-    if marathon_runs:
-        fastest_marathon = min(marathon_runs, key=lambda w: w.moving_time)
-        records["fastest_marathon"] = {
-            "time": format_time(fastest_marathon.moving_time),
-            "pace": calculate_pace(fastest_marathon.distance / 1000, fastest_marathon.moving_time),
-            "date": fastest_marathon.start_date.strftime("%Y-%m-%d"),
-            "workout_id": fastest_marathon.id
-        }
-    
-    # Weekly progress (last 12 weeks)
-    twelve_weeks_ago = now - timedelta(weeks=12)
-    recent_workouts = [w for w in workouts if w.start_date >= twelve_weeks_ago]
-    
-    # Group by week
-    weeks_dict = {}
-    for workout in recent_workouts:
-        # Get Monday of the week
-        week_start = workout.start_date - timedelta(days=workout.start_date.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")
-        
-        if week_key not in weeks_dict:
-            weeks_dict[week_key] = []
-        weeks_dict[week_key].append(workout)
-    
-    # Calculate weekly totals
-    progress = []
-    for week_start in sorted(weeks_dict.keys()):
-        week_workouts = weeks_dict[week_start]
-        week_distance = sum(w.distance or 0 for w in week_workouts) / 1000
-        progress.append({
-            "week": week_start,
-            "distance": round(week_distance, 2)
-        })
-    
-    # Recent activities (last 10)
-    recent_activities = []
-    for workout in sorted(workouts, key=lambda w: w.start_date, reverse=True)[:10]:
-        distance_km = (workout.distance or 0) / 1000
-        pace = calculate_pace(distance_km, workout.moving_time) if workout.moving_time and distance_km > 0 else "0:00"
-        
-        recent_activities.append({
-            "id": workout.id,
-            "date": workout.start_date.strftime("%Y-%m-%d"),
-            "name": workout.name,
-            "distance": round(distance_km, 2),
-            "time": format_time(workout.moving_time) if workout.moving_time else "0:00",
-            "pace": pace,
-            "elevation": round(workout.total_elevation_gain or 0, 0)
-        })
-    
+    return formatter
+
+
+def _race_run_record(row) -> Dict:
     return {
-        "overview": {
-            "total_distance": round(total_distance_km, 2),
-            "monthly_distance": round(monthly_distance_km, 2),
-            "average_pace": avg_pace,
-            "total_runs": len(workouts)
-        },
-        "personal_records": records,
-        "progress": progress,
-        "recent_activities": recent_activities
+        "time": format_time(row.moving_time),
+        "pace": calculate_pace(row.distance / 1000, row.moving_time),
+        "date": _date(row),
+        "workout_id": row.id
     }
 
 
-def get_cycling_analytics(db: Session, user_id: int) -> Dict:
+def _pace_per_100m(distance_m: float, time_seconds: float) -> str:
+    return format_time(int(time_seconds / (distance_m / 100)))
+
+
+def _swim_pace_record(row) -> Dict:
+    return {
+        "pace": _pace_per_100m(row.distance, row.moving_time),
+        "distance": round(row.distance / 1000, 2),
+        "date": _date(row),
+        "workout_id": row.id
+    }
+
+
+# Per-sport metric definitions driving the analytics engine.
+# "records" maps a record from app/services/personal_records.py to the formatter
+# turning its current holder into the response.
+SPORT_SPECS = {
+    "running": {
+        "type": "Run",
+        "count_key": "total_runs",
+        "average_key": "average_pace",
+        "average": lambda distance, seconds: calculate_pace(distance / 1000, seconds) if distance > 0 else "0:00",
+        "empty_average": "0:00",
+        "total_elevation": False,
+        "records": {
+            "longest_run": _distance_record,
+            "best_pace": _pace_record,
+        },
+        "race_efforts": True,
+        "progress_elevation": False,
+        "recent_metric_key": "pace",
+        "recent_metric": lambda distance, seconds: calculate_pace(distance / 1000, seconds) if seconds and distance > 0 else "0:00",
+        "recent_elevation": True,
+    },
+    "cycling": {
+        "type": "Ride",
+        "count_key": "total_rides",
+        "average_key": "average_speed",
+        "average": lambda distance, seconds: round(calculate_speed(distance / 1000, seconds), 2) if seconds > 0 else 0,
+        "empty_average": 0,
+        "total_elevation": True,
+        "records": {
+            "longest_ride": _distance_record,
+            "biggest_climb": _climb_record,
+            "fastest_speed": _speed_record,
+        },
+        "race_efforts": False,
+        "progress_elevation": True,
+        "recent_metric_key": "speed",
+        "recent_metric": lambda distance, seconds: round(calculate_speed(distance / 1000, seconds), 2) if seconds and distance > 0 else 0,
+        "recent_elevation": True,
+    },
+    "swimming": {
+        "type": "Swim",
+        "count_key": "total_swims",
+        "average_key": "average_pace_per_100m",
+        "average": lambda distance, seconds: _pace_per_100m(distance, seconds) if distance > 0 else "0:00",
+        "empty_average": "0:00",
+        "total_elevation": False,
+        "records": {
+            "longest_swim": _distance_record,
+            "best_pace_per_100m": _swim_pace_record,
+        },
+        "race_efforts": False,
+        "progress_elevation": False,
+        "recent_metric_key": "pace_per_100m",
+        "recent_metric": lambda distance, seconds: _pace_per_100m(distance, seconds) if distance > 0 and seconds else "0:00",
+        "recent_elevation": False,
+    },
+}
+
+# Formatter for every record kept in app/services/personal_records.py
+RECORD_FORMATTERS = {
+    **{name: formatter for spec in SPORT_SPECS.values() for name, formatter in spec["records"].items()},
+    **{f"fastest_{name}": _effort_record(target) for name, target in BEST_EFFORT_DISTANCES.items()},
+    **{f"fastest_{name}_run": _race_run_record for name in RACE_DISTANCE_BANDS},
+}
+
+RECENT_ACTIVITY_LIMIT = 10
+PROGRESS_WEEKS = 12
+
+# Every section of the engine's query returns rows of this shape so they can be UNIONed
+_ROW_TYPES = {
+    "section": String,
+    "sport": String,
+    "key": String,
+    "id": Integer,
+    "name": String,
+    "start_date": DateTime,
+    "distance": Float,
+    "moving_time": Float,
+    "elevation": Float,
+    "count": Integer,
+    "monthly_distance": Float,
+    "value": Float,
+}
+
+
+def _result_columns(section: str, **values) -> List:
+    columns = [literal(section, String).label("section")]
+    for name, type_ in list(_ROW_TYPES.items())[1:]:
+        value = values.get(name, null())
+        columns.append(cast(value, type_).label(name))
+    return columns
+
+
+@lru_cache(maxsize=None)
+def _analytics_query(sports: tuple):
     """
-    Calculate comprehensive cycling analytics
+    One statement computing every requested sport's totals, weekly progress,
+    records and recent activities, with the sections UNIONed into one result
+    set. Totals and weekly progress come from the workout rollups and records
+    from the maintained personal records, so only the recent activities touch
+    the workouts table.
+
+    The statement is built once per set of sports and takes user_id,
+    month_start and progress_since as parameters, so repeat calls skip
+    rebuilding it and reuse its memoized cache key.
     """
-    workouts = db.query(Workout).filter(
-        and_(
-            Workout.user_id == user_id,
-            Workout.type == 'Ride'
-        )
-    ).order_by(Workout.start_date).all()
-    
-    if not workouts:
-        return {
-            "overview": {
-                "total_distance": 0,
-                "monthly_distance": 0,
-                "average_speed": 0,
-                "total_rides": 0,
-                "total_elevation": 0
-            },
-            "personal_records": {},
-            "progress": [],
-            "recent_activities": []
-        }
-    
-    # Calculate overview
-    total_distance_m = sum(w.distance or 0 for w in workouts)
-    total_time_s = sum(w.moving_time or 0 for w in workouts)
-    total_distance_km = total_distance_m / 1000
-    total_elevation = sum(w.total_elevation_gain or 0 for w in workouts)
-    
-    # This month's stats
-    now = datetime.now()
-    first_day_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    month_workouts = [w for w in workouts if w.start_date >= first_day_of_month]
-    monthly_distance_km = sum(w.distance or 0 for w in month_workouts) / 1000
-    
-    # Average speed
-    avg_speed = calculate_speed(total_distance_km, total_time_s) if total_time_s > 0 else 0
-    
-    # Personal Records
+    specs = {name: SPORT_SPECS[name] for name in sports}
+    user_id = bindparam("user_id", type_=Integer)
+    month_start = bindparam("month_start", type_=DateTime)
+    progress_since = bindparam("progress_since", type_=DateTime)
+    types = [spec["type"] for spec in specs.values()]
+
+    # Totals and weekly progress are summed from the maintained rollups, so their
+    # cost follows the number of periods rather than the number of workouts
+    month_rollups = (
+        select(WorkoutRollup)
+        .where(WorkoutRollup.user_id == user_id, WorkoutRollup.period == "month", WorkoutRollup.type.in_(types))
+        .subquery()
+    )
+    m = month_rollups.c
+    totals = select(*_result_columns(
+        "totals",
+        sport=m.type,
+        count=func.sum(m.count),
+        distance=func.sum(m.distance),
+        moving_time=func.sum(m.moving_time),
+        elevation=func.sum(m.elevation),
+        monthly_distance=func.coalesce(func.sum(m.distance).filter(m.period_start == month_start), 0),
+    )).group_by(m.type)
+
+    weekly = select(*_result_columns(
+        "week",
+        sport=WorkoutRollup.type,
+        start_date=WorkoutRollup.period_start,
+        distance=WorkoutRollup.distance,
+        elevation=WorkoutRollup.elevation,
+    )).where(
+        WorkoutRollup.user_id == user_id,
+        WorkoutRollup.period == "week",
+        WorkoutRollup.type.in_(types),
+        WorkoutRollup.period_start >= progress_since,
+    )
+
+    recent_rank = func.row_number().over(
+        partition_by=Workout.type,
+        order_by=[Workout.start_date.desc(), Workout.id.desc()],
+    )
+    recent_ranked = select(
+        Workout.id,
+        Workout.type,
+        Workout.name,
+        Workout.start_date,
+        Workout.distance,
+        Workout.moving_time,
+        Workout.total_elevation_gain,
+        recent_rank.label("recent_rank"),
+    ).where(Workout.user_id == user_id, Workout.type.in_(types)).subquery()
+    r = recent_ranked.c
+    recent = select(*_result_columns(
+        "recent",
+        sport=r.type,
+        id=r.id,
+        name=r.name,
+        start_date=r.start_date,
+        distance=r.distance,
+        moving_time=r.moving_time,
+        elevation=r.total_elevation_gain,
+    )).where(r.recent_rank <= RECENT_ACTIVITY_LIMIT)
+
+    # Current PRs, with the details of the workout holding each
+    records = select(*_result_columns(
+        "record",
+        sport=PersonalRecord.sport,
+        key=PersonalRecord.record,
+        id=Workout.id,
+        start_date=Workout.start_date,
+        distance=Workout.distance,
+        moving_time=Workout.moving_time,
+        elevation=Workout.total_elevation_gain,
+        value=PersonalRecord.value,
+    )).select_from(PersonalRecord).join(Workout, Workout.id == PersonalRecord.workout_id).where(
+        PersonalRecord.user_id == user_id,
+        PersonalRecord.is_current,
+        PersonalRecord.sport.in_(types),
+    )
+
+    return union_all(totals, weekly, recent, records)
+
+
+def _empty_analytics(spec: Dict) -> Dict:
+    overview = {
+        "total_distance": 0,
+        "monthly_distance": 0,
+        spec["average_key"]: spec["empty_average"],
+        spec["count_key"]: 0,
+    }
+    if spec["total_elevation"]:
+        overview["total_elevation"] = 0
+    return {
+        "overview": overview,
+        "personal_records": {},
+        "progress": [],
+        "recent_activities": []
+    }
+
+
+def _build_analytics(spec: Dict, sections: Dict) -> Dict:
+    totals = sections["totals"]
+    if totals is None or not totals.count:
+        return _empty_analytics(spec)
+
+    overview = {
+        "total_distance": round(totals.distance / 1000, 2),
+        "monthly_distance": round(totals.monthly_distance / 1000, 2),
+        spec["average_key"]: spec["average"](totals.distance, totals.moving_time),
+        spec["count_key"]: totals.count,
+    }
+    if spec["total_elevation"]:
+        overview["total_elevation"] = round(totals.elevation, 0)
+
     records = {}
-    
-    # Longest ride
-    longest = max(workouts, key=lambda w: w.distance or 0)
-    if longest.distance:
-        records["longest_ride"] = {
-            "distance": round(longest.distance / 1000, 2),
-            "date": longest.start_date.strftime("%Y-%m-%d"),
-            "workout_id": longest.id
-        }
-    
-    # Biggest climb
-    if any(w.total_elevation_gain for w in workouts):
-        biggest_climb = max(workouts, key=lambda w: w.total_elevation_gain or 0)
-        if biggest_climb.total_elevation_gain:
-            records["biggest_climb"] = {
-                "elevation": round(biggest_climb.total_elevation_gain, 0),
-                "distance": round(biggest_climb.distance / 1000, 2),
-                "date": biggest_climb.start_date.strftime("%Y-%m-%d"),
-                "workout_id": biggest_climb.id
-            }
-    
-    # Fastest average speed (for rides > 10km)
-    valid_speed_rides = [w for w in workouts if w.distance and w.moving_time and (w.distance / 1000) >= 10]
-    if valid_speed_rides:
-        fastest_ride = max(valid_speed_rides,
-                          key=lambda w: calculate_speed(w.distance / 1000, w.moving_time))
-        records["fastest_speed"] = {
-            "speed": round(calculate_speed(fastest_ride.distance / 1000, fastest_ride.moving_time), 2),
-            "distance": round(fastest_ride.distance / 1000, 2),
-            "date": fastest_ride.start_date.strftime("%Y-%m-%d"),
-            "workout_id": fastest_ride.id
-        }
-    
-    # Weekly progress (last 12 weeks)
-    twelve_weeks_ago = now - timedelta(weeks=12)
-    recent_workouts = [w for w in workouts if w.start_date >= twelve_weeks_ago]
-    
-    weeks_dict = {}
-    for workout in recent_workouts:
-        week_start = workout.start_date - timedelta(days=workout.start_date.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")
-        
-        if week_key not in weeks_dict:
-            weeks_dict[week_key] = []
-        weeks_dict[week_key].append(workout)
-    
+    for name, formatter in spec["records"].items():
+        if name in sections["records"]:
+            records[name] = formatter(sections["records"][name])
+
+    if spec["race_efforts"]:
+        # Exact-distance efforts from streams, falling back to whole runs within a distance band
+        for name in BEST_EFFORT_DISTANCES:
+            effort = sections["records"].get(f"fastest_{name}")
+            band_run = sections["records"].get(f"fastest_{name}_run")
+            if effort:
+                records[f"fastest_{name}"] = RECORD_FORMATTERS[f"fastest_{name}"](effort)
+            elif band_run:
+                records[f"fastest_{name}"] = _race_run_record(band_run)
+
     progress = []
-    for week_start in sorted(weeks_dict.keys()):
-        week_workouts = weeks_dict[week_start]
-        week_distance = sum(w.distance or 0 for w in week_workouts) / 1000
-        week_elevation = sum(w.total_elevation_gain or 0 for w in week_workouts)
-        progress.append({
-            "week": week_start,
-            "distance": round(week_distance, 2),
-            "elevation": round(week_elevation, 0)
-        })
-    
-    # Recent activities (last 10)
+    for week in sorted(sections["weeks"], key=lambda row: row.start_date):
+        entry = {"week": _date(week), "distance": round(week.distance / 1000, 2)}
+        if spec["progress_elevation"]:
+            entry["elevation"] = round(week.elevation, 0)
+        progress.append(entry)
+
     recent_activities = []
-    for workout in sorted(workouts, key=lambda w: w.start_date, reverse=True)[:10]:
-        distance_km = (workout.distance or 0) / 1000
-        speed = calculate_speed(distance_km, workout.moving_time) if workout.moving_time and distance_km > 0 else 0
-        
-        recent_activities.append({
+    for workout in sorted(sections["recent"], key=lambda row: (row.start_date, row.id), reverse=True):
+        distance = workout.distance or 0
+        activity = {
             "id": workout.id,
-            "date": workout.start_date.strftime("%Y-%m-%d"),
+            "date": _date(workout),
             "name": workout.name,
-            "distance": round(distance_km, 2),
+            "distance": round(distance / 1000, 2),
             "time": format_time(workout.moving_time) if workout.moving_time else "0:00",
-            "speed": round(speed, 2),
-            "elevation": round(workout.total_elevation_gain or 0, 0)
-        })
-    
+            spec["recent_metric_key"]: spec["recent_metric"](distance, workout.moving_time),
+        }
+        if spec["recent_elevation"]:
+            activity["elevation"] = round(workout.elevation or 0, 0)
+        recent_activities.append(activity)
+
     return {
-        "overview": {
-            "total_distance": round(total_distance_km, 2),
-            "monthly_distance": round(monthly_distance_km, 2),
-            "average_speed": round(avg_speed, 2),
-            "total_rides": len(workouts),
-            "total_elevation": round(total_elevation, 0)
-        },
+        "overview": overview,
         "personal_records": records,
         "progress": progress,
         "recent_activities": recent_activities
     }
 
 
+def get_sport_analytics(db: Session, user_id: int, sports: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """
+    Overview, PRs, weekly progress and recent activities for each requested
+    sport (all of SPORT_SPECS by default), keyed by sport name, from one query.
+    """
+    sports = tuple(sports or SPORT_SPECS)
+    specs = {name: SPORT_SPECS[name] for name in sports}
+    sport_names = {spec["type"]: name for name, spec in specs.items()}
+    sections = {
+        name: {"totals": None, "weeks": [], "recent": [], "records": {}}
+        for name in specs
+    }
+
+    now = datetime.now()
+    params = {
+        "user_id": user_id,
+        "month_start": now.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+        # Whole weeks: the current one and the PROGRESS_WEEKS - 1 before it
+        "progress_since": period_start("week", now) - timedelta(weeks=PROGRESS_WEEKS - 1),
+    }
+    for row in db.execute(_analytics_query(sports), params):
+        sport = sections[sport_names[row.sport]]
+        if row.section == "totals":
+            sport["totals"] = row
+        elif row.section == "week":
+            sport["weeks"].append(row)
+        elif row.section == "recent":
+            sport["recent"].append(row)
+        elif row.section == "record":
+            sport["records"][row.key] = row
+
+    return {name: _build_analytics(specs[name], sections[name]) for name in specs}
+
+
+def get_record_history(db: Session, user_id: int, record: Optional[str] = None) -> Dict[str, List[Dict]]:
+    """
+    PR progression over time: for each record (or just `record`), every
+    workout that set a new best when it happened, oldest first. The last
+    entry of each record is the current PR.
+    """
+    conditions = [PersonalRecord.user_id == user_id]
+    if record is not None:
+        conditions.append(PersonalRecord.record == record)
+
+    rows = db.execute(
+        select(
+            PersonalRecord.record,
+            PersonalRecord.value,
+            PersonalRecord.is_current,
+            Workout.id,
+            Workout.start_date,
+            Workout.distance,
+            Workout.moving_time,
+            Workout.total_elevation_gain.label("elevation"),
+        )
+        .join(Workout, Workout.id == PersonalRecord.workout_id)
+        .where(*conditions)
+        .order_by(PersonalRecord.record, PersonalRecord.achieved_at, PersonalRecord.workout_id)
+    ).all()
+
+    history: Dict[str, List[Dict]] = {}
+    for row in rows:
+        entry = RECORD_FORMATTERS[row.record](row)
+        entry["current"] = row.is_current
+        history.setdefault(row.record, []).append(entry)
+    return history
+
+
+def get_running_analytics(db: Session, user_id: int) -> Dict:
+    """
+    Calculate comprehensive running analytics including overview, PRs, progress, and recent activities
+    """
+    return get_sport_analytics(db, user_id, ["running"])["running"]
+
+
+def get_cycling_analytics(db: Session, user_id: int) -> Dict:
+    """
+    Calculate comprehensive cycling analytics
+    """
+    return get_sport_analytics(db, user_id, ["cycling"])["cycling"]
+
+
 def get_swimming_analytics(db: Session, user_id: int) -> Dict:
     """
     Calculate comprehensive swimming analytics
     """
-    workouts = db.query(Workout).filter(
-        and_(
-            Workout.user_id == user_id,
-            Workout.type == 'Swim'
-        )
-    ).order_by(Workout.start_date).all()
-    
-    if not workouts:
-        return {
-            "overview": {
-                "total_distance": 0,
-                "monthly_distance": 0,
-                "average_pace_per_100m": "0:00",
-                "total_swims": 0
-            },
-            "personal_records": {},
-            "progress": [],
-            "recent_activities": []
-        }
-    
-    # Calculate overview
-    total_distance_m = sum(w.distance or 0 for w in workouts)
-    total_time_s = sum(w.moving_time or 0 for w in workouts)
-    total_distance_km = total_distance_m / 1000
-    
-    # This month's stats
-    now = datetime.now()
-    first_day_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    month_workouts = [w for w in workouts if w.start_date >= first_day_of_month]
-    monthly_distance_km = sum(w.distance or 0 for w in month_workouts) / 1000
-    
-    # Average pace per 100m
-    if total_distance_m > 0:
-        pace_per_100m_seconds = total_time_s / (total_distance_m / 100)
-        avg_pace_per_100m = format_time(int(pace_per_100m_seconds))
-    else:
-        avg_pace_per_100m = "0:00"
-    
-    # Personal Records
-    records = {}
-    
-    # Longest swim
-    longest = max(workouts, key=lambda w: w.distance or 0)
-    if longest.distance:
-        records["longest_swim"] = {
-            "distance": round(longest.distance / 1000, 2),
-            "date": longest.start_date.strftime("%Y-%m-%d"),
-            "workout_id": longest.id
-        }
-    
-    # Best pace per 100m
-    valid_swims = [w for w in workouts if w.distance and w.moving_time and w.distance >= 100]
-    if valid_swims:
-        best_pace_swim = min(valid_swims,
-                            key=lambda w: w.moving_time / (w.distance / 100))
-        pace_seconds = best_pace_swim.moving_time / (best_pace_swim.distance / 100)
-        records["best_pace_per_100m"] = {
-            "pace": format_time(int(pace_seconds)),
-            "distance": round(best_pace_swim.distance / 1000, 2),
-            "date": best_pace_swim.start_date.strftime("%Y-%m-%d"),
-            "workout_id": best_pace_swim.id
-        }
-    
-    # Weekly progress (last 12 weeks)
-    twelve_weeks_ago = now - timedelta(weeks=12)
-    recent_workouts = [w for w in workouts if w.start_date >= twelve_weeks_ago]
-    
-    weeks_dict = {}
-    for workout in recent_workouts:
-        week_start = workout.start_date - timedelta(days=workout.start_date.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")
-        
-        if week_key not in weeks_dict:
-            weeks_dict[week_key] = []
-        weeks_dict[week_key].append(workout)
-    
-    progress = []
-    for week_start in sorted(weeks_dict.keys()):
-        week_workouts = weeks_dict[week_start]
-        week_distance = sum(w.distance or 0 for w in week_workouts) / 1000
-        progress.append({
-            "week": week_start,
-            "distance": round(week_distance, 2)
-        })
-    
-    # Recent activities (last 10)
-    recent_activities = []
-    for workout in sorted(workouts, key=lambda w: w.start_date, reverse=True)[:10]:
-        distance_m = workout.distance or 0
-        distance_km = distance_m / 1000
-        
-        if distance_m > 0 and workout.moving_time:
-            pace_per_100m = format_time(int(workout.moving_time / (distance_m / 100)))
-        else:
-            pace_per_100m = "0:00"
-        
-        recent_activities.append({
-            "id": workout.id,
-            "date": workout.start_date.strftime("%Y-%m-%d"),
-            "name": workout.name,
-            "distance": round(distance_km, 2),
-            "time": format_time(workout.moving_time) if workout.moving_time else "0:00",
-            "pace_per_100m": pace_per_100m
-        })
-    
-    return {
-        "overview": {
-            "total_distance": round(total_distance_km, 2),
-            "monthly_distance": round(monthly_distance_km, 2),
-            "average_pace_per_100m": avg_pace_per_100m,
-            "total_swims": len(workouts)
-        },
-        "personal_records": records,
-        "progress": progress,
-        "recent_activities": recent_activities
-    }
\ No newline at end of file
+    return get_sport_analytics(db, user_id, ["swimming"])["swimming"]
@@ -0,0 +1,281 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from typing import List, Optional
+from urllib.parse import urlsplit
+import httpx
+from redis import asyncio as aioredis
+from app.worker import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Connection pool shared by every Strava request in the process
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("STRAVA_HTTP_MAX_CONNECTIONS", "50")),
+    max_keepalive_connections=int(os.getenv("STRAVA_HTTP_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=60.0,
+)
+
+# HTTP/2 multiplexes concurrent page fetches over one connection; needs the optional h2 package
+HTTP2 = os.getenv("STRAVA_HTTP2", "false").lower() == "true"
+
+# Root of Strava's API and OAuth endpoints; point it at scripts/fake_strava.py to run offline
+STRAVA_BASE_URL = os.getenv("STRAVA_BASE_URL", "https://www.strava.com").rstrip("/")
+
+DEFAULT_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+HOST_TIMEOUTS = {
+    urlsplit(STRAVA_BASE_URL).hostname: httpx.Timeout(30.0, connect=5.0, pool=10.0),
+}
+
+# Defaults until Strava reports the real limits in X-RateLimit-Limit
+DEFAULT_SHORT_LIMIT = int(os.getenv("STRAVA_RATE_LIMIT_15MIN", "200"))
+DEFAULT_DAILY_LIMIT = int(os.getenv("STRAVA_RATE_LIMIT_DAILY", "2000"))
+
+# Share of each window background backfills may use; the rest is kept for users
+BACKFILL_SHARE = float(os.getenv("STRAVA_BACKFILL_SHARE", "0.6"))
+
+# Share of each window left unused so requests Strava hasn't counted yet don't tip us into 429s
+SAFETY_MARGIN = 0.05
+
+# Redis keys holding the shared budget
+RATE_LIMIT_KEY_PREFIX = "strava:ratelimit"
+
+# Times a backfill request rejected with a 429 waits for the next window and tries again
+MAX_RATE_LIMITED_RETRIES = 3
+
+# How often queued requests re-check the budget
+QUEUE_POLL_SECONDS = 0.05
+MAX_WAIT_SECONDS = 5.0
+
+
+class Priority(IntEnum):
+    """Lower values are served first"""
+    INTERACTIVE = 0
+    BACKFILL = 1
+
+
+def _next_quarter_hour(now: datetime) -> datetime:
+    """Strava's short window resets at :00, :15, :30 and :45 UTC"""
+    start = now.replace(minute=now.minute - now.minute % 15, second=0, microsecond=0)
+    return start + timedelta(minutes=15)
+
+
+def _next_midnight(now: datetime) -> datetime:
+    """Strava's daily window resets at midnight UTC"""
+    return now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+def _parse_pair(value: Optional[str]) -> Optional[List[int]]:
+    """Parse a "short,daily" rate limit header"""
+    if not value:
+        return None
+    try:
+        short, daily = (int(part) for part in value.split(",")[:2])
+    except ValueError:
+        return None
+    return [short, daily]
+
+
+# Raise a usage counter to at least the given value, keeping its expiry
+_RAISE_TO_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1])
+    redis.call('EXPIREAT', KEYS[1], ARGV[2])
+end
+"""
+
+
+class RateLimitScheduler:
+    """
+    Gatekeeper for every outbound Strava request.
+
+    Strava enforces one application-wide budget per 15-minute window and per
+    day. Usage is counted in Redis, one key per window expiring when the
+    window resets, so every API and worker process draws on the same budget:
+    a request reserves its slot with INCR before it is sent, and response
+    headers raise the counters to the usage Strava reports. Requests queue by
+    priority within a process; backfill traffic stops at BACKFILL_SHARE of a
+    window so interactive requests still get through, and everything stops
+    just short of the limit until the window resets.
+    """
+
+    def __init__(self, redis_url: str = REDIS_URL, short_limit: int = DEFAULT_SHORT_LIMIT, daily_limit: int = DEFAULT_DAILY_LIMIT):
+        self.redis = aioredis.Redis.from_url(redis_url, decode_responses=True)
+        self.default_limits = [short_limit, daily_limit]
+        self._raise_to = self.redis.register_script(_RAISE_TO_SCRIPT)
+        self._queue: List[tuple] = []
+        self._counter = itertools.count()
+
+    @staticmethod
+    def _windows(now: datetime) -> List[tuple]:
+        """(usage key, reset time) of the current short and daily windows"""
+        short_resets_at = _next_quarter_hour(now)
+        daily_resets_at = _next_midnight(now)
+        return [
+            (f"{RATE_LIMIT_KEY_PREFIX}:short:{int(short_resets_at.timestamp())}", short_resets_at),
+            (f"{RATE_LIMIT_KEY_PREFIX}:daily:{daily_resets_at:%Y%m%d}", daily_resets_at),
+        ]
+
+    async def limits(self) -> List[int]:
+        """The [short, daily] limits Strava last reported to any process"""
+        return _parse_pair(await self.redis.get(f"{RATE_LIMIT_KEY_PREFIX}:limits")) or self.default_limits
+
+    @staticmethod
+    def _ceiling(limit: int, priority: Priority) -> int:
+        if priority == Priority.BACKFILL:
+            return int(limit * BACKFILL_SHARE)
+        return limit - max(1, int(limit * SAFETY_MARGIN))
+
+    async def reserve(self, priority: Priority) -> float:
+        """
+        Take one request from both windows if it fits under this priority's
+        ceiling. Returns 0 on success, otherwise the seconds until the full
+        window resets, having given the slot back.
+        """
+        now = datetime.now(timezone.utc)
+        windows = self._windows(now)
+        limits = await self.limits()
+
+        pipe = self.redis.pipeline(transaction=True)
+        for key, resets_at in windows:
+            pipe.incr(key)
+            pipe.expireat(key, resets_at)
+        usage = (await pipe.execute())[::2]
+
+        full = [
+            resets_at for (key, resets_at), used, limit in zip(windows, usage, limits)
+            if used > self._ceiling(limit, priority)
+        ]
+        if not full:
+            return 0.0
+
+        pipe = self.redis.pipeline(transaction=True)
+        for key, _ in windows:
+            pipe.decr(key)
+        await pipe.execute()
+        return max((resets_at - now).total_seconds() for resets_at in full)
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE):
+        """Wait for this request's turn and reserve its slot in the shared budget"""
+        entry = (int(priority), next(self._counter))
+        heapq.heappush(self._queue, entry)
+        try:
+            while True:
+                if self._queue[0] != entry:
+                    await asyncio.sleep(QUEUE_POLL_SECONDS)
+                    continue
+                wait = await self.reserve(priority)
+                if wait <= 0:
+                    heapq.heappop(self._queue)
+                    return
+                await asyncio.sleep(min(wait, MAX_WAIT_SECONDS))
+        except BaseException:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            raise
+
+    async def record(self, response: httpx.Response):
+        """Bring the shared budget in line with Strava's rate limit headers"""
+        limits = _parse_pair(response.headers.get("X-RateLimit-Limit"))
+        if limits:
+            await self.redis.set(f"{RATE_LIMIT_KEY_PREFIX}:limits", f"{limits[0]},{limits[1]}")
+        limits = limits or await self.limits()
+
+        usage = _parse_pair(response.headers.get("X-RateLimit-Usage")) or [0, 0]
+        if response.status_code == 429:
+            # Out of budget; hold everything until the short window resets
+            usage[0] = max(usage[0], limits[0])
+            if usage[1] < limits[1]:
+                usage[1] = 0
+
+        # Counters only go up: they include requests other processes still have in flight
+        for (key, resets_at), used in zip(self._windows(datetime.now(timezone.utc)), usage):
+            if used:
+                await self._raise_to(keys=[key], args=[used, int(resets_at.timestamp())])
+
+    async def snapshot(self) -> dict:
+        windows = self._windows(datetime.now(timezone.utc))
+        usage = await self.redis.mget([key for key, _ in windows])
+        limits = await self.limits()
+        snapshot = {
+            name: {"usage": int(used or 0), "limit": limit, "resets_at": resets_at.isoformat()}
+            for name, (_, resets_at), used, limit in zip(("short", "daily"), windows, usage, limits)
+        }
+        snapshot["queued"] = len(self._queue)
+        return snapshot
+
+
+scheduler = RateLimitScheduler()
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def open_client() -> httpx.AsyncClient:
+    """Create the process-wide Strava client. Call once per event loop."""
+    global _client
+    if _client is None:
+        http2 = HTTP2 and _http2_available()
+        if HTTP2 and not http2:
+            logger.warning("STRAVA_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+        _client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=DEFAULT_TIMEOUT, http2=http2)
+    return _client
+
+
+async def close_client():
+    """Close the process-wide Strava client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@asynccontextmanager
+async def client_session():
+    """Open the shared client for the duration of a block, e.g. one worker task"""
+    await open_client()
+    try:
+        yield
+    finally:
+        await close_client()
+
+
+def get_client() -> httpx.AsyncClient:
+    if _client is None:
+        raise RuntimeError("Strava HTTP client is not open; use open_client() or client_session()")
+    return _client
+
+
+async def strava_request(
+    method: str,
+    url: str,
+    priority: Priority = Priority.INTERACTIVE,
+    **kwargs,
+) -> httpx.Response:
+    """
+    Send a Strava request over the shared client, through the rate limit
+    scheduler. Backfill requests answered with a 429 wait for the budget to
+    reset and are retried; interactive ones return the 429 to the caller.
+    """
+    kwargs.setdefault("timeout", HOST_TIMEOUTS.get(urlsplit(url).hostname, DEFAULT_TIMEOUT))
+
+    for attempt in itertools.count():
+        await scheduler.acquire(priority)
+        response = await get_client().request(method, url, **kwargs)
+        await scheduler.record(response)
+        if response.status_code != 429 or priority != Priority.BACKFILL or attempt >= MAX_RATE_LIMITED_RETRIES:
+            return response
+        # The 429 filled the short window, so the next acquire waits for it to reset
@@ -0,0 +1,158 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.services.ingest import ingest_activities
+from app.services.strava_client import STRAVA_BASE_URL, Priority, strava_request
+from app.services.strava_tokens import get_valid_token
+
+STRAVA_API_BASE = f"{STRAVA_BASE_URL}/api/v3"
+
+# Strava caps /athlete/activities at 200 items per page
+STRAVA_PAGE_SIZE = 200
+
+# Number of activity pages fetched concurrently during a full-history sync
+SYNC_PAGE_CONCURRENCY = int(os.getenv("STRAVA_SYNC_PAGE_CONCURRENCY", "4"))
+
+
+async def fetch_activity_page(
+    token: str,
+    page: int,
+    after: Optional[int] = None,
+    priority: Priority = Priority.INTERACTIVE,
+) -> List[Dict]:
+    """Fetch a single page of the athlete's activities"""
+    params = {"per_page": STRAVA_PAGE_SIZE, "page": page}
+    if after:
+        params["after"] = after
+
+    response = await strava_request(
+        "GET",
+        f"{STRAVA_API_BASE}/athlete/activities",
+        priority=priority,
+        headers={"Authorization": f"Bearer {token}"},
+        params=params
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def iter_activity_pages(
+    token: str,
+    after: Optional[int] = None,
+    concurrency: int = SYNC_PAGE_CONCURRENCY,
+    priority: Priority = Priority.INTERACTIVE,
+) -> AsyncIterator[List[Dict]]:
+    """
+    Walk every page of the athlete's activities, keeping up to `concurrency`
+    page requests in flight. Pages are yielded in completion order as soon as
+    they arrive, so callers can persist them without holding the full history.
+    A short page marks the end of the history; no pages past it are requested.
+    """
+    in_flight: Dict[asyncio.Task, int] = {}
+    next_page = 1
+    last_page: Optional[int] = None
+
+    def schedule():
+        nonlocal next_page
+        while len(in_flight) < concurrency and (last_page is None or next_page <= last_page):
+            task = asyncio.create_task(fetch_activity_page(token, next_page, after, priority))
+            in_flight[task] = next_page
+            next_page += 1
+
+    try:
+        schedule()
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task not in in_flight:
+                    # Dropped above as lying past the last page
+                    continue
+                page = in_flight.pop(task)
+                activities = task.result()
+
+                if len(activities) < STRAVA_PAGE_SIZE:
+                    last_page = page if last_page is None else min(last_page, page)
+                    # Pages past the end come back empty; don't wait for them
+                    for pending, pending_page in list(in_flight.items()):
+                        if pending_page > last_page:
+                            pending.cancel()
+                            del in_flight[pending]
+
+                if activities:
+                    yield activities
+            schedule()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def run_sync(
+    db: Session,
+    user: User,
+    after: Optional[int] = None,
+    full: bool = False,
+    progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """
+    Fetch workouts from Strava and store them. Without `after` or `full`, only
+    activities newer than the user's stored sync watermark are fetched; users
+    who have never synced get a full sync. `progress` is called with running
+    totals after each stored page.
+    """
+    token = await get_valid_token(user, db)
+
+    incremental = after is None and not full and user.strava_last_activity_at is not None
+    if incremental:
+        after = int(user.strava_last_activity_at.replace(tzinfo=timezone.utc).timestamp())
+
+    totals = {"total_activities": 0, "new_activities": 0, "updated_activities": 0, "pages": 0}
+    latest_start_date = user.strava_last_activity_at
+
+    # A delta is usually a single short page, so walk it one page at a time.
+    # Full syncs keep several pages in flight and write each as it arrives.
+    # Full-history walks are backfill traffic and yield to interactive requests.
+    concurrency = 1 if incremental else SYNC_PAGE_CONCURRENCY
+    priority = Priority.INTERACTIVE if incremental else Priority.BACKFILL
+    async for activities in iter_activity_pages(
+        token, after=after, concurrency=concurrency, priority=priority
+    ):
+        result = ingest_activities(db, user.id, activities)
+        totals["total_activities"] += len(activities)
+        totals["new_activities"] += result["inserted"]
+        totals["updated_activities"] += result["updated"]
+        totals["pages"] += 1
+        if latest_start_date is None or result["latest_start_date"] > latest_start_date:
+            latest_start_date = result["latest_start_date"]
+
+        if progress:
+            progress(dict(totals))
+
+    # Only advance the watermark once every page has been stored
+    user.strava_last_activity_at = latest_start_date
+    user.strava_last_synced_at = datetime.utcnow()
+    db.commit()
+
+    return {
+        "success": True,
+        **totals,
+        "last_activity_at": latest_start_date.isoformat() if latest_start_date else None
+    }
+
+
+async def fetch_activity(
+    token: str,
+    activity_id: int,
+    priority: Priority = Priority.INTERACTIVE,
+) -> Dict:
+    """Fetch a single activity"""
+    response = await strava_request(
+        "GET",
+        f"{STRAVA_API_BASE}/activities/{activity_id}",
+        priority=priority,
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    response.raise_for_status()
+    return response.json()
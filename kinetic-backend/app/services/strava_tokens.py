@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict
+from redis import asyncio as aioredis
+from sqlalchemy.orm import Session
+from app.database.base import SessionLocal
+from app.models.user import User
+from app.services.strava_client import STRAVA_BASE_URL, strava_request
+from app.worker import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Environment variables
+STRAVA_CLIENT_ID = os.getenv("STRAVA_CLIENT_ID")
+STRAVA_CLIENT_SECRET = os.getenv("STRAVA_CLIENT_SECRET")
+
+STRAVA_TOKEN_URL = f"{STRAVA_BASE_URL}/oauth/token"
+
+# Treat tokens this close to expiry as expired so they can't lapse mid-request
+EXPIRY_SKEW = timedelta(seconds=60)
+
+# The background refresher renews tokens expiring within this window
+PROACTIVE_REFRESH_WINDOW = timedelta(minutes=int(os.getenv("STRAVA_TOKEN_REFRESH_WINDOW_MINUTES", "15")))
+
+# In-flight refreshes in this process, keyed by user id
+_refreshes: Dict[int, asyncio.Task] = {}
+
+redis_client = aioredis.Redis.from_url(REDIS_URL)
+
+
+def _needs_refresh(user: User, margin: timedelta = EXPIRY_SKEW) -> bool:
+    return user.strava_token_expires_at is None or datetime.now() >= user.strava_token_expires_at - margin
+
+
+async def refresh_strava_token(user: User, db: Session):
+    """ Exchange the user's refresh token for a new access token """
+    response = await strava_request(
+        "POST",
+        STRAVA_TOKEN_URL,
+        data={
+            "client_id": STRAVA_CLIENT_ID,
+            "client_secret": STRAVA_CLIENT_SECRET,
+            "grant_type": "refresh_token",
+            "refresh_token": user.strava_refresh_token,
+        }
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    user.strava_access_token = data["access_token"]
+    user.strava_refresh_token = data["refresh_token"]
+    user.strava_token_expires_at = datetime.fromtimestamp(data["expires_at"])
+    db.commit()
+
+    return data["access_token"]
+
+
+async def _refresh_once(user_id: int, margin: timedelta) -> str:
+    """
+    Refresh a user's token while holding a cross-process lock. Whoever gets
+    the lock second re-reads the user and finds the token already renewed,
+    so only one exchange happens and nobody ends up with a revoked token.
+    """
+    async with redis_client.lock(f"strava:token-refresh:{user_id}", timeout=30, blocking_timeout=30):
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.id == user_id).first()
+            if not user or not user.strava_refresh_token:
+                raise ValueError(f"User {user_id} has not connected Strava")
+            if not _needs_refresh(user, margin):
+                return user.strava_access_token
+            return await refresh_strava_token(user, db)
+        finally:
+            db.close()
+
+
+async def refresh_user_token(user_id: int, margin: timedelta = EXPIRY_SKEW) -> str:
+    """Refresh a user's token, sharing one in-flight refresh between concurrent callers"""
+    task = _refreshes.get(user_id)
+    if task is None or task.done():
+        task = asyncio.ensure_future(_refresh_once(user_id, margin))
+        _refreshes[user_id] = task
+
+        def forget(finished: asyncio.Task):
+            if _refreshes.get(user_id) is finished:
+                del _refreshes[user_id]
+
+        task.add_done_callback(forget)
+
+    # Shield so one caller going away doesn't cancel the refresh for everyone else
+    return await asyncio.shield(task)
+
+
+async def get_valid_token(user: User, db: Session):
+    """Get valid access token, refreshing if necessary"""
+    if _needs_refresh(user):
+        token = await refresh_user_token(user.id)
+        # The refresh committed through its own session; reload these on next access
+        db.expire(user, ["strava_access_token", "strava_refresh_token", "strava_token_expires_at"])
+        return token
+    return user.strava_access_token
+
+
+async def refresh_expiring_tokens(db: Session) -> Dict:
+    """Renew every token that will expire soon, so user requests never wait on a token exchange"""
+    cutoff = datetime.now() + PROACTIVE_REFRESH_WINDOW
+    user_ids = [
+        user_id for (user_id,) in db.query(User.id).filter(
+            User.strava_refresh_token.isnot(None),
+            User.strava_token_expires_at < cutoff
+        ).all()
+    ]
+
+    refreshed = 0
+    failed = 0
+    for user_id in user_ids:
+        try:
+            await refresh_user_token(user_id, margin=PROACTIVE_REFRESH_WINDOW)
+            refreshed += 1
+        except Exception:
+            failed += 1
+            logger.exception("Error refreshing Strava token for user %s", user_id)
+
+    return {"refreshed": refreshed, "failed": failed}
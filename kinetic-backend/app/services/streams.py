@@ -0,0 +1,186 @@
+import asyncio
+import zlib
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.stream import WorkoutStream
+from app.models.user import User
+from app.models.workout import Workout
+from app.services.analytics_cache import bump_data_version
+from app.services.best_efforts import BEST_EFFORT_SPORTS, save_best_efforts
+from app.services.personal_records import EFFORT_RECORDS, refresh_personal_records
+from app.services.strava_client import Priority, strava_request
+from app.services.strava_sync import STRAVA_API_BASE
+from app.services.strava_tokens import get_valid_token
+
+# Storage dtype per stream. Everything is little-endian so blobs are portable.
+STREAM_DTYPES = {
+    "time": np.dtype("<i4"),
+    "distance": np.dtype("<f4"),
+    "heartrate": np.dtype("<f4"),
+    "altitude": np.dtype("<f4"),
+    "cadence": np.dtype("<f4"),
+    "watts": np.dtype("<f4"),
+    "latlng": np.dtype("<f8"),
+}
+STREAM_KEYS = list(STREAM_DTYPES)
+
+# Monotonic integer streams compress far better as deltas
+DELTA_ENCODED = {"time"}
+
+# Concurrent stream requests while backfilling a user's history
+STREAM_FETCH_CONCURRENCY = 4
+
+
+def encode_stream(key: str, values: Iterable) -> bytes:
+    """Pack a stream into a compressed typed array"""
+    dtype = STREAM_DTYPES[key]
+    # Strava reports sensor dropouts as null; they become NaN (or 0 for integer streams)
+    array = np.array(values, dtype=np.float64)
+    if dtype.kind == "i":
+        array = np.nan_to_num(array)
+    array = array.astype(dtype)
+
+    if key in DELTA_ENCODED:
+        array = np.diff(array, prepend=dtype.type(0))
+
+    return zlib.compress(np.ascontiguousarray(array).tobytes(), 6)
+
+
+def decode_stream(key: str, blob: bytes) -> np.ndarray:
+    """Unpack a stored stream into a NumPy array without touching individual samples"""
+    dtype = STREAM_DTYPES[key]
+    array = np.frombuffer(zlib.decompress(blob), dtype=dtype)
+
+    if key in DELTA_ENCODED:
+        array = np.cumsum(array, dtype=dtype)
+    if key == "latlng":
+        array = array.reshape(-1, 2)
+
+    return array
+
+
+def save_streams(db: Session, workout_id: int, streams: Dict[str, List]):
+    """Store a workout's streams, replacing any previously stored ones"""
+    values = {key: None for key in STREAM_KEYS}
+    sample_count = 0
+    for key, data in streams.items():
+        if key in STREAM_DTYPES and data:
+            values[key] = encode_stream(key, data)
+            sample_count = max(sample_count, len(data))
+
+    stmt = insert(WorkoutStream).values(workout_id=workout_id, sample_count=sample_count, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[WorkoutStream.workout_id],
+        set_={"sample_count": sample_count, **values},
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def refresh_best_efforts(db: Session, user_id: int, workout_id: int, time: np.ndarray, distance: np.ndarray) -> int:
+    """Store a workout's best efforts and update the effort PRs. Returns the number stored."""
+    count = save_best_efforts(db, user_id, workout_id, time, distance)
+    if refresh_personal_records(db, user_id, [workout_id], EFFORT_RECORDS):
+        bump_data_version(db, user_id)
+    return count
+
+
+def store_workout_streams(db: Session, user_id: int, workout_id: int, workout_type: str, streams: Dict[str, List]):
+    """Save a workout's streams and refresh the best efforts derived from them"""
+    save_streams(db, workout_id, streams)
+
+    if workout_type in BEST_EFFORT_SPORTS and streams.get("time") and streams.get("distance"):
+        refresh_best_efforts(db, user_id, workout_id, streams["time"], streams["distance"])
+
+
+def load_streams(db: Session, workout_id: int, keys: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """Load and decode a workout's streams. Only the requested columns are read."""
+    keys = keys or STREAM_KEYS
+    row = db.execute(
+        select(*[getattr(WorkoutStream, key) for key in keys]).where(WorkoutStream.workout_id == workout_id)
+    ).first()
+
+    if row is None:
+        return {}
+
+    return {
+        key: decode_stream(key, blob)
+        for key, blob in zip(keys, row)
+        if blob is not None
+    }
+
+
+def rebuild_best_efforts(db: Session, user_id: int) -> int:
+    """Recompute best efforts from every stored stream of a user's workouts"""
+    workout_ids = db.execute(
+        select(Workout.id)
+        .join(WorkoutStream, WorkoutStream.workout_id == Workout.id)
+        .where(
+            Workout.user_id == user_id,
+            Workout.type.in_(BEST_EFFORT_SPORTS),
+            WorkoutStream.time.isnot(None),
+            WorkoutStream.distance.isnot(None),
+        )
+    ).scalars().all()
+
+    count = 0
+    for workout_id in workout_ids:
+        streams = load_streams(db, workout_id, ["time", "distance"])
+        count += refresh_best_efforts(db, user_id, workout_id, streams["time"], streams["distance"])
+    return count
+
+
+async def fetch_streams(token: str, strava_id: int) -> Dict[str, List]:
+    """Fetch an activity's streams from Strava. Manual activities have none."""
+    response = await strava_request(
+        "GET",
+        f"{STRAVA_API_BASE}/activities/{strava_id}/streams",
+        priority=Priority.BACKFILL,
+        headers={"Authorization": f"Bearer {token}"},
+        params={"keys": ",".join(STREAM_KEYS), "key_by_type": "true"}
+    )
+    if response.status_code == 404:
+        return {}
+    response.raise_for_status()
+
+    return {key: stream.get("data", []) for key, stream in response.json().items()}
+
+
+async def ingest_missing_streams(db: Session, user: User, limit: int = 200) -> Dict:
+    """
+    Fetch and store streams for the user's most recent workouts that don't
+    have any yet. Workouts without streams get an empty row so they aren't
+    requested again.
+    """
+    pending = db.execute(
+        select(Workout.id, Workout.strava_id, Workout.type)
+        .outerjoin(WorkoutStream, WorkoutStream.workout_id == Workout.id)
+        .where(Workout.user_id == user.id, Workout.strava_id.isnot(None), WorkoutStream.workout_id.is_(None))
+        .order_by(Workout.start_date.desc())
+        .limit(limit)
+    ).all()
+
+    if not pending:
+        return {"fetched": 0, "more_pending": False}
+
+    token = await get_valid_token(user, db)
+    semaphore = asyncio.Semaphore(STREAM_FETCH_CONCURRENCY)
+
+    async def fetch(workout_id: int, strava_id: int, workout_type: str):
+        async with semaphore:
+            return workout_id, workout_type, await fetch_streams(token, strava_id)
+
+    tasks = [asyncio.ensure_future(fetch(*workout)) for workout in pending]
+    try:
+        # Store each workout's streams as soon as they arrive instead of holding them all
+        for next_done in asyncio.as_completed(tasks):
+            workout_id, workout_type, streams = await next_done
+            store_workout_streams(db, user.id, workout_id, workout_type, streams)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return {"fetched": len(pending), "more_pending": len(pending) == limit}
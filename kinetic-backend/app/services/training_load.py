@@ -0,0 +1,169 @@
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional, Tuple
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.models.training_load import DailyTrainingLoad
+from app.models.workout import Workout
+from app.services.locks import TRAINING_LOAD_LOCK, lock_user_rows
+from app.services.workout_arrays import WorkoutArrays, load_workout_arrays
+
+# Time constants (days) of the chronic ("fitness") and acute ("fatigue") loads
+CTL_DAYS = 42
+ATL_DAYS = 7
+
+# Heart rate bounds for TRIMP; kinetic doesn't ask athletes for theirs
+RESTING_HR = 60
+MAX_HR = 190
+
+# Heart rate reserve fraction assumed when a workout has neither heart rate nor
+# suffer score, so duration-only workouts are still scored on the TRIMP scale
+SPORT_INTENSITY = {
+    "Run": 0.7,
+    "Ride": 0.65,
+    "Swim": 0.65,
+    "Walk": 0.4,
+    "Hike": 0.5,
+}
+DEFAULT_INTENSITY = 0.6
+
+LOAD_COLUMNS = ["type", "start_date", "moving_time", "average_heartrate", "suffer_score"]
+
+
+def _trimp(minutes: np.ndarray, reserve: np.ndarray) -> np.ndarray:
+    """Banister TRIMP: minutes x heart rate reserve fraction x 0.64 e^(1.92 x reserve)"""
+    return minutes * reserve * 0.64 * np.exp(1.92 * reserve)
+
+
+def workout_loads(workouts: WorkoutArrays) -> np.ndarray:
+    """
+    Load score per workout: TRIMP from average heart rate, else Strava's
+    suffer score, else TRIMP at the sport's assumed intensity for the
+    workout's duration.
+    """
+    minutes = np.nan_to_num(workouts.moving_time) / 60
+    reserve = np.clip((workouts.average_heartrate - RESTING_HR) / (MAX_HR - RESTING_HR), 0, 1)
+    intensity = np.array([SPORT_INTENSITY.get(workout_type, DEFAULT_INTENSITY) for workout_type in workouts.type], dtype=np.float64)
+
+    loads = np.where(np.isnan(workouts.suffer_score), _trimp(minutes, intensity), workouts.suffer_score)
+    return np.where(np.isnan(reserve), loads, _trimp(minutes, reserve))
+
+
+def _advance(ctl: float, atl: float, load: float):
+    """One day of the model: returns (ctl, atl, tsb) after a day with `load`"""
+    tsb = ctl - atl
+    ctl += (load - ctl) * (1 - math.exp(-1 / CTL_DAYS))
+    atl += (load - atl) * (1 - math.exp(-1 / ATL_DAYS))
+    return ctl, atl, tsb
+
+
+def refresh_training_load(db: Session, user_id: int, since: Optional[datetime] = None) -> int:
+    """
+    Recompute the user's daily series from the day of `since` onwards,
+    seeded with the stored day before it, so adding or changing recent
+    workouts only replays the days after them. Without `since`, or when
+    nothing is stored before it, the series is rebuilt from the first
+    workout. Returns the number of days written.
+    """
+    # Held until the commit, so the seed day is read and the days after it rewritten as one
+    lock_user_rows(db, TRAINING_LOAD_LOCK, user_id)
+    previous = None
+    if since is not None:
+        previous = db.execute(
+            select(DailyTrainingLoad)
+            .where(DailyTrainingLoad.user_id == user_id, DailyTrainingLoad.date < since.date())
+            .order_by(DailyTrainingLoad.date.desc())
+            .limit(1)
+        ).scalar()
+
+    if previous is not None:
+        first = previous.date + timedelta(days=1)
+        ctl, atl = previous.ctl, previous.atl
+    else:
+        first = None
+        ctl, atl = 0.0, 0.0
+
+    conditions = [Workout.start_date >= datetime.combine(first, time.min)] if first else [Workout.start_date.isnot(None)]
+    workouts = load_workout_arrays(db, user_id, LOAD_COLUMNS, *conditions)
+
+    clear = delete(DailyTrainingLoad).where(DailyTrainingLoad.user_id == user_id)
+    if first is not None:
+        clear = clear.where(DailyTrainingLoad.date >= first)
+    db.execute(clear)
+
+    if not len(workouts):
+        db.commit()
+        return 0
+
+    days = workouts.start_date.astype("datetime64[D]")
+    start = np.datetime64(first, "D") if first is not None else days.min()
+    offsets = (days - start).astype(np.int64)
+    daily = np.bincount(offsets, weights=workout_loads(workouts), minlength=int(offsets.max()) + 1)
+
+    rows = []
+    start_date = start.astype(date)
+    for offset, load in enumerate(daily.tolist()):
+        ctl, atl, tsb = _advance(ctl, atl, load)
+        rows.append({
+            "user_id": user_id,
+            "date": start_date + timedelta(days=offset),
+            "load": load,
+            "ctl": ctl,
+            "atl": atl,
+            "tsb": tsb,
+        })
+    db.execute(DailyTrainingLoad.__table__.insert(), rows)
+    db.commit()
+    return len(rows)
+
+
+def rebuild_training_load(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute the series from scratch, for one user or everyone. Returns the number of days written."""
+    if user_id is not None:
+        return refresh_training_load(db, user_id)
+
+    user_ids = db.execute(select(Workout.user_id).distinct()).scalars().all()
+    return sum(refresh_training_load(db, user_id) for user_id in user_ids)
+
+
+def current_training_load(last_date: date, ctl: float, atl: float, tsb: float) -> Tuple[float, float, float]:
+    """Today's (ctl, atl, tsb) from the last stored day's, decayed over the days since, which carry no load"""
+    for _ in range((datetime.utcnow().date() - last_date).days):
+        ctl, atl, tsb = _advance(ctl, atl, 0.0)
+    return ctl, atl, tsb
+
+
+def get_training_load(db: Session, user_id: int, days: int = CTL_DAYS) -> Dict:
+    """
+    Today's fitness (ctl), fatigue (atl) and form (tsb), plus the daily series
+    for the last `days` days. Days after the last stored one carry no load, so
+    they are projected by decaying it rather than read.
+    """
+    stored = db.execute(
+        select(DailyTrainingLoad)
+        .where(DailyTrainingLoad.user_id == user_id)
+        .order_by(DailyTrainingLoad.date.desc())
+        .limit(days)
+    ).scalars().all()[::-1]
+
+    if not stored:
+        return {"ctl": 0, "atl": 0, "tsb": 0, "series": []}
+
+    series = [
+        {"date": day.date.isoformat(), "load": round(day.load, 1), "ctl": round(day.ctl, 1), "atl": round(day.atl, 1), "tsb": round(day.tsb, 1)}
+        for day in stored
+    ]
+
+    last = stored[-1]
+    ctl, atl, tsb = last.ctl, last.atl, last.tsb
+    today = datetime.utcnow().date()
+    gap = (today - last.date).days
+    # Only the days that end up in the window need a row; earlier ones just decay
+    for offset in range(1, gap + 1):
+        ctl, atl, tsb = _advance(ctl, atl, 0.0)
+        if gap - offset < days:
+            day = last.date + timedelta(days=offset)
+            series.append({"date": day.isoformat(), "load": 0.0, "ctl": round(ctl, 1), "atl": round(atl, 1), "tsb": round(tsb, 1)})
+
+    return {"ctl": round(ctl, 1), "atl": round(atl, 1), "tsb": round(tsb, 1), "series": series[-days:]}
@@ -0,0 +1,135 @@
+import asyncio
+import os
+from typing import Dict, List
+import httpx
+import redis
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.services.ingest import delete_workouts, ingest_activities
+from app.services.strava_sync import fetch_activity
+from app.services.strava_tokens import get_valid_token
+from app.worker import REDIS_URL
+
+# Events for one athlete are buffered for this long and ingested as one batch
+COALESCE_WINDOW_SECONDS = int(os.getenv("STRAVA_WEBHOOK_COALESCE_SECONDS", "10"))
+
+# Concurrent activity detail requests while flushing a batch
+FLUSH_FETCH_CONCURRENCY = 4
+
+# Id Strava returned when our push subscription was created; events carrying any other id are rejected
+STRAVA_WEBHOOK_SUBSCRIPTION_ID = os.getenv("STRAVA_WEBHOOK_SUBSCRIPTION_ID")
+
+redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+
+def is_our_subscription(subscription_id: int) -> bool:
+    """Whether an event was sent for the configured push subscription"""
+    return bool(STRAVA_WEBHOOK_SUBSCRIPTION_ID) and str(subscription_id) == STRAVA_WEBHOOK_SUBSCRIPTION_ID.strip()
+
+
+def _events_key(owner_id: int) -> str:
+    return f"strava:webhook:{owner_id}:events"
+
+
+def _scheduled_key(owner_id: int) -> str:
+    return f"strava:webhook:{owner_id}:scheduled"
+
+
+def _buffer_event(owner_id: int, activity_id: int, aspect_type: str):
+    key = _events_key(owner_id)
+    if aspect_type == "delete":
+        redis_client.hset(key, activity_id, aspect_type)
+    else:
+        redis_client.hsetnx(key, activity_id, aspect_type)
+
+
+def queue_activity_event(owner_id: int, activity_id: int, aspect_type: str) -> bool:
+    """
+    Buffer an activity event for its athlete. Events for the same activity
+    collapse into one entry: a delete always wins, otherwise the first
+    create/update is kept since the flush fetches the latest version anyway.
+    Returns True when the caller should schedule a flush for this athlete.
+    """
+    _buffer_event(owner_id, activity_id, aspect_type)
+
+    # Only the first event in a window schedules the flush
+    return bool(redis_client.set(
+        _scheduled_key(owner_id), 1, nx=True, ex=COALESCE_WINDOW_SECONDS * 6
+    ))
+
+
+def pop_activity_events(owner_id: int) -> Dict[int, str]:
+    """Atomically take every buffered event for an athlete"""
+    # Clear the schedule marker first so events arriving from here on open a new window
+    redis_client.delete(_scheduled_key(owner_id))
+
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hgetall(_events_key(owner_id))
+    pipe.delete(_events_key(owner_id))
+    events, _ = pipe.execute()
+
+    return {int(activity_id): aspect_type for activity_id, aspect_type in events.items()}
+
+
+def requeue_activity_events(owner_id: int, events: Dict[int, str]):
+    """Put events back after a failed flush so a retry picks them up"""
+    for activity_id, aspect_type in events.items():
+        _buffer_event(owner_id, activity_id, aspect_type)
+
+
+def deauthorize_athlete(db: Session, owner_id: int):
+    """Forget Strava tokens for an athlete who revoked access"""
+    user = db.query(User).filter(User.strava_athlete_id == owner_id).first()
+    if user:
+        user.strava_access_token = None
+        user.strava_refresh_token = None
+        user.strava_token_expires_at = None
+        db.commit()
+
+
+async def flush_activity_events(db: Session, owner_id: int) -> Dict:
+    """Ingest every buffered event for an athlete as a single batch"""
+    events = pop_activity_events(owner_id)
+    if not events:
+        return {"fetched": 0, "inserted": 0, "updated": 0, "deleted": 0}
+
+    user = db.query(User).filter(User.strava_athlete_id == owner_id).first()
+    if not user or not user.strava_access_token:
+        return {"fetched": 0, "inserted": 0, "updated": 0, "deleted": 0}
+
+    try:
+        return await _ingest_events(db, user, events)
+    except Exception:
+        requeue_activity_events(owner_id, events)
+        raise
+
+
+async def _ingest_events(db: Session, user: User, events: Dict[int, str]) -> Dict:
+    deleted_ids = [activity_id for activity_id, aspect in events.items() if aspect == "delete"]
+    changed_ids = [activity_id for activity_id, aspect in events.items() if aspect != "delete"]
+
+    activities: List[Dict] = []
+    if changed_ids:
+        token = await get_valid_token(user, db)
+        semaphore = asyncio.Semaphore(FLUSH_FETCH_CONCURRENCY)
+
+        async def fetch(activity_id: int):
+            async with semaphore:
+                try:
+                    activities.append(await fetch_activity(token, activity_id))
+                except httpx.HTTPStatusError as e:
+                    # Deleted or made private before we got to it
+                    if e.response.status_code != 404:
+                        raise
+
+        await asyncio.gather(*(fetch(activity_id) for activity_id in changed_ids))
+
+    result = ingest_activities(db, user.id, activities)
+    deleted = delete_workouts(db, user.id, deleted_ids)
+
+    return {
+        "fetched": len(activities),
+        "inserted": result["inserted"],
+        "updated": result["updated"],
+        "deleted": deleted,
+    }
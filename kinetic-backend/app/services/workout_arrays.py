@@ -0,0 +1,70 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.workout import Workout
+
+# NumPy dtype per workout column. Numeric columns are float64 even when integer in
+# the database, so a NULL can be held as NaN; a NULL start_date becomes NaT.
+ARRAY_DTYPES = {
+    "id": np.int64,
+    "type": object,
+    "name": object,
+    "start_date": "datetime64[us]",
+    "distance": np.float64,
+    "moving_time": np.float64,
+    "elapsed_time": np.float64,
+    "total_elevation_gain": np.float64,
+    "average_speed": np.float64,
+    "max_speed": np.float64,
+    "average_heartrate": np.float64,
+    "max_heartrate": np.float64,
+    "suffer_score": np.float64,
+}
+
+
+class WorkoutArrays:
+    """
+    A set of workouts held column-wise: one NumPy array per selected column,
+    all the same length, read as attributes (arrays.distance). Lets numeric
+    work over a user's history run vectorized instead of per ORM instance.
+    """
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise AttributeError(f"Column not loaded: {name}") from None
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def filter(self, mask: np.ndarray) -> "WorkoutArrays":
+        return WorkoutArrays({name: values[mask] for name, values in self.columns.items()})
+
+
+def load_workout_arrays(
+    db: Session,
+    user_id: int,
+    columns: Sequence[str],
+    *conditions,
+    order_by: Optional[List] = None,
+) -> WorkoutArrays:
+    """
+    Select only `columns` of a user's workouts with a Core query, skipping ORM
+    instances and the identity map, and return them as arrays.
+    """
+    stmt = select(*[getattr(Workout, column) for column in columns]).where(Workout.user_id == user_id, *conditions)
+    if order_by is not None:
+        stmt = stmt.order_by(*order_by)
+
+    rows = db.execute(stmt).all()
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return WorkoutArrays({
+        column: np.array(column_values, dtype=ARRAY_DTYPES[column])
+        for column, column_values in zip(columns, values)
+    })
@@ -0,0 +1,78 @@
+import csv
+import io
+import itertools
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Sequence
+from sqlalchemy import select
+from app.database.base import SessionLocal
+from app.models.workout import Workout
+
+# Export format -> media type
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows fetched from the server-side cursor, and encoded, per chunk
+EXPORT_BATCH_SIZE = 1000
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _encode_ndjson(columns: List[str], rows: Sequence) -> str:
+    return "".join(json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in rows)
+
+
+def _encode_csv(columns: List[str], rows: Sequence) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+_ENCODERS = {
+    "ndjson": _encode_ndjson,
+    "csv": _encode_csv,
+}
+
+
+def export_workouts(conditions: Sequence, columns: List[str], export_format: str, gzip: bool = False) -> Iterator[bytes]:
+    """
+    Yield a user's workouts matching `conditions`, oldest first, encoded as
+    NDJSON or CSV in chunks of EXPORT_BATCH_SIZE rows, gzip-compressed on the
+    fly when asked.
+
+    Rows come through a server-side cursor (yield_per), so only one chunk is
+    held in memory however long the history is. The generator opens its own
+    session: it runs while the response streams, after the request's session
+    has been closed.
+    """
+    encode = _ENCODERS[export_format]
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if gzip else None
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(*[getattr(Workout, column) for column in columns])
+            .where(*conditions)
+            .order_by(Workout.start_date, Workout.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+
+        chunks = (encode(columns, rows) for rows in result.partitions())
+        if export_format == "csv":
+            chunks = itertools.chain([_encode_csv([], [columns])], chunks)
+
+        for chunk in chunks:
+            data = chunk.encode()
+            yield compressor.compress(data) if compressor else data
+
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db.close()
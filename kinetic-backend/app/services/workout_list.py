@@ -0,0 +1,168 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+from app.models.rollup import WorkoutRollup
+from app.models.workout import Workout
+
+# Workout columns a listing can return; fields= picks a subset, id is always included.
+# Generated columns (the search vector) are internal.
+WORKOUT_FIELDS = [column.name for column in Workout.__table__.columns if column.computed is None]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(start_date: datetime, workout_id: int) -> str:
+    """Opaque cursor for the listing position after (start_date, id)"""
+    return base64.urlsafe_b64encode(f"{start_date.isoformat()}|{workout_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_date, workout_id = raw.split("|")
+        return datetime.fromisoformat(start_date), int(workout_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor") from None
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Columns named in a comma-separated fields= value, id first; all of them when empty"""
+    if not fields:
+        return list(WORKOUT_FIELDS)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(WORKOUT_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Expected some of: {', '.join(WORKOUT_FIELDS)}")
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
+def _is_midnight(moment: Optional[datetime]) -> bool:
+    return moment is None or moment == moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _estimated_count(db: Session, stmt) -> int:
+    """The planner's row estimate for `stmt`, read from EXPLAIN without running it"""
+    connection = db.connection()
+    compiled = stmt.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    result = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    return int((json.loads(result) if isinstance(result, str) else result)[0]["Plan"]["Plan Rows"])
+
+
+def count_workouts(
+    db: Session,
+    user_id: int,
+    types: Optional[Sequence[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    filtered_by_distance: bool = False,
+    conditions: Sequence = (),
+) -> Tuple[int, bool]:
+    """
+    Number of workouts a listing covers, as (count, exact). Summed from the
+    rollups when they can answer exactly (no distance filter, dates on day
+    boundaries), otherwise the planner's estimate for the filtered listing,
+    so the count never costs a scan of the user's history.
+    """
+    if not filtered_by_distance and _is_midnight(start) and _is_midnight(end):
+        period = "month" if start is None and end is None else "day"
+        rollup_conditions = [WorkoutRollup.user_id == user_id, WorkoutRollup.period == period]
+        if types:
+            rollup_conditions.append(WorkoutRollup.type.in_(types))
+        if start is not None:
+            rollup_conditions.append(WorkoutRollup.period_start >= start)
+        if end is not None:
+            rollup_conditions.append(WorkoutRollup.period_start < end)
+        total = db.execute(select(func.coalesce(func.sum(WorkoutRollup.count), 0)).where(*rollup_conditions)).scalar()
+        return int(total), True
+
+    return _estimated_count(db, select(Workout.id).where(*conditions)), False
+
+
+def listing_conditions(
+    user_id: int,
+    types: Optional[Sequence[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    min_distance: Optional[float] = None,
+    max_distance: Optional[float] = None,
+) -> List:
+    """WHERE conditions selecting the workouts a filtered listing covers"""
+    conditions = [Workout.user_id == user_id, Workout.start_date.isnot(None)]
+    if types:
+        conditions.append(Workout.type.in_(types))
+    if start is not None:
+        conditions.append(Workout.start_date >= start)
+    if end is not None:
+        conditions.append(Workout.start_date < end)
+    if min_distance is not None:
+        conditions.append(Workout.distance >= min_distance)
+    if max_distance is not None:
+        conditions.append(Workout.distance <= max_distance)
+    return conditions
+
+
+def page_query(conditions: Sequence, columns: Sequence[str], position: Optional[Tuple[datetime, int]], limit: int):
+    """
+    Up to `limit` workouts matching `conditions` after the (start_date, id)
+    `position`, newest first. The row comparison and order match
+    ix_workouts_user_start_date_id, so a page is one backward index range
+    read however deep into the history it starts.
+    """
+    selected = [getattr(Workout, column) for column in columns]
+    if "start_date" not in columns:
+        selected.append(Workout.start_date)
+    stmt = select(*selected).where(*conditions)
+    if position is not None:
+        stmt = stmt.where(tuple_(Workout.start_date, Workout.id) < position)
+    return stmt.order_by(Workout.start_date.desc(), Workout.id.desc()).limit(limit)
+
+
+def list_workouts(
+    db: Session,
+    user_id: int,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    types: Optional[Sequence[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    min_distance: Optional[float] = None,
+    max_distance: Optional[float] = None,
+    fields: Optional[str] = None,
+) -> Dict:
+    """
+    One page of a user's workouts, newest first, with only the requested
+    columns. Pages are keyed on (start_date, id) rather than an offset: the
+    cursor is the last row of the previous page, so database time and
+    response size follow the page size, not the history size. Workouts
+    without a start date have no place in that order and are left out, as
+    they are from analytics.
+    """
+    columns = parse_fields(fields)
+    position = decode_cursor(cursor) if cursor else None
+    conditions = listing_conditions(user_id, types, start, end, min_distance, max_distance)
+
+    # One extra row tells whether there is a next page
+    rows = db.execute(page_query(conditions, columns, position, limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].start_date, rows[-1].id)
+
+    total, total_exact = count_workouts(
+        db, user_id, types, start, end,
+        filtered_by_distance=min_distance is not None or max_distance is not None,
+        conditions=conditions,
+    )
+
+    return {
+        "workouts": [{column: row._mapping[column] for column in columns} for row in rows],
+        "next_cursor": next_cursor,
+        "total": total,
+        "total_exact": total_exact,
+    }
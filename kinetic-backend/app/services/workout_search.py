@@ -0,0 +1,85 @@
+import re
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+from app.models.workout import SEARCH_CONFIG, Workout
+from app.services.workout_list import listing_conditions, parse_fields
+
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+
+# Deepest offset a search page may start at. Every page ranks all of the
+# user's matches before skipping to it, so deep pages cost more; nobody reads
+# past the first few pages of search results.
+MAX_SEARCH_OFFSET = 200
+
+
+def search_query(text: str, conditions: Sequence, columns: Sequence[str]):
+    """
+    Workouts matching `conditions` whose name shares a word with `text`, or
+    is a close trigram match for it (typos, partial words), best first.
+
+    Words match through Workout.search_vector, any word being enough, and
+    the trigram match through name. Both GIN indexes lead with user_id, so
+    only the user's own workouts are searched. The rank
+    adds the full-text cover density, which grows with the number and
+    proximity of matched words, to the name's trigram word similarity.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        raise ValueError("Search text must contain at least one word")
+
+    # websearch_to_tsquery ORs the words and ignores stray operators or punctuation
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, " or ".join(words))
+    phrase = " ".join(words)
+    rank = (func.ts_rank_cd(Workout.search_vector, query) + func.word_similarity(phrase, Workout.name)).label("rank")
+
+    return (
+        select(*[getattr(Workout, column) for column in columns], rank)
+        .where(*conditions, or_(Workout.search_vector.op("@@")(query), Workout.name.op("%>")(phrase)))
+        .order_by(rank.desc(), Workout.start_date.desc(), Workout.id.desc())
+    )
+
+
+def search_workouts(
+    db: Session,
+    user_id: int,
+    text: str,
+    limit: int = DEFAULT_SEARCH_PAGE_SIZE,
+    offset: int = 0,
+    types: Optional[Sequence[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    fields: Optional[str] = None,
+) -> Dict:
+    """
+    One page of a user's workouts matching `text`, ranked, with only the
+    requested columns plus each result's rank. Narrow with the listing's
+    type and date filters ("hill repeats" from=2025-03-01 to=2025-04-01).
+
+    Pages are by offset, not keyset like the listing: rank isn't indexed, so
+    every page sorts the user's whole match set whatever its position, and a
+    cursor would save nothing. Offsets stop at MAX_SEARCH_OFFSET.
+    """
+    if offset > MAX_SEARCH_OFFSET:
+        raise ValueError(f"offset must be at most {MAX_SEARCH_OFFSET}; narrow the search instead")
+    columns = parse_fields(fields)
+    conditions = listing_conditions(user_id, types, start, end)
+
+    # One extra row tells whether there is a next page
+    rows = db.execute(search_query(text, conditions, columns).limit(limit + 1).offset(offset)).all()
+
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if offset + limit <= MAX_SEARCH_OFFSET:
+            next_offset = offset + limit
+
+    return {
+        "results": [
+            {**{column: row._mapping[column] for column in columns}, "rank": round(row.rank, 4)}
+            for row in rows
+        ],
+        "next_offset": next_offset,
+    }
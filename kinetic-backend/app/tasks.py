@@ -0,0 +1,126 @@
+import asyncio
+import contextlib
+import os
+from typing import Dict, Optional
+from app.database.base import SessionLocal
+from app.models.user import User
+from celery.signals import worker_process_shutdown
+from app.services.bulk_import import import_export
+from app.services.strava_client import close_client, open_client
+from app.services.streams import ingest_missing_streams
+from app.services.strava_sync import run_sync
+from app.services.strava_tokens import refresh_expiring_tokens
+from app.services.webhooks import COALESCE_WINDOW_SECONDS, flush_activity_events
+from app.worker import celery_app
+
+
+# Each worker process keeps one event loop alive across tasks so the pooled
+# Strava client (and its keep-alive connections) survives between jobs
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_async(coro):
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+        _loop.run_until_complete(open_client())
+    return _loop.run_until_complete(coro)
+
+
+@worker_process_shutdown.connect
+def _close_strava_client(**kwargs):
+    if _loop is not None:
+        _loop.run_until_complete(close_client())
+        _loop.close()
+
+
+@celery_app.task(bind=True, name="strava.sync_user_workouts")
+def sync_user_workouts(self, user_id: int, after: Optional[int] = None, full: bool = False) -> Dict:
+    """Sync a user's Strava activities, reporting running totals as job progress"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+        if not user.strava_access_token:
+            raise ValueError(f"User {user_id} has not connected Strava")
+
+        def report(totals: Dict):
+            self.update_state(state="PROGRESS", meta=totals)
+
+        result = run_async(run_sync(db, user, after=after, full=full, progress=report))
+
+        if result["new_activities"]:
+            sync_workout_streams.delay(user_id)
+
+        return result
+    finally:
+        db.close()
+
+
+@celery_app.task(
+    bind=True,
+    name="strava.flush_webhook_events",
+    max_retries=5,
+    default_retry_delay=COALESCE_WINDOW_SECONDS,
+)
+def flush_webhook_events(self, owner_id: int) -> Dict:
+    """Ingest an athlete's coalesced webhook events in one batch"""
+    db = SessionLocal()
+    try:
+        return run_async(flush_activity_events(db, owner_id))
+    except Exception as e:
+        # Events were put back in the buffer; the retry picks them up
+        raise self.retry(exc=e)
+    finally:
+        db.close()
+
+
+@celery_app.task(name="strava.refresh_expiring_tokens")
+def refresh_expiring_strava_tokens() -> Dict:
+    """Renew Strava tokens shortly before they expire"""
+    db = SessionLocal()
+    try:
+        return run_async(refresh_expiring_tokens(db))
+    finally:
+        db.close()
+
+
+@celery_app.task(name="strava.sync_workout_streams")
+def sync_workout_streams(user_id: int, batch_size: int = 200) -> Dict:
+    """Backfill activity streams for a user's workouts, one batch per task run"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user or not user.strava_access_token:
+            return {"fetched": 0, "more_pending": False}
+
+        result = run_async(ingest_missing_streams(db, user, limit=batch_size))
+
+        # Keep going in separate runs so other jobs can interleave
+        if result["more_pending"]:
+            sync_workout_streams.delay(user_id, batch_size)
+
+        return result
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, name="strava.import_export")
+def import_strava_export(self, user_id: int, zip_path: str, include_streams: bool = False) -> Dict:
+    """Import a spooled Strava bulk export, reporting running totals as job progress"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+
+        def report(totals: Dict):
+            self.update_state(state="PROGRESS", meta=totals)
+
+        return import_export(db, user, zip_path, include_streams=include_streams, progress=report)
+    finally:
+        db.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(zip_path)
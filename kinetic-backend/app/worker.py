@@ -0,0 +1,34 @@
+import os
+from celery import Celery
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Run workers separately from the API, e.g.
+#   celery -A app.worker worker --loglevel=info
+#   celery -A app.worker beat --loglevel=info
+celery_app = Celery(
+    "kinetic",
+    broker=REDIS_URL,
+    backend=REDIS_URL,
+    include=["app.tasks"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    # Re-deliver a sync if a worker dies mid-job; syncs are idempotent upserts
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    result_expires=60 * 60 * 24,
+    beat_schedule={
+        "refresh-expiring-strava-tokens": {
+            "task": "strava.refresh_expiring_tokens",
+            "schedule": 5 * 60.0,
+        },
+    },
+)
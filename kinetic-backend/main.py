@@ -1,17 +1,34 @@
 from sys import prefix
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from app.database.base import engine, Base
 from app.models.user import User
 from app.models.workout import Workout
+from app.models.stream import WorkoutStream
+from app.models.best_effort import BestEffort
+from app.models.rollup import WorkoutRollup
+from app.models.personal_record import PersonalRecord
+from app.models.training_load import DailyTrainingLoad
 from app.models.chat import ChatMessage, DailyUsage
 from app.models.program import TrainingProgram, ProgramWeek, ProgramWorkout
 from app.routes import strava, workouts, chat, analytics, programs, sport_analytics, auth
+from app.services import strava_client
 
 #Create all tables in the database
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Kinetic API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled Strava client per process, reused across requests
+    await strava_client.open_client()
+    yield
+    await strava_client.close_client()
+
+# orjson encodes responses several times faster than the stdlib json encoder
+app = FastAPI(title="Kinetic API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +38,10 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# Compress bodies over 1KB for clients that accept gzip; level 5 keeps most of
+# the size reduction of level 9 for a fraction of the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=5)
+
 app.include_router(strava.router)
 app.include_router(workouts.router, prefix="/api", tags=["workouts"])
 app.include_router(chat.router)
@@ -0,0 +1,198 @@
+"""
+Benchmark Strava sync against the local fake Strava server.
+
+Creates synthetic users connected to fake athletes, queues a full history
+sync for all of them at once and drains the queue with a pool of worker
+processes, the way Celery workers would. Reports sync throughput, time spent
+writing to the database, page fetch latency and per-user latency
+percentiles, then removes the synthetic users again.
+
+    python scripts/fake_strava.py --activities 800 --latency-ms 60 --jitter-ms 40 &
+    python scripts/bench_sync.py --users 1 100 1000 --workers 8
+
+Uses DATABASE_URL like the app does, so point it at a scratch database.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Synthetic users map to fake athletes from this id upwards
+ATHLETE_ID_BASE = 900_000_000
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def create_users(count: int) -> List[int]:
+    from app.database.base import SessionLocal
+    from app.models.user import User
+
+    db = SessionLocal()
+    try:
+        users = []
+        for i in range(count):
+            athlete_id = ATHLETE_ID_BASE + i
+            users.append(User(
+                email=f"bench-{athlete_id}@fake.local",
+                first_name="Bench",
+                last_name=str(i),
+                strava_athlete_id=athlete_id,
+                strava_access_token=f"fake-{athlete_id}-bench",
+                strava_refresh_token=f"fake-{athlete_id}-refresh",
+                strava_token_expires_at=datetime.now() + timedelta(hours=6),
+            ))
+        db.add_all(users)
+        db.commit()
+        return [user.id for user in users]
+    finally:
+        db.close()
+
+
+def delete_users():
+    """Remove every synthetic user and their workouts"""
+    from sqlalchemy import delete, select
+    from app.database.base import SessionLocal
+    from app.models.best_effort import BestEffort
+    from app.models.user import User
+    from app.models.workout import Workout
+
+    db = SessionLocal()
+    try:
+        user_ids = select(User.id).where(User.strava_athlete_id >= ATHLETE_ID_BASE).scalar_subquery()
+        db.execute(delete(BestEffort).where(BestEffort.user_id.in_(user_ids)))
+        db.execute(delete(Workout).where(Workout.user_id.in_(user_ids)))
+        db.execute(delete(User).where(User.strava_athlete_id >= ATHLETE_ID_BASE))
+        db.commit()
+    finally:
+        db.close()
+
+
+def init_worker():
+    # Connections inherited from the parent process must not be reused here
+    from app.database.base import engine
+    engine.dispose(close=False)
+
+
+def run_shard(user_ids: List[int], concurrency: int, full: bool, queued_at: float) -> Dict:
+    """Sync a worker's share of the users, `concurrency` at a time"""
+    from app.database.base import SessionLocal
+    from app.models.user import User
+    from app.services import strava_sync
+    from app.services.strava_client import client_session
+
+    stats = {"sync": [], "latency": [], "fetch": [], "write": [], "activities": 0, "errors": []}
+
+    ingest_activities = strava_sync.ingest_activities
+    fetch_activity_page = strava_sync.fetch_activity_page
+
+    def timed_ingest(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return ingest_activities(*args, **kwargs)
+        finally:
+            stats["write"].append(time.perf_counter() - started)
+
+    async def timed_fetch(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await fetch_activity_page(*args, **kwargs)
+        finally:
+            stats["fetch"].append(time.perf_counter() - started)
+
+    strava_sync.ingest_activities = timed_ingest
+    strava_sync.fetch_activity_page = timed_fetch
+
+    async def sync_one(user_id: int, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                user = db.query(User).filter(User.id == user_id).first()
+                result = await strava_sync.run_sync(db, user, full=full)
+                stats["activities"] += result["total_activities"]
+            except Exception as e:
+                stats["errors"].append(f"user {user_id}: {str(e)}")
+            finally:
+                db.close()
+            finished = time.perf_counter()
+            stats["sync"].append(finished - started)
+            stats["latency"].append(time.time() - queued_at)
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        async with client_session():
+            await asyncio.gather(*(sync_one(user_id, semaphore) for user_id in user_ids))
+
+    asyncio.run(run())
+    return stats
+
+
+def run_scenario(user_ids: List[int], workers: int, concurrency: int, full: bool) -> Dict:
+    shards = [user_ids[i::workers] for i in range(workers) if user_ids[i::workers]]
+    queued_at = time.time()
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=len(shards), initializer=init_worker) as pool:
+        results = list(pool.map(run_shard, shards, [concurrency] * len(shards), [full] * len(shards), [queued_at] * len(shards)))
+
+    totals = {"wall": time.perf_counter() - started, "sync": [], "latency": [], "fetch": [], "write": [], "activities": 0, "errors": []}
+    for stats in results:
+        for key in ("sync", "latency", "fetch", "write", "errors"):
+            totals[key].extend(stats[key])
+        totals["activities"] += stats["activities"]
+    return totals
+
+
+def report(label: str, users: int, totals: Dict):
+    wall = totals["wall"]
+    write = totals["write"]
+    print(f"\n{label}: {users} users, {totals['activities']} activities in {wall:.2f}s")
+    print(f"  throughput       {totals['activities'] / wall:10.1f} activities/s  {users / wall:8.2f} users/s")
+    print(f"  db writes        {sum(write):10.2f}s total over {len(write)} pages  "
+          f"p50 {percentile(write, 50) * 1000:.1f}ms  p99 {percentile(write, 99) * 1000:.1f}ms")
+    print(f"  page fetch       p50 {percentile(totals['fetch'], 50) * 1000:8.1f}ms  p99 {percentile(totals['fetch'], 99) * 1000:8.1f}ms")
+    print(f"  sync per user    p50 {percentile(totals['sync'], 50):8.2f}s   p99 {percentile(totals['sync'], 99):8.2f}s")
+    print(f"  queued to done   p50 {percentile(totals['latency'], 50):8.2f}s   p99 {percentile(totals['latency'], 99):8.2f}s")
+    if totals["errors"]:
+        print(f"  errors           {len(totals['errors'])}, first: {totals['errors'][0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fake-url", default="http://127.0.0.1:8090", help="Base URL of scripts/fake_strava.py")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 100, 1000], help="Concurrent users per scenario")
+    parser.add_argument("--workers", type=int, default=8, help="Worker processes, like Celery concurrency")
+    parser.add_argument("--concurrency", type=int, default=1, help="Users synced at once inside each worker")
+    parser.add_argument("--incremental", action="store_true", help="Also time a second, incremental sync of every user")
+    parser.add_argument("--keep", action="store_true", help="Leave the synthetic users and workouts in the database")
+    args = parser.parse_args()
+
+    # Must be set before the app's Strava modules are imported
+    os.environ["STRAVA_BASE_URL"] = args.fake_url
+
+    for users in args.users:
+        delete_users()
+        user_ids = create_users(users)
+
+        report("full sync", users, run_scenario(user_ids, args.workers, args.concurrency, full=True))
+        if args.incremental:
+            report("incremental sync", users, run_scenario(user_ids, args.workers, args.concurrency, full=False))
+
+        if not args.keep:
+            delete_users()
+
+
+if __name__ == "__main__":
+    main()
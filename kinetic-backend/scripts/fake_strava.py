@@ -0,0 +1,443 @@
+"""
+Local stand-in for the Strava API, for exercising sync without touching Strava.
+
+Serves synthetic athletes whose activity history is generated on demand from
+the athlete id, so any number of athletes can be synced without seeding
+anything. Covers the endpoints the backend uses: OAuth authorize / token /
+deauthorize, paginated /athlete/activities, single activities, streams and
+push subscriptions, with Strava-style rate limit headers. Latency, errors
+and rate limits can be injected to see how sync behaves under pressure.
+
+Point the backend at it with STRAVA_BASE_URL:
+    python scripts/fake_strava.py --port 8090 --activities 1500 --latency-ms 80
+    STRAVA_BASE_URL=http://localhost:8090 uvicorn main:app
+
+Access tokens look like "fake-<athlete_id>-<n>"; the authorization code is the
+athlete id, so POST /api/strava/auth/callback?code=42 connects athlete 42.
+New activities (and their webhook events) can be created with
+    curl -X POST localhost:8090/_fake/athletes/42/activities
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, RedirectResponse
+
+
+@dataclass
+class FakeConfig:
+    activities: int = 500  # history size per athlete
+    history_spread: float = 0.0  # +/- fraction applied to each athlete's history size
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0  # share of API requests answered with a 5xx
+    throttle_rate: float = 0.0  # share of API requests answered with a 429
+    short_limit: int = 100_000
+    daily_limit: int = 1_000_000
+    token_ttl: int = 6 * 3600
+
+
+config = FakeConfig()
+app = FastAPI(title="Fake Strava")
+
+SPORTS = [("Run", 0.55, 3.0), ("Ride", 0.3, 7.5), ("Swim", 0.1, 0.9), ("Walk", 0.05, 1.4)]
+
+# State layered on top of the generated histories: activities created through /_fake,
+# deauthorized athletes and push subscriptions
+_created: Dict[int, List[Dict]] = {}
+_deauthorized = set()
+_subscriptions: Dict[int, Dict] = {}
+
+_usage = {"short": 0, "daily": 0, "short_window": None, "day": None}
+
+
+def history_size(athlete_id: int) -> int:
+    if not config.history_spread:
+        return config.activities
+    rng = random.Random(athlete_id)
+    return max(0, round(config.activities * (1 + rng.uniform(-config.history_spread, config.history_spread))))
+
+
+def activity_id(athlete_id: int, index: int) -> int:
+    return athlete_id * 1_000_000 + index
+
+
+def build_activity(athlete_id: int, index: int, start: datetime) -> Dict:
+    """One deterministic activity summary, shaped like Strava's SummaryActivity"""
+    rng = random.Random(activity_id(athlete_id, index))
+    roll = rng.random()
+    for sport, weight, speed in SPORTS:
+        roll -= weight
+        if roll <= 0:
+            break
+
+    moving_time = rng.randint(15 * 60, 150 * 60)
+    average_speed = speed * rng.uniform(0.8, 1.2)
+    has_heartrate = rng.random() < 0.8
+    return {
+        "id": activity_id(athlete_id, index),
+        "athlete": {"id": athlete_id},
+        "name": f"{sport} #{index + 1}",
+        "type": sport,
+        "sport_type": sport,
+        "start_date": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "distance": round(moving_time * average_speed, 1),
+        "moving_time": moving_time,
+        "elapsed_time": moving_time + rng.randint(0, 600),
+        "total_elevation_gain": round(rng.uniform(0, 800) if sport != "Swim" else 0, 1),
+        "average_speed": round(average_speed, 3),
+        "max_speed": round(average_speed * rng.uniform(1.2, 1.8), 3),
+        "average_heartrate": round(rng.uniform(120, 165), 1) if has_heartrate else None,
+        "max_heartrate": round(rng.uniform(165, 195), 1) if has_heartrate else None,
+        "suffer_score": rng.randint(5, 250) if has_heartrate else None,
+        "manual": False,
+    }
+
+
+@lru_cache(maxsize=4096)
+def generated_history(athlete_id: int) -> tuple:
+    """The athlete's generated history, oldest first, one activity every ~1.3 days up to today"""
+    count = history_size(athlete_id)
+    now = datetime.now(timezone.utc).replace(hour=7, minute=0, second=0, microsecond=0)
+    rng = random.Random(athlete_id)
+    activities = []
+    for index in range(count):
+        days_ago = (count - index) * 1.3
+        start = now - timedelta(days=days_ago, minutes=rng.randint(0, 600))
+        activities.append(build_activity(athlete_id, index, start))
+    return tuple(activities)
+
+
+def start_timestamp(activity: Dict) -> float:
+    return datetime.strptime(activity["start_date"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+
+
+@lru_cache(maxsize=4096)
+def generated_timestamps(athlete_id: int) -> tuple:
+    return tuple(start_timestamp(activity) for activity in generated_history(athlete_id))
+
+
+def athlete_activities(athlete_id: int) -> List[tuple]:
+    """(start timestamp, activity) pairs for everything the athlete has recorded"""
+    created = _created.get(athlete_id, [])
+    return (
+        list(zip(generated_timestamps(athlete_id), generated_history(athlete_id)))
+        + [(start_timestamp(activity), activity) for activity in created]
+    )
+
+
+def find_activity(athlete_id: int, strava_id: int) -> Optional[Dict]:
+    index = strava_id - activity_id(athlete_id, 0)
+    history = generated_history(athlete_id)
+    if 0 <= index < len(history):
+        return history[index]
+    return next((a for a in _created.get(athlete_id, []) if a["id"] == strava_id), None)
+
+
+def athlete_from_request(request: Request) -> int:
+    """Resolve the athlete from a "Bearer fake-<athlete_id>-<n>" token"""
+    header = request.headers.get("Authorization", "")
+    try:
+        _, athlete, _ = header.removeprefix("Bearer ").split("-")
+        athlete_id = int(athlete)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Authorization Error")
+    if athlete_id in _deauthorized:
+        raise HTTPException(status_code=401, detail="Authorization Error")
+    return athlete_id
+
+
+def token_payload(athlete_id: int) -> Dict:
+    issued = int(time.time())
+    return {
+        "token_type": "Bearer",
+        "access_token": f"fake-{athlete_id}-{issued}",
+        "refresh_token": f"fake-{athlete_id}-refresh",
+        "expires_at": issued + config.token_ttl,
+        "expires_in": config.token_ttl,
+    }
+
+
+def athlete_profile(athlete_id: int) -> Dict:
+    return {
+        "id": athlete_id,
+        "firstname": "Fake",
+        "lastname": f"Athlete {athlete_id}",
+        "profile": None,
+    }
+
+
+async def form_fields(request: Request) -> Dict[str, str]:
+    """Urlencoded form body, without depending on python-multipart"""
+    return dict(parse_qsl((await request.body()).decode()))
+
+
+def rate_limit_headers() -> Dict[str, str]:
+    return {
+        "X-RateLimit-Limit": f"{config.short_limit},{config.daily_limit}",
+        "X-RateLimit-Usage": f"{_usage['short']},{_usage['daily']}",
+    }
+
+
+@app.middleware("http")
+async def strava_behaviour(request: Request, call_next):
+    """Latency, rate limit accounting and injected failures for API calls"""
+    if request.url.path.startswith("/_fake"):
+        return await call_next(request)
+
+    if config.latency_ms or config.jitter_ms:
+        delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+        await asyncio.sleep(max(0.0, delay) / 1000)
+
+    now = datetime.now(timezone.utc)
+    window = (now.date(), now.hour, now.minute // 15)
+    if _usage["short_window"] != window:
+        _usage.update(short=0, short_window=window)
+    if _usage["day"] != now.date():
+        _usage.update(daily=0, day=now.date())
+    _usage["short"] += 1
+    _usage["daily"] += 1
+
+    if (
+        _usage["short"] > config.short_limit
+        or _usage["daily"] > config.daily_limit
+        or random.random() < config.throttle_rate
+    ):
+        return JSONResponse({"message": "Rate Limit Exceeded"}, status_code=429, headers=rate_limit_headers())
+
+    if random.random() < config.error_rate:
+        return JSONResponse({"message": "Injected error"}, status_code=random.choice([500, 502, 503]))
+
+    response = await call_next(request)
+    response.headers.update(rate_limit_headers())
+    return response
+
+
+@app.get("/oauth/authorize")
+async def authorize(redirect_uri: str, state: Optional[str] = None, athlete_id: int = 1):
+    """Skip the consent screen and send the athlete id back as the code"""
+    location = f"{redirect_uri}?code={athlete_id}&scope=read,activity:read_all"
+    if state:
+        location += f"&state={state}"
+    return RedirectResponse(location)
+
+
+@app.post("/oauth/token")
+async def token(request: Request):
+    form = await form_fields(request)
+    grant_type, code, refresh_token = form.get("grant_type"), form.get("code"), form.get("refresh_token")
+    if grant_type == "authorization_code":
+        try:
+            athlete_id = int(code)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Bad Request: invalid code")
+        _deauthorized.discard(athlete_id)
+        return {**token_payload(athlete_id), "athlete": athlete_profile(athlete_id)}
+
+    if grant_type == "refresh_token":
+        try:
+            _, athlete, _ = (refresh_token or "").split("-")
+            athlete_id = int(athlete)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Bad Request: invalid refresh_token")
+        if athlete_id in _deauthorized:
+            raise HTTPException(status_code=400, detail="Bad Request: deauthorized")
+        return token_payload(athlete_id)
+
+    raise HTTPException(status_code=400, detail="Bad Request: unsupported grant_type")
+
+
+@app.post("/oauth/deauthorize")
+async def deauthorize(request: Request):
+    form = await form_fields(request)
+    try:
+        _, athlete, _ = str(form.get("access_token", "")).split("-")
+        athlete_id = int(athlete)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Authorization Error")
+    _deauthorized.add(athlete_id)
+    await push_event(athlete_id, "athlete", athlete_id, "update", {"authorized": "false"})
+    return {"access_token": form.get("access_token")}
+
+
+@app.get("/api/v3/athlete")
+async def get_athlete(request: Request):
+    return athlete_profile(athlete_from_request(request))
+
+
+@app.get("/api/v3/athlete/activities")
+async def list_activities(
+    request: Request,
+    page: int = 1,
+    per_page: int = 30,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+):
+    athlete_id = athlete_from_request(request)
+    per_page = max(1, min(per_page, 200))
+
+    selected = [
+        activity for ts, activity in athlete_activities(athlete_id)
+        if (after is None or ts > after) and (before is None or ts < before)
+    ]
+    # Like Strava: newest first, except oldest first when paging forward from `after`
+    selected.sort(key=lambda a: a["start_date"], reverse=after is None)
+
+    start = (max(page, 1) - 1) * per_page
+    return selected[start:start + per_page]
+
+
+@app.get("/api/v3/activities/{strava_id}")
+async def get_activity(strava_id: int, request: Request):
+    activity = find_activity(athlete_from_request(request), strava_id)
+    if activity is None:
+        raise HTTPException(status_code=404, detail="Record Not Found")
+    return activity
+
+
+@app.get("/api/v3/activities/{strava_id}/streams")
+async def get_streams(strava_id: int, request: Request, keys: str = "time,distance"):
+    activity = find_activity(athlete_from_request(request), strava_id)
+    if activity is None:
+        raise HTTPException(status_code=404, detail="Record Not Found")
+
+    rng = random.Random(strava_id)
+    samples = max(2, activity["elapsed_time"])
+    speed = activity["average_speed"]
+    time_data, distance_data, altitude_data = [], [], []
+    distance = 0.0
+    for second in range(samples):
+        distance += max(0.0, speed * (1 + 0.15 * math.sin(second / 90) + rng.uniform(-0.05, 0.05)))
+        time_data.append(second)
+        distance_data.append(round(distance, 1))
+        altitude_data.append(round(100 + 30 * math.sin(second / 600), 1))
+
+    streams = {
+        "time": time_data,
+        "distance": distance_data,
+        "altitude": altitude_data,
+        "latlng": [[52.0 + d / 111_000, 4.0] for d in distance_data],
+        "cadence": [rng.randint(80, 95) for _ in range(samples)],
+    }
+    if activity["average_heartrate"] is not None:
+        streams["heartrate"] = [round(activity["average_heartrate"] + rng.uniform(-10, 10)) for _ in range(samples)]
+
+    requested = set(keys.split(","))
+    return {
+        key: {"data": data, "series_type": "time", "original_size": samples, "resolution": "high"}
+        for key, data in streams.items()
+        if key in requested or key == "time"
+    }
+
+
+@app.post("/api/v3/push_subscriptions")
+async def create_subscription(request: Request):
+    """Validate the callback with Strava's hub.challenge handshake, then start pushing events to it"""
+    form = await form_fields(request)
+    callback_url, verify_token = form.get("callback_url"), form.get("verify_token", "")
+    if not callback_url:
+        raise HTTPException(status_code=400, detail="callback_url is required")
+    async with httpx.AsyncClient(timeout=5) as client:
+        response = await client.get(callback_url, params={
+            "hub.mode": "subscribe",
+            "hub.challenge": "fake-challenge",
+            "hub.verify_token": verify_token,
+        })
+    if response.status_code != 200 or response.json().get("hub.challenge") != "fake-challenge":
+        raise HTTPException(status_code=400, detail="callback url not verifiable")
+
+    subscription_id = len(_subscriptions) + 1
+    _subscriptions[subscription_id] = {"id": subscription_id, "callback_url": callback_url}
+    return {"id": subscription_id}
+
+
+@app.get("/api/v3/push_subscriptions")
+async def list_subscriptions():
+    return list(_subscriptions.values())
+
+
+@app.delete("/api/v3/push_subscriptions/{subscription_id}", status_code=204)
+async def delete_subscription(subscription_id: int):
+    _subscriptions.pop(subscription_id, None)
+
+
+async def push_event(owner_id: int, object_type: str, object_id: int, aspect_type: str, updates: Optional[Dict] = None):
+    for subscription in list(_subscriptions.values()):
+        event = {
+            "object_type": object_type,
+            "object_id": object_id,
+            "aspect_type": aspect_type,
+            "owner_id": owner_id,
+            "subscription_id": subscription["id"],
+            "event_time": int(time.time()),
+            "updates": updates or {},
+        }
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                await client.post(subscription["callback_url"], json=event)
+        except httpx.HTTPError as e:
+            print(f"Webhook delivery to {subscription['callback_url']} failed: {str(e)}")
+
+
+@app.post("/_fake/athletes/{athlete_id}/activities")
+async def create_activity(athlete_id: int):
+    """Record a new activity for the athlete and push its create event"""
+    created = _created.setdefault(athlete_id, [])
+    index = history_size(athlete_id) + len(created)
+    activity = build_activity(athlete_id, index, datetime.now(timezone.utc))
+    created.append(activity)
+    await push_event(athlete_id, "activity", activity["id"], "create")
+    return activity
+
+
+@app.get("/_fake/config")
+async def get_config():
+    return {**config.__dict__, "usage": {"short": _usage["short"], "daily": _usage["daily"]}}
+
+
+@app.patch("/_fake/config")
+async def update_config(changes: Dict):
+    """Change latency, errors or limits while the server is running"""
+    for key, value in changes.items():
+        if not hasattr(config, key):
+            raise HTTPException(status_code=400, detail=f"Unknown setting: {key}")
+        setattr(config, key, type(getattr(config, key))(value))
+    if "activities" in changes or "history_spread" in changes:
+        generated_history.cache_clear()
+        generated_timestamps.cache_clear()
+    return config.__dict__
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--activities", type=int, default=config.activities, help="Activities per athlete")
+    parser.add_argument("--history-spread", type=float, default=config.history_spread,
+                        help="Vary each athlete's history size by up to this fraction")
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    parser.add_argument("--throttle-rate", type=float, default=config.throttle_rate)
+    parser.add_argument("--short-limit", type=int, default=config.short_limit, help="Requests per 15 minutes")
+    parser.add_argument("--daily-limit", type=int, default=config.daily_limit)
+    parser.add_argument("--token-ttl", type=int, default=config.token_ttl, help="Access token lifetime in seconds")
+    args = parser.parse_args()
+
+    for key in config.__dict__:
+        setattr(config, key, getattr(args, key))
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Maintenance commands for derived tables.
+
+Examples:
+    python scripts/manage.py rebuild-rollups
+    python scripts/manage.py rebuild-rollups --user 42
+    python scripts/manage.py rebuild-records --user 42
+    python scripts/manage.py rebuild-training-load
+    python scripts/manage.py check-plans --user 42
+
+Uses DATABASE_URL like the app does.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rebuild_rollups(args):
+    from app.database.base import SessionLocal
+    from app.services.rollups import rebuild_rollups
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        buckets = rebuild_rollups(db, args.user)
+        scope = f"user {args.user}" if args.user is not None else "all users"
+        print(f"Rebuilt {buckets} rollup buckets for {scope} in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+
+
+def rebuild_records(args):
+    from app.database.base import SessionLocal
+    from app.services.personal_records import rebuild_personal_records
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        entries = rebuild_personal_records(db, args.user)
+        scope = f"user {args.user}" if args.user is not None else "all users"
+        print(f"Rebuilt {entries} personal record entries for {scope} in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+
+
+def rebuild_training_load(args):
+    from app.database.base import SessionLocal
+    from app.services.training_load import rebuild_training_load
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        days = rebuild_training_load(db, args.user)
+        scope = f"user {args.user}" if args.user is not None else "all users"
+        print(f"Rebuilt {days} training load days for {scope} in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+
+
+def _index_scans(plan: dict) -> list:
+    """(node type, index name) of every index scan in an EXPLAIN (FORMAT JSON) plan tree"""
+    scans = []
+    if "Index Name" in plan:
+        scans.append((plan["Node Type"], plan["Index Name"]))
+    for child in plan.get("Plans", []):
+        scans.extend(_index_scans(child))
+    return scans
+
+
+def check_plans(args):
+    """
+    EXPLAIN the analytics range and workout listing queries and fail unless
+    they are served by the expected index. Sequential scans are disabled for
+    the check, so it still asserts index usability on a small development
+    database where the planner would rightly prefer reading the whole table.
+    tests/test_query_plans.py makes the same assertions under pytest.
+    """
+    from app.database.base import SessionLocal
+    from app.services.analytics import range_query
+    from app.services.workout_list import listing_conditions, page_query
+
+    end = datetime.utcnow()
+    start = end - timedelta(weeks=12)
+    by_type = "ix_workouts_user_type_start_date"
+    by_date = "ix_workouts_user_start_date_id"
+    # Label -> (query, indexes that serve it). Without a single sport to pin the
+    # type column, a user and date range is read as well from either index.
+    cases = {
+        "range, one sport": (range_query(args.user, start, end, "week", ["Run"]), {by_type}),
+        "range, several sports": (range_query(args.user, start, end, "month", ["Run", "Ride", "Swim"]), {by_type, by_date}),
+        "range, all sports": (range_query(args.user, start, end, "day"), {by_type, by_date}),
+        "listing, first page": (page_query(listing_conditions(args.user), ["id", "name"], None, 51), {by_date}),
+        "listing, later page": (page_query(listing_conditions(args.user), ["id", "name"], (start, 0), 51), {by_date}),
+    }
+
+    db = SessionLocal()
+    failed = False
+    try:
+        connection = db.connection()
+        connection.exec_driver_sql("SET enable_seqscan = off")
+        for label, (stmt, expected) in cases.items():
+            compiled = stmt.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+            result = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+            plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+            scans = _index_scans(plan)
+            ok = any(index in expected for _, index in scans)
+            failed = failed or not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {label}: {scans or plan['Node Type']}")
+    finally:
+        db.rollback()
+        db.close()
+
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rollups = subparsers.add_parser("rebuild-rollups", help="Recompute workout rollups from the workouts table")
+    rollups.add_argument("--user", type=int, help="Only rebuild this user's rollups")
+    rollups.set_defaults(handler=rebuild_rollups)
+
+    records = subparsers.add_parser("rebuild-records", help="Recompute personal record history from workouts and best efforts")
+    records.add_argument("--user", type=int, help="Only rebuild this user's records")
+    records.set_defaults(handler=rebuild_records)
+
+    load = subparsers.add_parser("rebuild-training-load", help="Recompute the daily fitness/fatigue series from workouts")
+    load.add_argument("--user", type=int, help="Only rebuild this user's series")
+    load.set_defaults(handler=rebuild_training_load)
+
+    plans = subparsers.add_parser("check-plans", help="Assert analytics and listing queries use index range scans")
+    plans.add_argument("--user", type=int, default=1, help="User id to plan the queries for")
+    plans.set_defaults(handler=check_plans)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Send fake Strava push events to a locally running API.
+
+Examples:
+    python scripts/send_webhook_event.py handshake
+    python scripts/send_webhook_event.py activity --owner 1234 --activity 987 --aspect create
+    python scripts/send_webhook_event.py burst --owner 1234 --count 20
+    python scripts/send_webhook_event.py deauthorize --owner 1234
+"""
+import argparse
+import os
+import random
+import time
+import httpx
+
+DEFAULT_URL = "http://localhost:8000/api/strava/webhook"
+
+
+def build_event(subscription_id: int, owner_id: int, object_type: str, object_id: int, aspect_type: str, updates=None) -> dict:
+    return {
+        "object_type": object_type,
+        "object_id": object_id,
+        "aspect_type": aspect_type,
+        "owner_id": owner_id,
+        "subscription_id": subscription_id,
+        "event_time": int(time.time()),
+        "updates": updates or {},
+    }
+
+
+def post_event(client: httpx.Client, url: str, event: dict):
+    response = client.post(url, json=event)
+    print(f"{event['object_type']}:{event['aspect_type']} {event['object_id']} -> {response.status_code}")
+    response.raise_for_status()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument(
+        "--subscription-id", type=int, default=int(os.getenv("STRAVA_WEBHOOK_SUBSCRIPTION_ID", "1")),
+        help="Push subscription id the API expects (STRAVA_WEBHOOK_SUBSCRIPTION_ID)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    handshake = subparsers.add_parser("handshake", help="Run the subscription validation handshake")
+    handshake.add_argument("--verify-token", default=os.getenv("STRAVA_WEBHOOK_VERIFY_TOKEN", ""))
+
+    activity = subparsers.add_parser("activity", help="Send one activity event")
+    activity.add_argument("--owner", type=int, required=True, help="Strava athlete id")
+    activity.add_argument("--activity", type=int, required=True, help="Strava activity id")
+    activity.add_argument("--aspect", choices=["create", "update", "delete"], default="create")
+    activity.add_argument("--title", help="New title for update events")
+
+    burst = subparsers.add_parser("burst", help="Send a burst of mixed events for one athlete")
+    burst.add_argument("--owner", type=int, required=True)
+    burst.add_argument("--count", type=int, default=20)
+    burst.add_argument("--first-activity", type=int, default=10_000_000_000)
+
+    deauthorize = subparsers.add_parser("deauthorize", help="Send an athlete deauthorization event")
+    deauthorize.add_argument("--owner", type=int, required=True)
+
+    args = parser.parse_args()
+
+    with httpx.Client(timeout=5) as client:
+        if args.command == "handshake":
+            response = client.get(args.url, params={
+                "hub.mode": "subscribe",
+                "hub.challenge": "fake-challenge",
+                "hub.verify_token": args.verify_token,
+            })
+            print(response.status_code, response.text)
+            response.raise_for_status()
+
+        elif args.command == "activity":
+            updates = {"title": args.title} if args.title else {}
+            post_event(client, args.url, build_event(args.subscription_id, args.owner, "activity", args.activity, args.aspect, updates))
+
+        elif args.command == "burst":
+            # Repeated updates to a handful of activities, as Strava sends while a user edits
+            activity_ids = [args.first_activity + i for i in range(max(1, args.count // 4))]
+            for activity_id in activity_ids:
+                post_event(client, args.url, build_event(args.subscription_id, args.owner, "activity", activity_id, "create"))
+            for _ in range(args.count - len(activity_ids)):
+                activity_id = random.choice(activity_ids)
+                aspect = random.choice(["update", "update", "update", "delete"])
+                post_event(client, args.url, build_event(args.subscription_id, args.owner, "activity", activity_id, aspect))
+
+        elif args.command == "deauthorize":
+            post_event(client, args.url, build_event(
+                args.subscription_id, args.owner, "athlete", args.owner, "update", {"authorized": "false"}
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.database builds its engine at import; give pure tests a URL to import with.
+# Nothing connects until a test asks for the db fixture.
+load_dotenv()
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2:///kinetic_test")
+
+
+@pytest.fixture
+def db():
+    """A session on DATABASE_URL whose work is rolled back; skips unless that's a reachable Postgres"""
+    if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+        pytest.skip("DATABASE_URL does not point at Postgres")
+
+    from sqlalchemy.exc import OperationalError
+    from app.database.base import SessionLocal
+
+    session = SessionLocal()
+    try:
+        session.connection()
+    except OperationalError as e:
+        session.close()
+        pytest.skip(f"Postgres is not reachable: {e.orig}")
+
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+def has_extension(session, name: str) -> bool:
+    from sqlalchemy import text
+
+    return session.execute(text("SELECT 1 FROM pg_extension WHERE extname = :name"), {"name": name}).first() is not None
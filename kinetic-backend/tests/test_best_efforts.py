@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from app.services.best_efforts import compute_best_efforts
+
+
+def _steady_run(meters: int, pace: float = 0.3):
+    """One sample per 10 m at `pace` seconds per meter"""
+    distance = np.arange(0, meters + 1, 10, dtype=np.float64)
+    return distance * pace, distance
+
+
+def test_steady_pace_efforts():
+    time, distance = _steady_run(6000)
+    efforts = compute_best_efforts(time, distance, [1000, 5000, 10000])
+
+    assert set(efforts) == {1000, 5000}
+    assert efforts[1000][0] == pytest.approx(300)
+    assert efforts[5000][0] == pytest.approx(1500)
+
+
+def test_fastest_window_found_inside_the_run():
+    distance = np.arange(0, 3001, 10, dtype=np.float64)
+    # 3 s per 10 m, except the middle kilometer at half that
+    steps = np.where((distance[1:] > 1000) & (distance[1:] <= 2000), 1.5, 3.0)
+    time = np.concatenate([[0.0], np.cumsum(steps)])
+
+    elapsed, start_offset = compute_best_efforts(time, distance, [1000])[1000]
+    assert elapsed == pytest.approx(150)
+    assert start_offset == pytest.approx(300)
+
+
+def test_nan_gaps_in_distance_do_not_drop_later_efforts():
+    time, distance = _steady_run(6000)
+    clean = compute_best_efforts(time, distance, [1000, 5000])
+
+    distance = distance.copy()
+    distance[[5, 300, 301]] = np.nan
+    efforts = compute_best_efforts(time, distance, [1000, 5000])
+
+    assert set(efforts) == {1000, 5000}
+    for target, (elapsed, _) in efforts.items():
+        assert np.isfinite(elapsed)
+        assert elapsed == pytest.approx(clean[target][0])
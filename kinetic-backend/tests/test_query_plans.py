@@ -0,0 +1,100 @@
+"""
+The hot read paths must be served by their indexes. Sequential scans are
+disabled so the check holds on a small database too, where the planner would
+rightly prefer reading the whole table. Each query is planned for a new user
+given a few years of daily workouts, analyzed inside the test's transaction.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, text
+
+from conftest import has_extension
+
+BY_TYPE = "ix_workouts_user_type_start_date"
+BY_DATE = "ix_workouts_user_start_date_id"
+
+
+def _index_scans(plan: dict) -> set:
+    """Names of the indexes scanned anywhere in an EXPLAIN (FORMAT JSON) plan tree"""
+    scans = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        scans |= _index_scans(child)
+    return scans
+
+
+def _planned_indexes(db, stmt) -> set:
+    connection = db.connection()
+    compiled = stmt.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    result = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    return _index_scans((json.loads(result) if isinstance(result, str) else result)[0]["Plan"])
+
+
+SPORTS = ["Run", "Ride", "Swim", "Walk", "WeightTraining"]
+
+
+@pytest.fixture
+def user_id(db):
+    from app.models.user import User
+    from app.models.workout import Workout
+
+    user = User(email="query-plans@example.com")
+    db.add(user)
+    db.flush()
+
+    first_day = datetime(2022, 1, 1, 7)
+    db.execute(insert(Workout), [
+        {
+            "user_id": user.id,
+            "name": f"{SPORTS[day % len(SPORTS)]} {day}",
+            "type": SPORTS[day % len(SPORTS)],
+            "start_date": first_day + timedelta(days=day),
+            "distance": 5000.0,
+            "moving_time": 1800,
+        }
+        for day in range(3 * 365)
+    ])
+    # Statistics that include the seeded history; the rows roll back with the test
+    db.execute(text("ANALYZE workouts"))
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    return user.id
+
+
+def test_dashboard_reads_rollups_and_training_load_by_key(db, user_id):
+    from app.services.analytics import dashboard_query
+
+    scans = _planned_indexes(db, dashboard_query(user_id, datetime.utcnow() - timedelta(days=6)))
+    assert {"workout_rollups_pkey", "daily_training_loads_pkey"} <= scans
+
+
+@pytest.mark.parametrize("granularity, sports, expected", [
+    ("week", ["Run"], {BY_TYPE}),
+    # Without a single sport to pin the type column, either index serves a user and date range
+    ("month", ["Run", "Ride", "Swim"], {BY_TYPE, BY_DATE}),
+    ("day", None, {BY_TYPE, BY_DATE}),
+])
+def test_range_uses_user_index(db, user_id, granularity, sports, expected):
+    from app.services.analytics import range_query
+
+    end = datetime(2024, 12, 1)
+    scans = _planned_indexes(db, range_query(user_id, end - timedelta(weeks=12), end, granularity, sports))
+    assert scans & expected, scans
+
+
+@pytest.mark.parametrize("position", [None, (datetime(2024, 1, 1), 0)])
+def test_listing_pages_read_keyset_index(db, user_id, position):
+    from app.services.workout_list import listing_conditions, page_query
+
+    scans = _planned_indexes(db, page_query(listing_conditions(user_id), ["id", "name"], position, 51))
+    assert BY_DATE in scans, scans
+
+
+def test_search_uses_per_user_gin_indexes(db, user_id):
+    if not (has_extension(db, "pg_trgm") and has_extension(db, "btree_gin")):
+        pytest.skip("pg_trgm and btree_gin are not installed")
+    from app.services.workout_list import listing_conditions
+    from app.services.workout_search import search_query
+
+    scans = _planned_indexes(db, search_query("hill repeats", listing_conditions(user_id), ["id", "name"]))
+    assert {"ix_workouts_user_search_vector", "ix_workouts_user_name_trgm"} <= scans, scans
@@ -0,0 +1,66 @@
+"""
+The program routes hand serializer dicts straight to ORJSONResponse, so
+FastAPI no longer validates them. These keep the dicts in step with the
+response schemas the routes document, and with what validating the ORM
+objects used to return.
+"""
+from datetime import datetime
+from typing import List
+
+import orjson
+import pytest
+from pydantic import TypeAdapter
+
+
+@pytest.fixture
+def program(db):
+    from app.models.program import ProgramWeek, ProgramWorkout, TrainingProgram
+    from app.models.user import User
+
+    user = User(email="serializers@example.com")
+    db.add(user)
+    db.flush()
+
+    program = TrainingProgram(
+        user_id=user.id,
+        title="10K build",
+        description="Two weeks of sharpening",
+        goal="Run 10K under 50 minutes",
+        duration_weeks=2,
+        created_at=datetime(2024, 3, 1, 8, 30),
+        is_active=True,
+    )
+    for week_number in (1, 2):
+        week = ProgramWeek(week_number=week_number, weekly_goal=f"Week {week_number}")
+        week.workouts = [
+            ProgramWorkout(day_number=1, workout_type="Easy Run", description="Easy", duration_minutes=40,
+                           intensity="Easy", completed=week_number == 1),
+            ProgramWorkout(day_number=3, workout_type="Rest", description="", duration_minutes=None,
+                           intensity="Rest", completed=False),
+        ]
+        program.weeks.append(week)
+    db.add(program)
+    db.flush()
+    db.expire_all()
+    return db.get(TrainingProgram, program.id)
+
+
+def test_program_summaries_match_schema(db, program):
+    from app.routes.programs import ProgramSummary
+    from app.services.serializers import program_summaries
+
+    adapter = TypeAdapter(List[ProgramSummary])
+    body = orjson.loads(orjson.dumps(program_summaries(db, program.user_id)))
+
+    assert adapter.dump_python(adapter.validate_python(body)) == \
+        adapter.dump_python(adapter.validate_python([program], from_attributes=True))
+
+
+def test_program_detail_matches_schema(db, program):
+    from app.routes.programs import ProgramResponse
+    from app.services.serializers import program_detail
+
+    body = orjson.loads(orjson.dumps(program_detail(db, program.id)))
+
+    assert ProgramResponse.model_validate(body).model_dump() == ProgramResponse.model_validate(program).model_dump()
+    assert program_detail(db, 0) is None
@@ -0,0 +1,58 @@
+"""Workout search against a real Postgres with pg_trgm; the work is rolled back"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from conftest import has_extension
+
+NAMES = ["Track intervals", "Hill repeats", "Easy run", "Long ride", "Morning swim"]
+
+
+def _add_user(db, email, names):
+    from app.models.user import User
+    from app.models.workout import Workout
+
+    user = User(email=email)
+    db.add(user)
+    db.flush()
+    db.execute(insert(Workout), [
+        {"user_id": user.id, "name": name, "type": "Run", "start_date": datetime(2025, 3, 1) + timedelta(days=day)}
+        for day, name in enumerate(names)
+    ])
+    return user.id
+
+
+@pytest.fixture
+def user_id(db):
+    if not has_extension(db, "pg_trgm"):
+        pytest.skip("pg_trgm is not installed")
+    _add_user(db, "search-other@example.com", NAMES)
+    return _add_user(db, "search@example.com", NAMES)
+
+
+def _names(db, user_id, text, **kwargs):
+    from app.services.workout_search import search_workouts
+
+    return [result["name"] for result in search_workouts(db, user_id, text, fields="name", **kwargs)["results"]]
+
+
+def test_stemmed_words_match(db, user_id):
+    assert _names(db, user_id, "repeat") == ["Hill repeats"]
+
+
+@pytest.mark.parametrize("text", ["interv", "intervls"])
+def test_partial_and_misspelled_words_match_by_trigram(db, user_id, text):
+    assert _names(db, user_id, text) == ["Track intervals"]
+
+
+def test_sport_alone_does_not_match(db, user_id):
+    # Every seeded workout is a Run; only the name that says so matches
+    assert _names(db, user_id, "run") == ["Easy run"]
+
+
+def test_offset_stops_at_the_limit(db, user_id):
+    from app.services.workout_search import MAX_SEARCH_OFFSET, search_workouts
+
+    with pytest.raises(ValueError):
+        search_workouts(db, user_id, "run", offset=MAX_SEARCH_OFFSET + 1)
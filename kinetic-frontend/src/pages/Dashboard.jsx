@@ -3,10 +3,19 @@ import { useNavigate } from "react-router-dom";
 import { useState, useEffect } from "react";
 import { analyticsAPI, stravaAPI } from "../services/api";
 
+// Celery states of a job that hasn't finished; anything else is final
+const SYNC_RUNNING_STATES = ['PENDING', 'STARTED', 'RETRY', 'PROGRESS'];
+const SYNC_POLL_INTERVAL_MS = 1000;
+// Stop waiting after this long; the job itself keeps running
+const SYNC_TIMEOUT_MS = 15 * 60 * 1000;
+
 const Dashboard = () => {
     const { user, isConnected } = useUserStore();
     const navigate = useNavigate();
     const [stats, setStats] = useState(null);
+    const [weekly, setWeekly] = useState(null);
+    const [usage, setUsage] = useState(null);
+    const [activeProgram, setActiveProgram] = useState(null);
     const [loading, setLoading] = useState(true);
     const [syncing, setSyncing] = useState(false);
 
@@ -20,8 +29,11 @@ const Dashboard = () => {
     const loadStats = async () => {
         try {
             setLoading(true);
-            const response = await analyticsAPI.getDashboardStats(user.id);
-            setStats(response.data);
+            const { data } = await analyticsAPI.getDashboardBundle(user.id);
+            setStats(data.stats);
+            setWeekly(data.weekly);
+            setUsage(data.usage);
+            setActiveProgram(data.programs.find((program) => program.is_active) || null);
         } catch (error) {
             console.error('Error loading stats:', error);
         } finally {
@@ -29,10 +41,27 @@ const Dashboard = () => {
         }
     };
 
+    const waitForSyncJob = async (jobId) => {
+        // Sync runs as a background job; poll until it finishes
+        const deadline = Date.now() + SYNC_TIMEOUT_MS;
+        while (Date.now() < deadline) {
+            const { data } = await stravaAPI.getSyncJob(jobId);
+            if (data.status === 'SUCCESS') {
+                return data.result;
+            }
+            if (!SYNC_RUNNING_STATES.includes(data.status)) {
+                throw new Error(data.error || `Sync job ended with status ${data.status}`);
+            }
+            await new Promise((resolve) => setTimeout(resolve, SYNC_POLL_INTERVAL_MS));
+        }
+        throw new Error('Timed out waiting for the sync job');
+    };
+
     const handleSync = async () => {
         try {
             setSyncing(true);
-            await stravaAPI.syncWorkouts(user.id);
+            const response = await stravaAPI.syncWorkouts(user.id);
+            await waitForSyncJob(response.data.job_id);
             // Reload stats after sync
             await loadStats();
             alert('Workouts synced successfully!');
@@ -106,7 +135,7 @@ const Dashboard = () => {
                 </div>
 
                 {/* Stats cards */}
-                <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
+                <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
                     <div className="bg-white rounded-lg shadow p-6">
                         <h3 className="text-sm text-gray-600 mb-2">Total Activities</h3>
                         <p className="text-3xl font-bold">
@@ -127,6 +156,45 @@ const Dashboard = () => {
                             {loading ? '...' : stats?.training_load?.toFixed(1) || 0}
                         </p>
                     </div>
+
+                    <div className="bg-white rounded-lg shadow p-6">
+                        <h3 className="text-sm text-gray-600 mb-2">Fitness / Fatigue / Form</h3>
+                        <p className="text-3xl font-bold">
+                            {loading ? '...' : `${Math.round(stats?.fitness?.ctl || 0)} / ${Math.round(stats?.fitness?.atl || 0)} / ${Math.round(stats?.fitness?.tsb || 0)}`}
+                        </p>
+                    </div>
+                </div>
+
+                <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mt-4">
+                    <div className="bg-white rounded-lg shadow p-6">
+                        <h3 className="text-sm text-gray-600 mb-2">Distance This Week (km)</h3>
+                        <p className="text-3xl font-bold">
+                            {loading ? '...' : weekly?.total_distance_km || 0}
+                        </p>
+                    </div>
+
+                    <div className="bg-white rounded-lg shadow p-6">
+                        <h3 className="text-sm text-gray-600 mb-2">Active Program</h3>
+                        {loading ? (
+                            <p className="text-3xl font-bold">...</p>
+                        ) : activeProgram ? (
+                            <button
+                                onClick={() => navigate(`/programs/${activeProgram.id}`)}
+                                className="text-lg font-bold text-blue-600 hover:underline text-left"
+                            >
+                                {activeProgram.title}
+                            </button>
+                        ) : (
+                            <p className="text-lg text-gray-500">None</p>
+                        )}
+                    </div>
+
+                    <div className="bg-white rounded-lg shadow p-6">
+                        <h3 className="text-sm text-gray-600 mb-2">Coach Messages Left Today</h3>
+                        <p className="text-3xl font-bold">
+                            {loading ? '...' : usage?.messages_remaining ?? 0}
+                        </p>
+                    </div>
                 </div>
             </div>
         </div>
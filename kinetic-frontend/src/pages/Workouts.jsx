@@ -3,13 +3,51 @@ import { useUserStore } from "../store/userStore";
 import { useNavigate } from "react-router-dom";
 import { workoutsAPI } from "../services/api";
 
+const PAGE_SIZE = 50;
+
+// Only the columns the list renders
+const LIST_FIELDS = 'id,name,type,start_date,moving_time,distance,average_speed';
+
+const TYPE_FILTERS = ['All', 'Run', 'Ride', 'Swim', 'Walk', 'Hike'];
+
 const Workouts = () => {
     const { user, isConnected } = useUserStore();
     const navigate = useNavigate();
     const [workouts, setWorkouts] = useState([]);
+    // Listing cursor, or search offset while searching
+    const [nextPage, setNextPage] = useState(null);
+    const [total, setTotal] = useState(null);
+    const [typeFilter, setTypeFilter] = useState('All');
+    const [searchInput, setSearchInput] = useState('');
+    const [query, setQuery] = useState('');
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
 
+    // One page of the listing, or of search results when there is a query
+    const fetchPage = async (page) => {
+        const params = {
+            limit: PAGE_SIZE,
+            fields: LIST_FIELDS,
+            ...(typeFilter !== 'All' && { type: typeFilter }),
+        };
+        if (query) {
+            const { data } = await workoutsAPI.search(user.id, { ...params, q: query, offset: page || 0 });
+            return { workouts: data.results, next: data.next_offset, total: null };
+        }
+        const { data } = await workoutsAPI.getUserWorkouts(user.id, { ...params, ...(page && { cursor: page }) });
+        return {
+            workouts: data.workouts,
+            next: data.next_cursor,
+            total: data.total_exact ? data.total : `~${data.total}`,
+        };
+    };
+
+    const handleSearch = (event) => {
+        event.preventDefault();
+        setQuery(searchInput.trim());
+    };
+
     useEffect(() => {
         if (!isConnected || !user?.id) {
             navigate('/');
@@ -19,8 +57,10 @@ const Workouts = () => {
         const fetchWorkouts = async () => {
             try {
                 setLoading(true);
-                const response = await workoutsAPI.getUserWorkouts(user.id);
-                setWorkouts(response.data);
+                const page = await fetchPage(null);
+                setWorkouts(page.workouts);
+                setNextPage(page.next);
+                setTotal(page.total);
             } catch (err) {
                 console.error('Error fetching workouts:', err);
                 setError('Failed to load workouts. Please try again.');
@@ -30,7 +70,21 @@ const Workouts = () => {
         };
 
         fetchWorkouts();
-    }, [user, isConnected, navigate]);
+    }, [user, isConnected, navigate, typeFilter, query]);
+
+    const loadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const page = await fetchPage(nextPage);
+            setWorkouts((current) => [...current, ...page.workouts]);
+            setNextPage(page.next);
+        } catch (err) {
+            console.error('Error fetching workouts:', err);
+            setError('Failed to load workouts. Please try again.');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     const formatDate = (dateString) => {
         const date = new Date(dateString);
@@ -98,7 +152,12 @@ const Workouts = () => {
             <div className="max-w-6xl mx-auto">
                 {/* Header */}
                 <div className="flex justify-between items-center mb-8">
-                    <h1 className="text-3xl font-bold">Your Workouts</h1>
+                    <div>
+                        <h1 className="text-3xl font-bold">Your Workouts</h1>
+                        {total !== null && !query && (
+                            <p className="text-gray-600">{total} workouts</p>
+                        )}
+                    </div>
                     <button
                         onClick={() => navigate('/dashboard')}
                         className="bg-gray-600 hover:bg-gray-700 text-white py-2 px-6 rounded-lg transition"
@@ -107,11 +166,54 @@ const Workouts = () => {
                     </button>
                 </div>
 
+                {/* Search */}
+                <form onSubmit={handleSearch} className="flex gap-2 mb-4">
+                    <input
+                        type="text"
+                        value={searchInput}
+                        onChange={(e) => setSearchInput(e.target.value)}
+                        placeholder="Search workouts by name, e.g. hill repeats"
+                        className="flex-1 px-4 py-2 rounded-lg shadow border border-gray-200 focus:outline-none focus:ring-2 focus:ring-blue-500"
+                    />
+                    <button
+                        type="submit"
+                        className="bg-blue-600 hover:bg-blue-700 text-white py-2 px-6 rounded-lg transition"
+                    >
+                        Search
+                    </button>
+                    {query && (
+                        <button
+                            type="button"
+                            onClick={() => { setSearchInput(''); setQuery(''); }}
+                            className="bg-gray-200 hover:bg-gray-300 text-gray-700 py-2 px-4 rounded-lg transition"
+                        >
+                            Clear
+                        </button>
+                    )}
+                </form>
+
+                {/* Type filter */}
+                <div className="flex gap-2 mb-6">
+                    {TYPE_FILTERS.map((type) => (
+                        <button
+                            key={type}
+                            onClick={() => setTypeFilter(type)}
+                            className={`px-4 py-2 rounded-full text-sm font-bold transition ${
+                                typeFilter === type ? 'bg-gray-800 text-white' : 'bg-white text-gray-700 shadow hover:bg-gray-100'
+                            }`}
+                        >
+                            {type}
+                        </button>
+                    ))}
+                </div>
+
                 {/* Workouts list */}
                 {workouts.length === 0 ? (
                     <div className="bg-white rounded-lg shadow p-12 text-center">
                         <p className="text-xl text-gray-600">
-                            No workouts found. Your Strava activities will appear here after syncing.
+                            {query
+                                ? `No workouts match "${query}".`
+                                : 'No workouts found. Your Strava activities will appear here after syncing.'}
                         </p>
                     </div>
                 ) : (
@@ -157,6 +259,18 @@ const Workouts = () => {
                                 </div>
                             </div>
                         ))}
+
+                        {nextPage !== null && (
+                            <div className="text-center">
+                                <button
+                                    onClick={loadMore}
+                                    disabled={loadingMore}
+                                    className="bg-blue-600 hover:bg-blue-700 text-white py-2 px-6 rounded-lg transition disabled:bg-gray-400 disabled:cursor-not-allowed"
+                                >
+                                    {loadingMore ? 'Loading...' : 'Load More'}
+                                </button>
+                            </div>
+                        )}
                     </div>
                 )}
             </div>
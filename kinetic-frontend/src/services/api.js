@@ -14,12 +14,18 @@ export const stravaAPI = {
     getAuthUrl: () => api.get('/strava/auth/url'),
     handleCallback: (code) => api.post(`/strava/auth/callback?code=${code}`),
     syncWorkouts: (userId) => api.post(`/strava/sync/${userId}`),
+    getSyncJob: (jobId) => api.get(`/strava/sync/jobs/${jobId}`),
     getStatus: (userId) => api.get(`/strava/status/${userId}`),
 };
 
 // Workouts API
 export const workoutsAPI = {
-    getUserWorkouts: (userId) => api.get(`/workouts/${userId}`),
+    // One page, newest first: { workouts, next_cursor, total, total_exact }.
+    // params: limit, cursor, type, from, to, min_distance, max_distance, fields
+    getUserWorkouts: (userId, params = {}) => api.get(`/workouts/${userId}`, { params }),
+    // Ranked matches by name and type: { results, next_offset }.
+    // params: q, limit, offset, type, from, to, fields
+    search: (userId, params) => api.get(`/workouts/${userId}/search`, { params }),
 };
 
 // Chat API endpoints
@@ -35,14 +41,21 @@ export const chatAPI = {
 // Analytics API endpoints
 export const analyticsAPI = {
     getDashboardStats: (userId) => api.get(`/analytics/dashboard/${userId}`),
+    // Stats, weekly summary, chat usage and programs in one round trip
+    getDashboardBundle: (userId) => api.get(`/analytics/dashboard/${userId}/bundle`),
     getWeeklySummary: (userId) => api.get(`/analytics/weekly/${userId}`),
 };
 
 // Sport Analytics API
+// The running, cycling and swimming pages each take their sport from the one
+// all-sports response; the server's ETag makes repeat loads cheap.
+const getAllSports = (userId) => api.get(`/analytics/sports/${userId}`);
+
 export const sportAnalyticsAPI = {
-    getRunning: (userId) => api.get(`/analytics/running/${userId}`),
-    getCycling: (userId) => api.get(`/analytics/cycling/${userId}`),
-    getSwimming: (userId) => api.get(`/analytics/swimming/${userId}`)
+    getAll: getAllSports,
+    getRunning: (userId) => getAllSports(userId).then((response) => ({ ...response, data: response.data.running })),
+    getCycling: (userId) => getAllSports(userId).then((response) => ({ ...response, data: response.data.cycling })),
+    getSwimming: (userId) => getAllSports(userId).then((response) => ({ ...response, data: response.data.swimming }))
 };
 
 // Programs API endpoints